@@ -0,0 +1,4 @@
+"""Benchmarks of the MCP server against a local fake Bugzilla
+
+    python -m benchmarks --help
+"""
@@ -0,0 +1,101 @@
+"""Command line entry point of the benchmarks
+
+    # run every scenario and keep the results as the baseline
+    python -m benchmarks --save baseline.json
+
+    # later, compare against it (exits with status 1 on regressions)
+    python -m benchmarks --compare baseline.json
+
+    # throughput of server.py with 1, 2 and 4 worker processes
+    python -m benchmarks --workers 1 --workers 2 --workers 4 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import sys
+from .harness import SCENARIOS, FakeConfig, RunConfig, compare, load, report, run, save, scaling_report
+
+
+def main() -> int:
+    fake_defaults, run_defaults = FakeConfig(), RunConfig()
+
+    parser = argparse.ArgumentParser(description="Benchmark the Bugzilla MCP server against a fake Bugzilla")
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS), help="scenario to run, default all")
+    parser.add_argument("--calls", type=int, default=run_defaults.calls, help="measured tool calls per scenario")
+    parser.add_argument("--concurrency", type=int, default=run_defaults.concurrency, help="concurrent MCP clients")
+    parser.add_argument("--tenants", type=int, default=run_defaults.tenants, help="distinct API keys")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        action="append",
+        help="run server.py with this many worker processes, repeat to compare; default in this process",
+    )
+    parser.add_argument("--warmup", type=int, default=run_defaults.warmup)
+    parser.add_argument("--seed", type=int, default=run_defaults.seed)
+    parser.add_argument("--bugs", type=int, default=fake_defaults.bugs)
+    parser.add_argument("--comments-per-bug", type=int, default=fake_defaults.comments_per_bug)
+    parser.add_argument("--bug-bytes", type=int, default=fake_defaults.bug_bytes)
+    parser.add_argument("--comment-bytes", type=int, default=fake_defaults.comment_bytes)
+    parser.add_argument("--min-latency", type=float, default=fake_defaults.min_latency, help="seconds")
+    parser.add_argument("--max-latency", type=float, default=fake_defaults.max_latency, help="seconds")
+    parser.add_argument("--error-rate", type=float, default=fake_defaults.error_rate, help="share of 503 answers")
+    parser.add_argument("--save", metavar="PATH", help="write the results to PATH as JSON")
+    parser.add_argument("--compare", metavar="PATH", help="compare with the results saved in PATH")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="allowed regression, default 10%%")
+    args = parser.parse_args()
+
+    if args.workers and len(args.workers) > 1 and (args.save or args.compare):
+        parser.error("--save and --compare take a single --workers")
+
+    fake_config = FakeConfig(
+        bugs=args.bugs,
+        comments_per_bug=args.comments_per_bug,
+        bug_bytes=args.bug_bytes,
+        comment_bytes=args.comment_bytes,
+        min_latency=args.min_latency,
+        max_latency=args.max_latency,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    run_configs = [
+        RunConfig(
+            scenarios=args.scenario or list(SCENARIOS),
+            calls=args.calls,
+            concurrency=args.concurrency,
+            tenants=args.tenants,
+            warmup=args.warmup,
+            seed=args.seed,
+            workers=workers,
+        )
+        for workers in args.workers or [0]
+    ]
+
+    if len(run_configs) > 1:
+        runs = []
+        for run_config in run_configs:
+            runs.append(asyncio.run(run(fake_config, run_config)))
+            print(f"{run_config.workers} workers")
+            print(report(runs[-1]))
+            print()
+        print(scaling_report(runs))
+        return 0
+
+    results = asyncio.run(run(fake_config, run_configs[0]))
+    baseline = load(args.compare) if args.compare else None
+
+    print(report(results, baseline))
+
+    if args.save:
+        save(args.save, results)
+
+    if baseline is not None:
+        regressions = compare(baseline, results, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
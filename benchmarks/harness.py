@@ -0,0 +1,400 @@
+"""Run the MCP HTTP server against the fake Bugzilla and measure tool calls"""
+
+import asyncio
+import json
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable
+import httpx
+import uvicorn
+from fastmcp import Client
+from fastmcp.client.transports import StreamableHttpTransport
+from tests.fake_bugzilla import WORDS, FakeBugzilla, generate_bugs
+
+
+@dataclass
+class FakeConfig:
+    """Shape of the fake Bugzilla"""
+
+    bugs: int = 1000
+    comments_per_bug: int = 10
+    # bytes of filler text added to every bug and to every comment
+    bug_bytes: int = 2000
+    comment_bytes: int = 500
+    # latency of each response, uniformly drawn between min and max (seconds)
+    min_latency: float = 0.005
+    max_latency: float = 0.02
+    # share of requests answered with a 503
+    error_rate: float = 0.0
+    seed: int = 0
+
+
+def fake_bugzilla(config: FakeConfig) -> FakeBugzilla:
+    bugs, comments = generate_bugs(
+        config.bugs, config.comments_per_bug, config.bug_bytes, config.comment_bytes, config.seed
+    )
+    return FakeBugzilla(
+        bugs,
+        comments,
+        min_latency=config.min_latency,
+        max_latency=config.max_latency,
+        error_rate=config.error_rate,
+        seed=config.seed,
+    )
+
+
+# tool call arguments of each scenario, drawn from a seeded random generator
+Scenario = Callable[[random.Random, FakeConfig], tuple[str, dict[str, Any]]]
+
+SCENARIOS: dict[str, Scenario] = {
+    "bug_info": lambda rng, fake: ("bug_info", {"id": rng.randint(1, fake.bugs)}),
+    "bugs_info": lambda rng, fake: ("bugs_info", {"ids": rng.sample(range(1, fake.bugs + 1), 20)}),
+    "bug_comments": lambda rng, fake: ("bug_comments", {"id": rng.randint(1, fake.bugs)}),
+    "bugs_quicksearch": lambda rng, fake: ("bugs_quicksearch", {"query": rng.choice(WORDS), "limit": 50}),
+    "learn_quicksearch_syntax": lambda rng, fake: ("learn_quicksearch_syntax", {"compact": True}),
+}
+
+
+@dataclass
+class RunConfig:
+    """Load applied to the server"""
+
+    scenarios: list[str] = field(default_factory=lambda: list(SCENARIOS))
+    calls: int = 500
+    concurrency: int = 20
+    # distinct API keys used by the clients, each is a separate tenant of the server
+    tenants: int = 1
+    warmup: int = 20
+    seed: int = 0
+    # 0 serves the app inside the benchmark process, N runs server.py with N worker processes
+    workers: int = 0
+
+
+@dataclass
+class ScenarioResult:
+    calls: int
+    errors: int
+    seconds: float
+    rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    upstream_per_call: float
+    rss_mb: float
+
+
+def percentile(values: list[float], p: float) -> float:
+    """p-th percentile (0-100) of values, by linear interpolation"""
+
+    if not values:
+        return 0.0
+
+    values = sorted(values)
+    rank = (len(values) - 1) * p / 100
+    low = int(rank)
+    high = min(low + 1, len(values) - 1)
+
+    return values[low] + (values[high] - values[low]) * (rank - low)
+
+
+def _descendants(pid: int) -> list[int]:
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            children = [int(child) for child in f.read().split()]
+    except OSError:
+        return []
+
+    return [pid for child in children for pid in (child, *_descendants(child))]
+
+
+def rss_mb(server_pid: int | None = None) -> float:
+    """Resident set size of this process (fake Bugzilla and clients, and the server unless server_pid)
+    plus that of server_pid and its children"""
+
+    pids = ["self"] + ([server_pid, *_descendants(server_pid)] if server_pid else [])
+    pages = 0
+
+    try:
+        for pid in pids:
+            with open(f"/proc/{pid}/statm") as f:
+                pages += int(f.read().split()[1])
+        return pages * resource.getpagesize() / 2**20
+    except OSError:
+        # peak rather than current outside Linux (ru_maxrss is in KiB on Linux, bytes on macOS)
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if server_pid:
+            usage += resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        return usage / 2**20
+
+
+async def serve(app: Any) -> tuple[uvicorn.Server, asyncio.Task, str]:
+    """Start app on a free local port, returning the server, its task and base URL"""
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning", lifespan="on"))
+    task = asyncio.create_task(server.serve())
+
+    while not server.started:
+        if task.done():
+            task.result()
+        await asyncio.sleep(0.01)
+
+    port = server.servers[0].sockets[0].getsockname()[1]
+    return server, task, f"http://127.0.0.1:{port}"
+
+
+async def stop(server: uvicorn.Server, task: asyncio.Task):
+    server.should_exit = True
+    await task
+
+
+@dataclass
+class Target:
+    """The MCP server under test"""
+
+    url: str
+    # empties its response cache
+    clear_cache: Callable[[], Awaitable[None]]
+    # process of the server when not this one
+    pid: int | None = None
+
+
+@asynccontextmanager
+async def in_process() -> AsyncIterator[Target]:
+    """The server app served by this process"""
+
+    # imported here so that the server module is only loaded by the benchmark run
+    import bugzilla_mcp.utils as utils
+    from server import mcp
+
+    mcp_server, mcp_task, mcp_url = await serve(mcp.http_app())
+
+    try:
+        yield Target(mcp_url, utils.cache.clear)
+    finally:
+        await stop(mcp_server, mcp_task)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@asynccontextmanager
+async def subprocess_server(workers: int, timeout: float = 60.0) -> AsyncIterator[Target]:
+    """server.py run with `workers` processes sharing a cache server, as deployed"""
+
+    from bugzilla_mcp.utils.resp import RespClient
+    from bugzilla_mcp.workers import cache_server
+
+    port = free_port()
+    script = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "server.py")
+
+    with cache_server(256 * 1024 * 1024) as cache_url:
+        env = {
+            **os.environ,
+            "FASTMCP_HOST": "127.0.0.1",
+            "FASTMCP_PORT": str(port),
+            "FASTMCP_LOG_LEVEL": "WARNING",
+            "BUGZILLA_MCP_WORKERS": str(workers),
+            # shared by every worker count so that runs differ only by the workers
+            "BUGZILLA_MCP_CACHE_URL": cache_url,
+        }
+        process = subprocess.Popen([sys.executable, script], env=env, stdout=subprocess.DEVNULL)
+        cache = RespClient(cache_url)
+
+        async def clear_cache():
+            await cache.execute("FLUSHDB")
+
+        try:
+            url = f"http://127.0.0.1:{port}"
+            deadline = time.monotonic() + timeout
+
+            async with httpx.AsyncClient() as client:
+                while True:
+                    if process.poll() is not None:
+                        raise RuntimeError(f"server.py exited with status {process.returncode}")
+                    if time.monotonic() > deadline:
+                        raise RuntimeError("server.py did not start")
+                    try:
+                        await client.get(f"{url}/metrics")
+                        break
+                    except httpx.TransportError:
+                        await asyncio.sleep(0.1)
+
+            yield Target(url, clear_cache, process.pid)
+        finally:
+            await cache.close()
+            process.terminate()
+            process.wait()
+
+
+async def run(fake_config: FakeConfig, run_config: RunConfig) -> dict[str, Any]:
+    """Benchmark every scenario of run_config, returning the configuration and the results"""
+
+    fake = fake_bugzilla(fake_config)
+    fake_server, fake_task, fake_url = await serve(fake.app)
+
+    try:
+        target = in_process() if run_config.workers == 0 else subprocess_server(run_config.workers)
+        async with target as server:
+            results = await _run_scenarios(fake, fake_url, server, fake_config, run_config)
+    finally:
+        await stop(fake_server, fake_task)
+
+    return {
+        "fake": asdict(fake_config),
+        "run": asdict(run_config),
+        "results": {name: asdict(result) for name, result in results.items()},
+    }
+
+
+async def _run_scenarios(
+    fake: FakeBugzilla, fake_url: str, server: Target, fake_config: FakeConfig, run_config: RunConfig
+) -> dict[str, ScenarioResult]:
+    rng = random.Random(run_config.seed)
+    clients = [
+        Client(StreamableHttpTransport(
+            f"{server.url}/mcp",
+            headers={"api_key": f"bench-key-{i % run_config.tenants}", "bugzilla_url": fake_url},
+        ))
+        for i in range(run_config.concurrency)
+    ]
+
+    results: dict[str, ScenarioResult] = {}
+
+    try:
+        for client in clients:
+            await client.__aenter__()
+
+        for name in run_config.scenarios:
+            scenario = SCENARIOS[name]
+
+            # every scenario starts cold, with the connections already open
+            await server.clear_cache()
+
+            async def call(client: Client) -> tuple[float, bool]:
+                tool, arguments = scenario(rng, fake_config)
+                started = time.perf_counter()
+                result = await client.call_tool(tool, arguments, raise_on_error=False)
+                return time.perf_counter() - started, result.is_error
+
+            for i in range(run_config.warmup):
+                await call(clients[i % len(clients)])
+
+            latencies: list[float] = []
+            errors = 0
+            remaining = run_config.calls
+            upstream_before = len(fake.requests)
+
+            async def worker(client: Client):
+                nonlocal remaining, errors
+                while remaining > 0:
+                    remaining -= 1
+                    latency, failed = await call(client)
+                    latencies.append(latency)
+                    errors += failed
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker(c) for c in clients))
+            seconds = time.perf_counter() - started
+
+            results[name] = ScenarioResult(
+                calls=len(latencies),
+                errors=errors,
+                seconds=round(seconds, 3),
+                rps=round(len(latencies) / seconds, 1),
+                p50_ms=round(percentile(latencies, 50) * 1000, 2),
+                p95_ms=round(percentile(latencies, 95) * 1000, 2),
+                p99_ms=round(percentile(latencies, 99) * 1000, 2),
+                upstream_per_call=round((len(fake.requests) - upstream_before) / len(latencies), 3),
+                rss_mb=round(rss_mb(server.pid), 1),
+            )
+
+    finally:
+        for client in clients:
+            await client.__aexit__(None, None, None)
+
+    return results
+
+
+def compare(baseline: dict[str, Any], current: dict[str, Any], tolerance: float) -> list[str]:
+    """Regressions of current against baseline beyond tolerance (e.g. 0.1 for 10%)"""
+
+    regressions = []
+
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+
+        if before is None:
+            continue
+
+        for metric in ("p50_ms", "p95_ms", "p99_ms", "upstream_per_call", "rss_mb"):
+            if before[metric] and result[metric] > before[metric] * (1 + tolerance):
+                regressions.append(f"{name}: {metric} {before[metric]} -> {result[metric]}")
+
+        if before["rps"] and result["rps"] < before["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: rps {before['rps']} -> {result['rps']}")
+
+        if result["errors"] > before["errors"]:
+            regressions.append(f"{name}: errors {before['errors']} -> {result['errors']}")
+
+    return regressions
+
+
+def report(results: dict[str, Any], baseline: dict[str, Any] | None = None) -> str:
+    """Results as a text table, with the change from baseline when given"""
+
+    columns = ["calls", "errors", "rps", "p50_ms", "p95_ms", "p99_ms", "upstream_per_call", "rss_mb"]
+    lines = [f"{'scenario':<26}" + "".join(f"{c:>19}" for c in columns)]
+
+    for name, result in results["results"].items():
+        before = (baseline or {}).get("results", {}).get(name)
+        cells = []
+
+        for column in columns:
+            cell = f"{result[column]}"
+            if before and before.get(column):
+                cell += f" ({(result[column] - before[column]) / before[column]:+.0%})"
+            cells.append(f"{cell:>19}")
+
+        lines.append(f"{name:<26}" + "".join(cells))
+
+    return "\n".join(lines)
+
+
+def scaling_report(runs: list[dict[str, Any]]) -> str:
+    """Requests per second of each scenario by number of workers, with the speedup over the first run"""
+
+    counts = [run["run"]["workers"] for run in runs]
+    lines = [f"{'scenario':<26}" + "".join(f"{f'{n} workers rps':>22}" for n in counts)]
+
+    for name in runs[0]["results"]:
+        first = runs[0]["results"][name]["rps"]
+        cells = []
+
+        for run in runs:
+            rps = run["results"][name]["rps"]
+            cells.append(f"{f'{rps} (x{rps / first:.2f})' if first else rps:>22}")
+
+        lines.append(f"{name:<26}" + "".join(cells))
+
+    return "\n".join(lines)
+
+
+def load(path: str) -> dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)
+
+
+def save(path: str, results: dict[str, Any]):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+        f.write("\n")
@@ -2,21 +2,41 @@
 
 from .tools.bugzilla import (
     bug_info,
+    bugs_info,
     bug_comments,
+    bugs_comments,
+    bug_dossier,
     add_comment,
+    add_comments_bulk,
     bugs_quicksearch,
+    changed_bugs_since,
     learn_quicksearch_syntax,
     server_url,
     bug_url,
 )
+from .tools.mirror import (
+    mirror_search,
+    mirror_quicksearch,
+    mirror_bug_info,
+    mirror_bug_comments,
+)
 
 __all__ = [
     "bug_info",
+    "bugs_info",
     "bug_comments",
+    "bugs_comments",
+    "bug_dossier",
     "add_comment",
+    "add_comments_bulk",
     "bugs_quicksearch",
+    "changed_bugs_since",
     "learn_quicksearch_syntax",
     "server_url",
     "bug_url",
+    "mirror_search",
+    "mirror_quicksearch",
+    "mirror_bug_info",
+    "mirror_bug_comments",
 ]
 
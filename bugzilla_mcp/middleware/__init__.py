@@ -1,6 +1,7 @@
 """Middleware for Bugzilla MCP server"""
 
+from .metrics import RecordMetrics
+from .tracing import TraceMessages
 from .validate_headers import ValidateHeaders
 
-__all__ = ["ValidateHeaders"]
-
+__all__ = ["RecordMetrics", "TraceMessages", "ValidateHeaders"]
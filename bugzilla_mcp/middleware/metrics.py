@@ -0,0 +1,38 @@
+"""Middleware recording the duration and errors of tool calls"""
+
+import time
+from fastmcp.server.middleware import Middleware, MiddlewareContext
+import bugzilla_mcp.utils as utils
+
+
+class RecordMetrics(Middleware):
+    """Record every tool call in utils.metrics
+
+    Must be added after ValidateHeaders, which binds the caller's Bugzilla
+    client: its host labels the series. Tool names are sent by the client, so
+    names no tool is registered under are all recorded as `unknown`.
+    """
+
+    async def on_call_tool(self, middleware_context: MiddlewareContext, call_next):
+        tool = await self._tool_label(middleware_context)
+        bz = utils.current_bz.get()
+        host = bz.host if bz is not None else ""
+        started = time.perf_counter()
+
+        try:
+            return await call_next(middleware_context)
+        except Exception:
+            utils.metrics.tool_errors.inc(tool, host)
+            raise
+        finally:
+            utils.metrics.tool_duration.observe(time.perf_counter() - started, tool, host)
+
+    @staticmethod
+    async def _tool_label(middleware_context: MiddlewareContext) -> str:
+        name = middleware_context.message.name
+        context = middleware_context.fastmcp_context
+
+        if context is None or name not in await context.fastmcp.get_tools():
+            return "unknown"
+
+        return name
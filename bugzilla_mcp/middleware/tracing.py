@@ -0,0 +1,38 @@
+"""Middleware opening OpenTelemetry spans for MCP messages and tool calls"""
+
+from fastmcp.server.middleware import Middleware, MiddlewareContext
+import bugzilla_mcp.utils as utils
+from bugzilla_mcp.utils import tracing
+
+
+class TraceMessages(Middleware):
+    """Open a span for every MCP message, and a child span for tool calls
+
+    Must be added after ValidateHeaders, which binds the caller's Bugzilla
+    client. The spans of the tool function and of its Bugzilla requests nest
+    below, which separates the time spent in fastmcp from the time spent in
+    the tool.
+    """
+
+    async def on_message(self, middleware_context: MiddlewareContext, call_next):
+        if tracing.tracer is None:
+            return await call_next(middleware_context)
+
+        method = middleware_context.method or "unknown"
+
+        with tracing.tracer.start_as_current_span(
+            f"mcp {method}", kind=tracing.trace.SpanKind.SERVER, attributes={"mcp.method.name": method}
+        ):
+            return await call_next(middleware_context)
+
+    async def on_call_tool(self, middleware_context: MiddlewareContext, call_next):
+        if tracing.tracer is None:
+            return await call_next(middleware_context)
+
+        tool = middleware_context.message.name
+        bz = utils.current_bz.get()
+
+        with tracing.tracer.start_as_current_span(f"call_tool {tool}", attributes={"mcp.tool.name": tool}) as span:
+            if bz is not None:
+                span.set_attribute("server.address", bz.host)
+            return await call_next(middleware_context)
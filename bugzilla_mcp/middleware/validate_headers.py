@@ -11,7 +11,9 @@ class ValidateHeaders(Middleware):
     """Validate incoming HTTP headers
     
     Requires both `api_key` and `bugzilla_url` headers to be present.
-    Creates a Bugzilla instance and stores it in utils.bz for use by all tools.
+    Leases the pooled Bugzilla client for the tenant from utils.registry and
+    binds it to utils.current_bz while the message is handled, so every tool
+    called for this message uses the caller's Bugzilla.
     """
 
     async def on_message(self, middleware_context: MiddlewareContext, call_next):
@@ -22,9 +24,8 @@ class ValidateHeaders(Middleware):
         if not headers or len(headers) == 0:
             # Create a dummy instance with placeholder values for inspection
             # This allows fastmcp inspect to work without actual credentials
-            utils.bz = Bugzilla(url="https://bugzilla.example.com", api_key="inspection-placeholder")
-            result = call_next(middleware_context)
-            return await result
+            async with utils.registry.lease(url="https://bugzilla.example.com", api_key="inspection-placeholder") as bz:
+                return await self._call_with(bz, middleware_context, call_next)
         
         # Check for required headers
         if "api_key" not in headers:
@@ -40,9 +41,17 @@ class ValidateHeaders(Middleware):
             bugzilla_url = f"https://{bugzilla_url}"
         
         # all the tools & prompts will use this for making api calls
-        utils.bz = Bugzilla(url=bugzilla_url, api_key=headers["api_key"])
+        # leased: an eviction by another message must not close it while this one runs
+        async with utils.registry.lease(url=bugzilla_url, api_key=headers["api_key"]) as bz:
+            return await self._call_with(bz, middleware_context, call_next)
 
-        result = call_next(middleware_context)
+    async def _call_with(self, bz: Bugzilla, middleware_context: MiddlewareContext, call_next):
+        """Run the rest of the chain with `bz` as the current Bugzilla client"""
 
-        return await result
+        token = utils.current_bz.set(bz)
+
+        try:
+            return await call_next(middleware_context)
+        finally:
+            utils.current_bz.reset(token)
 
@@ -0,0 +1,6 @@
+"""Optional local mirror of a Bugzilla instance, searchable without round trips to Bugzilla"""
+
+from .store import MirrorStore
+from .sync import MirrorSync
+
+__all__ = ["MirrorStore", "MirrorSync"]
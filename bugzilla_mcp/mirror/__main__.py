@@ -0,0 +1,47 @@
+"""Command line entry point of the mirror sync job
+
+    python -m bugzilla_mcp.mirror --db mirror.db --url https://bugzilla.example.com --interval 300
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+from dotenv import load_dotenv
+from bugzilla_mcp.utils import Bugzilla
+from .store import MirrorStore
+from .sync import MirrorSync
+
+
+async def main(args: argparse.Namespace):
+    store = MirrorStore(args.db)
+    bz = Bugzilla(url=args.url, api_key=args.api_key)
+    sync = MirrorSync(store, bz, product=args.product, page_size=args.page_size)
+
+    try:
+        if args.interval:
+            await sync.run(args.interval)
+        else:
+            result = await sync.run_once()
+            print(f"Mirrored {result['bugs']} bugs and {result['comments']} comments up to {result['watermark']}")
+    finally:
+        await bz.close()
+        store.close()
+
+
+if __name__ == "__main__":
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Mirror the bugs of a Bugzilla instance into SQLite")
+    parser.add_argument("--db", default=os.getenv("BUGZILLA_MIRROR_DB"), required=not os.getenv("BUGZILLA_MIRROR_DB"))
+    parser.add_argument("--url", default=os.getenv("BUGZILLA_MIRROR_URL"), required=not os.getenv("BUGZILLA_MIRROR_URL"))
+    parser.add_argument("--api-key", default=os.getenv("BUGZILLA_MIRROR_API_KEY"), required=not os.getenv("BUGZILLA_MIRROR_API_KEY"))
+    parser.add_argument("--product", help="only mirror this product")
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--interval", type=float, help="keep syncing every INTERVAL seconds")
+
+    args = parser.parse_args()
+
+    # progress of --interval syncs is logged by MirrorSync.run
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main(args))
@@ -0,0 +1,238 @@
+"""Offline evaluation of the common subset of Bugzilla's quicksearch syntax
+
+Supported:
+
+- a first word selecting statuses: ALL, OPEN, or a comma separated list of
+  statuses and resolutions (e.g. NEW,ASSIGNED or FIXED,WONTFIX). Without it
+  only open bugs match, like on Bugzilla
+- field:value terms on product, component, assignee, keywords and summary
+  (with their usual aliases), comma separated values meaning any of them
+- the :value (product or component) and @value (assignee) shortcuts
+- free text words and "quoted phrases", matched like Bugzilla against the
+  summary, whiteboard and alias, the product and component when longer than
+  two characters, and equal to a keyword. Bugzilla also searches the comments
+  when its full-text search is enabled, this module does not
+- negation of any term with a leading -
+- a query made only of bug ids
+
+Values match as case-insensitive substrings, like Bugzilla's quicksearch.
+Anything else (OR, |, status: terms, +word, !keyword...) raises
+UnsupportedQuery so that the caller can send the query to Bugzilla instead.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Any, Callable
+
+
+STATUSES = frozenset({
+    "UNCONFIRMED", "NEW", "ASSIGNED", "REOPENED", "IN_PROGRESS", "CONFIRMED", "RESOLVED", "VERIFIED", "CLOSED",
+})
+RESOLUTIONS = frozenset({
+    "FIXED", "INVALID", "WONTFIX", "DUPLICATE", "WORKSFORME", "INCOMPLETE", "MOVED", "INACTIVE", "EXPIRED",
+})
+
+# quicksearch field names and aliases -> Bugzilla field
+FIELDS: dict[str, str] = {
+    "product": "product",
+    "prod": "product",
+    "component": "component",
+    "comp": "component",
+    "assignee": "assigned_to",
+    "assigned_to": "assigned_to",
+    "owner": "assigned_to",
+    "keywords": "keywords",
+    "kw": "keywords",
+    "summary": "summary",
+    "short_desc": "summary",
+}
+
+# fields searched for free text words, see _term
+WORD_FIELDS = ("summary", "whiteboard", "alias")
+
+# fields of the mirror only kept in the bug JSON
+JSON_FIELDS = frozenset({"keywords", "whiteboard", "alias"})
+
+# a word, possibly holding a "quoted part" with spaces
+TOKEN = re.compile(r'[^\s"]*"[^"]*"[^\s"]*|\S+')
+
+
+class UnsupportedQuery(ValueError):
+    """The query uses quicksearch syntax this module does not evaluate"""
+
+
+@dataclass(frozen=True, slots=True)
+class Term:
+    """Any of `fields` contains, or any of `exact` equals, any of `values`, or none does when negated"""
+
+    fields: tuple[str, ...]
+    values: tuple[str, ...]
+    negated: bool = False
+    exact: tuple[str, ...] = ()
+
+
+@dataclass(frozen=True, slots=True)
+class Query:
+    """A parsed quicksearch"""
+
+    terms: tuple[Term, ...] = ()
+    # "open", "all", or "listed" to match `statuses` / `resolutions`
+    status_filter: str = "open"
+    statuses: tuple[str, ...] = ()
+    resolutions: tuple[str, ...] = ()
+    # a query made of bug ids only matches these bugs, whatever their status
+    ids: tuple[int, ...] = ()
+
+
+def _unquote(value: str) -> str:
+    return value.replace('"', "")
+
+
+def _values(value: str) -> tuple[str, ...]:
+    values = tuple(v.lower() for v in _unquote(value).split(",") if v)
+
+    if not values:
+        raise UnsupportedQuery("empty value")
+
+    return values
+
+
+def _term(token: str) -> Term:
+    negated = token.startswith("-") and len(token) > 1
+    if negated:
+        token = token[1:]
+
+    if token.upper() in ("OR", "AND", "NOT") or "|" in token or token[0] in "+!#":
+        raise UnsupportedQuery(f"unsupported quicksearch syntax: {token}")
+
+    if token.startswith(":"):
+        return Term(("product", "component"), _values(token[1:]), negated)
+
+    if token.startswith("@"):
+        return Term(("assigned_to",), _values(token[1:]), negated)
+
+    name, colon, value = token.partition(":")
+    if colon and not name.startswith('"'):
+        field = FIELDS.get(name.lower())
+        if field is None:
+            raise UnsupportedQuery(f"unsupported quicksearch field: {name}")
+        return Term((field,), _values(value), negated)
+
+    text = _unquote(token)
+    if "," in text or not text:
+        raise UnsupportedQuery(f"unsupported quicksearch word: {token}")
+
+    # as Bugzilla's default quicksearch word: short words are not looked for in product names
+    fields = WORD_FIELDS + (("product", "component") if len(text) > 2 else ())
+
+    return Term(fields, (text.lower(),), negated, exact=("keywords",))
+
+
+def parse(query: str) -> Query:
+    """Parse a quicksearch query, raising UnsupportedQuery outside the supported subset"""
+
+    tokens = TOKEN.findall(query)
+
+    if not tokens:
+        raise UnsupportedQuery("empty query")
+
+    if all(re.fullmatch(r"\d+(,\d+)*", t) for t in tokens):
+        return Query(status_filter="all", ids=tuple(int(i) for t in tokens for i in t.split(",")))
+
+    status_filter = "open"
+    statuses: tuple[str, ...] = ()
+    resolutions: tuple[str, ...] = ()
+
+    first = tokens[0].split(",")
+    if tokens[0] == "ALL":
+        status_filter, tokens = "all", tokens[1:]
+    elif tokens[0] == "OPEN":
+        tokens = tokens[1:]
+    elif all(word in STATUSES or word in RESOLUTIONS for word in first):
+        status_filter, tokens = "listed", tokens[1:]
+        statuses = tuple(w for w in first if w in STATUSES)
+        resolutions = tuple(w for w in first if w in RESOLUTIONS)
+
+    return Query(tuple(_term(t) for t in tokens), status_filter, statuses, resolutions)
+
+
+def _field_values(bug: dict[str, Any], field: str) -> list[str]:
+    value = bug.get(field)
+
+    if isinstance(value, list):
+        return [str(v).lower() for v in value]
+
+    return [str(value).lower()] if value is not None else []
+
+
+def to_predicate(query: Query) -> Callable[[dict[str, Any]], bool]:
+    """A function telling whether a bug, as returned by Bugzilla, matches the query"""
+
+    def status_matches(bug: dict[str, Any]) -> bool:
+        if query.status_filter == "all":
+            return True
+        if query.status_filter == "open":
+            return not bug.get("resolution")
+        return bug.get("status") in query.statuses or bug.get("resolution") in query.resolutions
+
+    def term_matches(term: Term, bug: dict[str, Any]) -> bool:
+        found = any(
+            value in text
+            for field in term.fields
+            for text in _field_values(bug, field)
+            for value in term.values
+        ) or any(
+            value in _field_values(bug, field)
+            for field in term.exact
+            for value in term.values
+        )
+        return found != term.negated
+
+    def predicate(bug: dict[str, Any]) -> bool:
+        if query.ids:
+            return bug.get("id") in query.ids
+
+        return status_matches(bug) and all(term_matches(term, bug) for term in query.terms)
+
+    return predicate
+
+
+def to_sql(query: Query) -> tuple[str, list[Any]]:
+    """WHERE clause (and its parameters) selecting the matching rows of the mirror `bugs` table"""
+
+    if query.ids:
+        return f"id IN ({', '.join('?' * len(query.ids))})", list(query.ids)
+
+    conditions = []
+    params: list[Any] = []
+
+    if query.status_filter == "open":
+        conditions.append("COALESCE(resolution, '') = ''")
+    elif query.status_filter == "listed":
+        conditions.append(
+            f"(status IN ({', '.join('?' * len(query.statuses))})"
+            f" OR resolution IN ({', '.join('?' * len(query.resolutions))}))"
+        )
+        params += [*query.statuses, *query.resolutions]
+
+    for term in query.terms:
+        matches = []
+
+        for field in term.fields:
+            for value in term.values:
+                if field in JSON_FIELDS:
+                    # only kept in the bug JSON, as a list or a string
+                    matches.append(f"EXISTS (SELECT 1 FROM json_each(data, '$.{field}') WHERE instr(lower(value), ?) > 0)")
+                else:
+                    matches.append(f"instr(lower(COALESCE({field}, '')), ?) > 0")
+                params.append(value)
+
+        for field in term.exact:
+            for value in term.values:
+                matches.append(f"EXISTS (SELECT 1 FROM json_each(data, '$.{field}') WHERE lower(value) = ?)")
+                params.append(value)
+
+        condition = "(" + " OR ".join(matches) + ")"
+        conditions.append(f"NOT {condition}" if term.negated else condition)
+
+    return " AND ".join(conditions) or "1", params
@@ -0,0 +1,241 @@
+"""SQLite storage of the local bug mirror"""
+
+import sqlite3
+import time
+from typing import Any, Iterable
+from bugzilla_mcp.utils import jsonlib
+from bugzilla_mcp.utils.models import BUG_FIELDS, Bug, Comment
+from . import quicksearch
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS bugs (
+    id INTEGER PRIMARY KEY,
+    product TEXT,
+    component TEXT,
+    assigned_to TEXT,
+    status TEXT,
+    resolution TEXT,
+    summary TEXT,
+    last_change_time TEXT,
+    data TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS bugs_last_change_time ON bugs (last_change_time);
+
+CREATE TABLE IF NOT EXISTS comments (
+    id INTEGER PRIMARY KEY,
+    bug_id INTEGER NOT NULL,
+    count INTEGER,
+    creation_time TEXT,
+    text TEXT,
+    data TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS comments_bug_id ON comments (bug_id, count);
+
+-- full text indexes, kept in sync with their table by the triggers below
+CREATE VIRTUAL TABLE IF NOT EXISTS bugs_fts USING fts5 (summary, content='bugs', content_rowid='id');
+CREATE VIRTUAL TABLE IF NOT EXISTS comments_fts USING fts5 (text, content='comments', content_rowid='id');
+
+CREATE TRIGGER IF NOT EXISTS bugs_ai AFTER INSERT ON bugs BEGIN
+    INSERT INTO bugs_fts (rowid, summary) VALUES (new.id, new.summary);
+END;
+CREATE TRIGGER IF NOT EXISTS bugs_ad AFTER DELETE ON bugs BEGIN
+    INSERT INTO bugs_fts (bugs_fts, rowid, summary) VALUES ('delete', old.id, old.summary);
+END;
+CREATE TRIGGER IF NOT EXISTS bugs_au AFTER UPDATE ON bugs BEGIN
+    INSERT INTO bugs_fts (bugs_fts, rowid, summary) VALUES ('delete', old.id, old.summary);
+    INSERT INTO bugs_fts (rowid, summary) VALUES (new.id, new.summary);
+END;
+
+CREATE TRIGGER IF NOT EXISTS comments_ai AFTER INSERT ON comments BEGIN
+    INSERT INTO comments_fts (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS comments_ad AFTER DELETE ON comments BEGIN
+    INSERT INTO comments_fts (comments_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS comments_au AFTER UPDATE ON comments BEGIN
+    INSERT INTO comments_fts (comments_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    INSERT INTO comments_fts (rowid, text) VALUES (new.id, new.text);
+END;
+"""
+
+# bug columns filled from the Bugzilla field of the same name, the whole bug is kept in `data`
+BUG_COLUMNS = BUG_FIELDS
+
+
+def fts_query(text: str) -> str:
+    """FTS5 query matching every word of text, whatever characters it contains"""
+    return " ".join('"' + word.replace('"', '""') + '"' for word in text.split())
+
+
+class MirrorStore:
+    """Bugs and public comments of one Bugzilla instance, stored in SQLite
+
+    The database is written by MirrorSync and can be read at the same time by
+    the MCP server (the journal is in WAL mode, readers never wait for the
+    writer).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+
+        if path != ":memory:":
+            self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+
+    def get_meta(self, key: str) -> str | None:
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def set_meta(self, key: str, value: str):
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    @property
+    def url(self) -> str | None:
+        """Base URL of the mirrored Bugzilla"""
+        return self.get_meta("url")
+
+    @property
+    def tenant(self) -> str | None:
+        """Tenant of the API key used by the sync, the mirror only holds what it can see"""
+        return self.get_meta("tenant")
+
+    @property
+    def watermark(self) -> str | None:
+        """Greatest last_change_time mirrored so far"""
+        return self.get_meta("watermark")
+
+    @property
+    def synced_at(self) -> float | None:
+        """Time at which the last complete sync started"""
+        value = self.get_meta("synced_at")
+        return float(value) if value is not None else None
+
+    def is_fresh(self, tenant: str, max_age: float) -> bool:
+        """Whether the mirror was synced with the API key of tenant less than max_age seconds ago
+
+        The tenant (see Bugzilla.tenant) includes the Bugzilla URL. Another API
+        key may not see the same bugs, so it must not read the mirror.
+        """
+
+        synced_at = self.synced_at
+        return self.tenant == tenant and synced_at is not None and time.time() - synced_at <= max_age
+
+    def upsert_bugs(self, bugs: Iterable[dict[str, Any]]):
+        rows = [[bug.get(c) for c in BUG_COLUMNS] + [jsonlib.dumps(bug)] for bug in bugs]
+
+        with self.db:
+            # an upsert rather than INSERT OR REPLACE: the replace deletes would not reach the FTS triggers
+            self.db.executemany(
+                f"INSERT INTO bugs ({', '.join(BUG_COLUMNS)}, data) VALUES ({', '.join('?' * (len(BUG_COLUMNS) + 1))})"
+                f" ON CONFLICT (id) DO UPDATE SET {', '.join(f'{c} = excluded.{c}' for c in BUG_COLUMNS[1:])}, data = excluded.data",
+                rows,
+            )
+
+    def upsert_comments(self, comments: Iterable[Comment]):
+        rows = [(c.id, c.bug_id, c.count, c.creation_time, c.text, jsonlib.dumps(c)) for c in comments]
+
+        with self.db:
+            self.db.executemany(
+                "INSERT INTO comments (id, bug_id, count, creation_time, text, data) VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (id) DO UPDATE SET bug_id = excluded.bug_id, count = excluded.count,"
+                " creation_time = excluded.creation_time, text = excluded.text, data = excluded.data",
+                rows,
+            )
+
+    def has_bug(self, bug_id: int) -> bool:
+        return self.db.execute("SELECT 1 FROM bugs WHERE id = ?", (bug_id,)).fetchone() is not None
+
+    def bug(self, bug_id: int) -> dict[str, Any] | None:
+        """The bug as returned by Bugzilla, or None when it is not mirrored"""
+
+        row = self.db.execute("SELECT data FROM bugs WHERE id = ?", (bug_id,)).fetchone()
+        return jsonlib.loads(row["data"]) if row else None
+
+    def comments(self, bug_id: int, new_since: str | None = None) -> list[Comment]:
+        """Comments of a bug in order, optionally only those made after new_since"""
+
+        query = "SELECT data FROM comments WHERE bug_id = ?"
+        params: list[Any] = [bug_id]
+
+        if new_since:
+            query += " AND creation_time > ?"
+            params.append(new_since)
+
+        rows = self.db.execute(query + " ORDER BY count", params).fetchall()
+        return [Comment.from_dict(jsonlib.loads(row["data"])) for row in rows]
+
+    def search(
+        self,
+        text: str | None = None,
+        product: str | None = None,
+        component: str | None = None,
+        status: list[str] | None = None,
+        limit: int = 50,
+        offset: int = 0,
+    ) -> list[Bug]:
+        """Bugs whose summary or comments contain every word of text, most recently changed first"""
+
+        conditions = []
+        params: list[Any] = []
+
+        if text and text.strip():
+            conditions.append(
+                "id IN (SELECT rowid FROM bugs_fts WHERE bugs_fts MATCH ?"
+                " UNION SELECT comments.bug_id FROM comments_fts"
+                " JOIN comments ON comments.id = comments_fts.rowid WHERE comments_fts MATCH ?)"
+            )
+            params += [fts_query(text)] * 2
+        if product:
+            conditions.append("product = ?")
+            params.append(product)
+        if component:
+            conditions.append("component = ?")
+            params.append(component)
+        if status:
+            conditions.append(f"status IN ({', '.join('?' * len(status))})")
+            params += status
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self.db.execute(
+            f"SELECT {', '.join(BUG_COLUMNS)} FROM bugs {where} ORDER BY last_change_time DESC LIMIT ? OFFSET ?",
+            [*params, limit, offset],
+        ).fetchall()
+
+        return [Bug(*row) for row in rows]
+
+    def quicksearch(self, query: str, limit: int = 50, offset: int = 0) -> list[Bug]:
+        """Bugs matching a quicksearch query, by id
+
+        Raises quicksearch.UnsupportedQuery for syntax outside the supported subset.
+        """
+
+        where, params = quicksearch.to_sql(quicksearch.parse(query))
+        rows = self.db.execute(
+            f"SELECT {', '.join(BUG_COLUMNS)} FROM bugs WHERE {where} ORDER BY id LIMIT ? OFFSET ?",
+            [*params, limit, offset],
+        ).fetchall()
+
+        return [Bug(*row) for row in rows]
+
+    def close(self):
+        self.db.close()
+
+    def stats(self) -> dict[str, Any]:
+        """Mirror counters"""
+        return {
+            "bugs": self.db.execute("SELECT COUNT(*) FROM bugs").fetchone()[0],
+            "comments": self.db.execute("SELECT COUNT(*) FROM comments").fetchone()[0],
+            "watermark": self.watermark,
+            "synced_at": self.synced_at,
+        }
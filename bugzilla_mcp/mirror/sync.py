@@ -0,0 +1,118 @@
+"""Incremental synchronization of the local bug mirror"""
+
+import asyncio
+import logging
+import time
+from typing import Any
+from bugzilla_mcp.utils import Bugzilla
+from bugzilla_mcp.utils.models import Comment
+from .store import MirrorStore
+
+
+logger = logging.getLogger(__name__)
+
+
+# Bugzilla's epoch for the first sync: every bug changed at or after it
+EPOCH = "1970-01-01T00:00:00Z"
+
+
+class MirrorSync:
+    """Pull the bugs and public comments changed since the last sync into a MirrorStore
+
+    Bugs are listed by last_change_time, starting at the watermark of the
+    previous sync, so a sync only transfers what changed in the meantime.
+    Pages follow the last_change_time of the previous page rather than an
+    offset: a bug changed during the sync moves to the end of the list
+    instead of shifting the next pages and hiding a bug.
+    Comments are only fetched for the changed bugs, and only the new ones for
+    bugs already mirrored. Private comments are never stored.
+    """
+
+    def __init__(
+        self,
+        store: MirrorStore,
+        bz: Bugzilla,
+        product: str | None = None,
+        page_size: int = 500,
+        max_concurrent_requests: int = 4,
+    ):
+        self.store = store
+        self.bz = bz
+        self.product = product
+        self.page_size = page_size
+        self.max_concurrent_requests = max_concurrent_requests
+
+        if store.url is not None and store.url != bz.base_url:
+            raise ValueError(f"{store.path} mirrors {store.url}, not {bz.base_url}")
+
+    async def run_once(self) -> dict[str, Any]:
+        """Sync once, returning the number of bugs and comments written and the new watermark"""
+
+        started = time.time()
+        since = self.store.watermark or EPOCH
+        watermark = since
+        semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+        counts = {"bugs": 0, "comments": 0}
+
+        async def new_comments(bug: dict[str, Any]) -> list[Comment]:
+            # comments of a bug seen for the first time may be older than the watermark
+            new_since = since if self.store.has_bug(bug["id"]) else None
+
+            async with semaphore:
+                comments = await self.bz.comments(bug["id"], new_since)
+
+            return [c for c in comments if not c.is_private]
+
+        cursor = since
+        offset = 0
+        # (id, last_change_time) of the bugs written at the cursor, they come again with the next page
+        written: set[tuple[int, str | None]] = set()
+
+        while True:
+            # Bugzilla matches last_change_time >= cursor, bugs at the watermark come again and are overwritten
+            page = await self.bz.changed_bugs(cursor, self.product, self.page_size, offset)
+            bugs = [b for b in page if (b["id"], b.get("last_change_time")) not in written]
+
+            comments = await asyncio.gather(*(new_comments(bug) for bug in bugs))
+
+            # a page is only written once its comments arrived, an interrupted sync starts over from `since`
+            self.store.upsert_bugs(bugs)
+            self.store.upsert_comments(c for bug_comments in comments for c in bug_comments)
+
+            counts["bugs"] += len(bugs)
+            counts["comments"] += sum(len(c) for c in comments)
+            watermark = max([watermark, *(b["last_change_time"] for b in bugs if b.get("last_change_time"))])
+
+            if len(page) < self.page_size:
+                break
+
+            last = page[-1].get("last_change_time") or cursor
+            if last == cursor:
+                # a whole page changed at the same time, go through them by offset
+                offset += len(page)
+            else:
+                cursor, offset, written = last, 0, set()
+
+            written.update((b["id"], b.get("last_change_time")) for b in page if b.get("last_change_time") == cursor)
+
+        self.store.set_meta("url", self.bz.base_url)
+        self.store.set_meta("tenant", self.bz.tenant)
+        self.store.set_meta("watermark", watermark)
+        # changes made while this sync ran may have been missed, freshness counts from its start
+        self.store.set_meta("synced_at", str(started))
+
+        return {**counts, "watermark": watermark}
+
+    async def run(self, interval: float):
+        """Sync forever, every interval seconds"""
+
+        while True:
+            try:
+                result = await self.run_once()
+                logger.info(
+                    "Mirrored %d bugs and %d comments up to %s", result["bugs"], result["comments"], result["watermark"]
+                )
+            except Exception as e:
+                logger.warning("Mirror sync failed: %s", e)
+
+            await asyncio.sleep(interval)
@@ -1,132 +1,359 @@
 """Bugzilla tools for MCP server"""
 
-import httpx
+from dataclasses import dataclass
 from typing import Any
 from fastmcp.exceptions import ToolError, PromptError
 import bugzilla_mcp.utils as utils
+from bugzilla_mcp.utils import Bugzilla
+from bugzilla_mcp.utils.budget import byte_budget, fit_bug, fit_comments, fit_latest, size
+from bugzilla_mcp.utils.models import ESSENTIAL_FIELDS, Comment, SearchRow
+from bugzilla_mcp.utils.tracing import traced
 
+# upper bound of bugs_quicksearch(max_results=...), whatever the caller asks
+MAX_QUICKSEARCH_RESULTS = 10000
+# upper bound of the comments of one add_comments_bulk call
+MAX_BULK_COMMENTS = 1000
 
-async def bug_info(id: int) -> dict[str, Any]:
-    """Returns the entire information about a given bugzilla bug id"""
 
-    if utils.bz is None:
+@dataclass
+class CommentItem:
+    """A comment to post with add_comments_bulk"""
+
+    bug_id: int
+    comment: str
+    is_private: bool = False
+
+
+def _bugzilla() -> Bugzilla:
+    """Bugzilla client bound to the MCP message being handled"""
+
+    bz = utils.current_bz.get()
+
+    if bz is None:
         raise ToolError("Bugzilla client not initialized. Please ensure api_key and bugzilla_url headers are provided.")
 
+    return bz
+
+
+@traced
+async def bug_info(
+    id: int,
+    include_fields: list[str] | None = None,
+    exclude_fields: list[str] | None = None,
+    max_tokens: int | None = None,
+    max_bytes: int | None = None,
+) -> dict[str, Any]:
+    """Returns the entire information about a given bugzilla bug id
+
+    include_fields / exclude_fields optionally restrict the returned fields, e.g. ["summary", "status"]
+
+    max_tokens / max_bytes bound the size of the response: empty fields are
+    left out, then the largest fields until it fits. Those are listed in
+    `omitted_fields` and can be requested with include_fields
+    """
+
+    bz = _bugzilla()
+
     try:
-        return await utils.bz.bug_info(id)
+        bug = await bz.bug_info(id, include_fields, exclude_fields)
+        budget = byte_budget(max_tokens, max_bytes)
+
+        return bug if budget is None else fit_bug(bug, budget)
 
     except Exception as e:
         raise ToolError(f"Failed to fetch bug info\nReason: {e}")
 
 
-async def bug_comments(id: int, include_private_comments: bool = False):
+@traced
+async def bugs_info(ids: list[int], include_fields: list[str] | None = None) -> dict[int, dict[str, Any]]:
+    """Returns information about many bugs at once, keyed by bug id
+
+    Prefer this over calling bug_info repeatedly. Bugs which could not be
+    fetched contain an `error` field instead of the bug information.
+    include_fields optionally restricts the returned fields, e.g. ["summary", "status"]
+    """
+
+    bz = _bugzilla()
+
+    try:
+        return await bz.bugs_info(ids, include_fields)
+
+    except Exception as e:
+        raise ToolError(f"Failed to fetch bugs info\nReason: {e}")
+
+
+@traced
+async def bug_comments(
+    id: int,
+    include_private_comments: bool = False,
+    new_since: str | None = None,
+    limit: int | None = None,
+    offset: int = 0,
+    last: int | None = None,
+    max_tokens: int | None = None,
+    max_bytes: int | None = None,
+):
     """Returns the comments of given bug id
     Private comments are not included by default
     but can be explicitely requested
+
+    Long discussions can be read in parts:
+    - new_since (ISO 8601 timestamp, e.g. 2024-01-15T10:30:00Z) only returns newer comments
+    - limit & offset return a page of comments
+    - last returns only the N most recent comments
+    - max_tokens / max_bytes return as many comments as fit, long texts being cut,
+      as {"comments": [...], "next_offset": N}. Call again with offset=N and the
+      same other arguments for the next ones; next_offset is null once none is left
     """
 
-    if utils.bz is None:
-        raise ToolError("Bugzilla client not initialized. Please ensure api_key and bugzilla_url headers are provided.")
+    bz = _bugzilla()
 
     try:
-        all_comments = await utils.bz.bug_comments(id)
+        all_comments = await bz.comments(id, new_since)
 
         if include_private_comments:
-            return all_comments
+            comments = all_comments
+        else:
+            # Bugzilla has no server side filter for private comments
+            comments = [c for c in all_comments if not c.is_private]
+
+        if last is not None:
+            comments = comments[-last:] if last > 0 else []
 
-        public_comments = []
+        page = comments[offset:offset + limit] if limit is not None else comments[offset:]
+        budget = byte_budget(max_tokens, max_bytes)
 
-        for comment in all_comments:
-            if not comment["is_private"]:
-                public_comments.append(comment)
+        if budget is None:
+            return page
 
-        return public_comments
+        shaped = fit_comments(page, budget)
+        next_offset = offset + len(shaped)
+
+        return {"comments": shaped, "next_offset": next_offset if next_offset < len(comments) else None}
 
     except Exception as e:
         raise ToolError(f"Failed to fetch bug comments\nReason: {e}")
 
 
+@traced
+async def bugs_comments(
+    ids: list[int], include_private_comments: bool = False, new_since: str | None = None
+) -> dict[int, list[Comment] | dict[str, str]]:
+    """Returns the comments of many bugs at once, keyed by bug id
+
+    Prefer this over calling bug_comments repeatedly. Private comments are not
+    included unless include_private_comments is set. new_since (ISO 8601 timestamp,
+    e.g. 2024-01-15T10:30:00Z) only returns newer comments. Bugs whose
+    comments could not be fetched contain an `error` field instead of a list.
+    """
+
+    bz = _bugzilla()
+
+    try:
+        results = await bz.bugs_comments(ids, new_since)
+
+    except Exception as e:
+        raise ToolError(f"Failed to fetch bugs comments\nReason: {e}")
+
+    if include_private_comments:
+        return results
+
+    return {
+        bug_id: [c for c in comments if not c.is_private] if isinstance(comments, list) else comments
+        for bug_id, comments in results.items()
+    }
+
+
+@traced
+async def bug_dossier(
+    id: int,
+    include_fields: list[str] | None = None,
+    include_private_comments: bool = False,
+    max_tokens: int | None = None,
+    max_bytes: int | None = None,
+) -> dict[str, Any]:
+    """Returns a bug with its comments, change history and attachments metadata in one call
+
+    Prefer this over calling bug_info then bug_comments. include_fields
+    optionally restricts the fields of the bug. Private comments and
+    attachments are not included by default.
+
+    max_tokens / max_bytes bound the size of the response: the bug is reduced
+    as with bug_info, only the most recent history entries and attachments
+    are kept (the others counted in `omitted_history` / `omitted_attachments`)
+    and the leading comments fill the rest. bug_comments continues from
+    `next_comment_offset`, which is null once every comment was returned
+    """
+
+    bz = _bugzilla()
+
+    try:
+        dossier = await bz.bug_dossier(id, include_fields)
+
+        if not include_private_comments:
+            dossier["comments"] = [c for c in dossier["comments"] if not c.is_private]
+            dossier["attachments"] = [a for a in dossier["attachments"] if not a.get("is_private")]
+
+        budget = byte_budget(max_tokens, max_bytes)
+
+        if budget is None:
+            return dossier
+
+        bug = fit_bug(dossier["bug"], budget // 4)
+        history = fit_latest(dossier["history"], budget // 8)
+        attachments = fit_latest(dossier["attachments"], budget // 8)
+        comments = fit_comments(dossier["comments"], budget - size(bug) - size(history) - size(attachments))
+
+        return {
+            "bug": bug,
+            "comments": comments,
+            "next_comment_offset": len(comments) if len(comments) < len(dossier["comments"]) else None,
+            "history": history,
+            "omitted_history": len(dossier["history"]) - len(history),
+            "attachments": attachments,
+            "omitted_attachments": len(dossier["attachments"]) - len(attachments),
+        }
+
+    except Exception as e:
+        raise ToolError(f"Failed to fetch bug dossier\nReason: {e}")
+
+
+@traced
 async def add_comment(bug_id: int, comment: str, is_private: bool = False) -> dict[str, int]:
     """Add a comment to a bug. It can optionally be private. If success, returns the created comment id."""
-    if utils.bz is None:
-        raise ToolError("Bugzilla client not initialized. Please ensure api_key and bugzilla_url headers are provided.")
-    
+    bz = _bugzilla()
+
     try:
-        return await utils.bz.add_comment(bug_id, comment, is_private)
+        return await bz.add_comment(bug_id, comment, is_private)
     except Exception as e:
         raise ToolError(f"Failed to create a comment\n{e}")
 
 
-async def bugs_quicksearch(query: str, limit: int = 50, offset: int = 0) -> list[Any]:
+@traced
+async def add_comments_bulk(items: list[CommentItem], dedupe_key: str | None = None) -> list[dict[str, Any]]:
+    """Add many comments at once, e.g. the same note to every bug of a triage query
+
+    Prefer this over calling add_comment repeatedly. Each item is a bug_id,
+    a comment and optionally is_private. Returns one result per item, in
+    order: {"bug_id", "id"} once posted, {"bug_id", "error"} otherwise.
+
+    Pass a unique dedupe_key to retry safely: calling again with the same key
+    and items only posts the comments not posted yet, the others are returned
+    with `replayed` set.
+    """
+
+    if len(items) > MAX_BULK_COMMENTS:
+        raise ToolError(f"At most {MAX_BULK_COMMENTS} comments can be added at once, got {len(items)}")
+
+    bz = _bugzilla()
+
+    try:
+        return await bz.add_comments(
+            [(item.bug_id, item.comment, item.is_private) for item in items], dedupe_key
+        )
+    except Exception as e:
+        raise ToolError(f"Failed to create comments\n{e}")
+
+
+@traced
+async def bugs_quicksearch(
+    query: str,
+    limit: int = 50,
+    offset: int = 0,
+    include_fields: list[str] | None = None,
+    exclude_fields: list[str] | None = None,
+    max_results: int | None = None,
+) -> list[Any]:
     """Search bugs using bugzilla's quicksearch syntax
 
-    To reduce the token limit & response time, only returns a subset of fields for each bug
+    To reduce the token limit & response time, only returns a subset of fields for each bug.
+    Other fields can be requested with include_fields, or left out with exclude_fields
+
+    Returns a single page of `limit` bugs. To collect a large result set at once,
+    set max_results instead: every page starting at offset is fetched until
+    max_results bugs (at most 10000) have been collected
 
     The user can query full details of each bug using the bug_info tool
     """
 
-    if utils.bz is None:
-        raise ToolError("Bugzilla client not initialized. Please ensure api_key and bugzilla_url headers are provided.")
+    bz = _bugzilla()
 
-    tool_params = utils.bz.params.copy()
-    tool_params["quicksearch"] = query
-    tool_params["limit"] = limit
-    tool_params["offset"] = offset
+    if include_fields or exclude_fields:
+        # Bugzilla already dropped the other fields, this only renames the keys
+        # (and guards against servers which ignore include_fields)
+        fields = include_fields or list(ESSENTIAL_FIELDS.values())
+        fields = [f for f in dict.fromkeys(["id", *fields]) if f not in (exclude_fields or [])]
+        keys = {field: key for key, field in ESSENTIAL_FIELDS.items()}
 
-    r = await utils.bz.client.get(f"{utils.bz.api_url}/bug", params=tool_params)
+        def row(bug: dict[str, Any]) -> Any:
+            return {keys.get(f, f): bug.get(f) for f in fields}
+    else:
+        row = SearchRow.from_bug
 
-    if r.status_code != 200:
-        raise ToolError(f"Search failed with status code {r.status_code}")
+    try:
+        if max_results is None:
+            all_bugs = await bz.bugs_quicksearch(query, limit, offset, include_fields, exclude_fields)
+            return [row(bug) for bug in all_bugs]
+
+        # rows are built as pages stream in, raw pages are never all kept
+        bugs = bz.iter_quicksearch(
+            query,
+            max_results=min(max_results, MAX_QUICKSEARCH_RESULTS),
+            offset=offset,
+            include_fields=include_fields,
+            exclude_fields=exclude_fields,
+        )
+        return [row(bug) async for bug in bugs]
 
-    all_bugs = r.json()["bugs"]
+    except Exception as e:
+        raise ToolError(f"Search failed\nReason: {e}")
 
-    bugs_with_essential_fields = []
 
-    for bug in all_bugs:
-        b = {
-            "bug_id": bug["id"],
-            "product": bug["product"],
-            "component": bug["component"],
-            "assigned_to": bug["assigned_to"],
-            "status": bug["status"],
-            "resolution": bug["resolution"],
-            "summary": bug["summary"],
-            "last_updated": bug["last_change_time"],
-        }
+@traced
+async def changed_bugs_since(
+    timestamp: str, product: str | None = None, limit: int = 100, after_id: int | None = None
+) -> dict[str, Any]:
+    """Returns the bugs changed after timestamp (ISO 8601, e.g. 2024-01-15T10:30:00Z)
+    together with the field changes made since then
 
-        bugs_with_essential_fields.append(b)
+    Use this to watch a product instead of repeating searches: pass the returned
+    `watermark` as timestamp and `after_id` as after_id of the next call. When
+    `truncated` is true more bugs changed than `limit`, call again right away
+    """
 
-    return bugs_with_essential_fields
+    bz = _bugzilla()
 
+    try:
+        return await bz.changed_bugs_since(timestamp, product, limit, after_id)
 
-async def learn_quicksearch_syntax() -> str:
-    """Access the documentation of the bugzilla quicksearch syntax.
-    LLM can learn using this tool. Response is in HTML"""
+    except Exception as e:
+        raise ToolError(f"Failed to fetch changed bugs\nReason: {e}")
 
-    if utils.bz is None:
-        raise ToolError("Bugzilla client not initialized. Please ensure api_key and bugzilla_url headers are provided.")
 
-    async with httpx.AsyncClient() as client:
-        r = await client.get(f"{utils.bz.base_url}/page.cgi?id=quicksearch.html")
+@traced
+async def learn_quicksearch_syntax(compact: bool = False) -> str:
+    """Access the documentation of the bugzilla quicksearch syntax.
+    LLM can learn using this tool. Response is in HTML,
+    or in a much smaller plain text form when compact is true"""
 
-        if r.status_code != 200:
-            raise PromptError(
-                f"Failed to fetch bugzilla quicksearch_syntax with status code {r.status_code}"
-            )
+    bz = _bugzilla()
 
-        return r.text
+    try:
+        return await bz.quicksearch_syntax(compact)
+    except Exception as e:
+        raise PromptError(f"Failed to fetch bugzilla quicksearch_syntax\nReason: {e}")
 
 
+@traced
 async def server_url() -> str:
     """bugzilla server's base url"""
-    if utils.bz is None:
-        raise ToolError("Bugzilla client not initialized. Please ensure api_key and bugzilla_url headers are provided.")
-    return utils.bz.base_url
+    bz = _bugzilla()
+    return bz.base_url
 
 
+@traced
 async def bug_url(bug_id: int) -> str:
     """returns the bug url"""
-    if utils.bz is None:
-        raise ToolError("Bugzilla client not initialized. Please ensure api_key and bugzilla_url headers are provided.")
-    return f"{utils.bz.base_url}/show_bug.cgi?id={bug_id}"
+    bz = _bugzilla()
+    return f"{bz.base_url}/show_bug.cgi?id={bug_id}"
 
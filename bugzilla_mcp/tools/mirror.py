@@ -0,0 +1,136 @@
+"""Tools answering from the local bug mirror, falling back to Bugzilla when it is stale"""
+
+import asyncio
+from typing import Any
+from fastmcp.exceptions import ToolError
+from bugzilla_mcp.mirror import MirrorStore
+from bugzilla_mcp.mirror.quicksearch import UnsupportedQuery
+from bugzilla_mcp.utils import Bugzilla
+from bugzilla_mcp.utils.models import Comment, SearchRow
+from bugzilla_mcp.utils.tracing import traced
+from .bugzilla import _bugzilla
+
+# set by server.py when BUGZILLA_MIRROR_DB is configured
+store: MirrorStore | None = None
+# seconds after the start of its last sync during which the mirror is trusted
+max_age: float = 900.0
+
+
+def _mirror(bz: Bugzilla) -> MirrorStore | None:
+    """The mirror, if it holds recent data synced with the caller's API key"""
+
+    if store is not None and store.is_fresh(bz.tenant, max_age):
+        return store
+
+    return None
+
+
+def _quicksearch_term(field: str, value: str) -> str:
+    return f'{field}:"{value}"' if " " in value else f"{field}:{value}"
+
+
+@traced
+async def mirror_search(
+    text: str,
+    product: str | None = None,
+    component: str | None = None,
+    status: list[str] | None = None,
+    limit: int = 50,
+    offset: int = 0,
+) -> list[SearchRow]:
+    """Full text search of bugs whose summary or one of the comments contain every word of text
+
+    Answered from the local mirror in milliseconds when it is up to date, otherwise
+    by a Bugzilla quicksearch. Returns the same fields as bugs_quicksearch, most
+    recently changed bugs first
+    """
+
+    bz = _bugzilla()
+    mirror = _mirror(bz)
+
+    try:
+        if mirror is not None:
+            bugs = await asyncio.to_thread(mirror.search, text, product, component, status, limit, offset)
+        else:
+            # like the mirror, every status unless asked: a bare quicksearch only finds open bugs
+            terms = ["ALL", text]
+            if product:
+                terms.append(_quicksearch_term("product", product))
+            if component:
+                terms.append(_quicksearch_term("component", component))
+            if status:
+                terms.append(_quicksearch_term("status", ",".join(status)))
+            bugs = await bz.bugs_quicksearch(" ".join(terms), limit, offset)
+
+        return [SearchRow.from_bug(bug) for bug in bugs]
+
+    except Exception as e:
+        raise ToolError(f"Search failed\nReason: {e}")
+
+
+@traced
+async def mirror_quicksearch(query: str, limit: int = 50, offset: int = 0) -> list[SearchRow]:
+    """Search bugs using bugzilla's quicksearch syntax, from the local mirror when possible
+
+    The common syntax (ALL / OPEN / status lists, product, component, assignee,
+    keywords and summary terms, :product, @assignee, -negation, bug ids and free
+    text) is answered by the mirror while it is up to date. Other queries are
+    sent to Bugzilla. Returns the same fields as bugs_quicksearch
+    """
+
+    bz = _bugzilla()
+    mirror = _mirror(bz)
+
+    try:
+        bugs = None
+
+        if mirror is not None:
+            try:
+                bugs = await asyncio.to_thread(mirror.quicksearch, query, limit, offset)
+            except UnsupportedQuery:
+                pass
+
+        if bugs is None:
+            bugs = await bz.bugs_quicksearch(query, limit, offset)
+
+        return [SearchRow.from_bug(bug) for bug in bugs]
+
+    except Exception as e:
+        raise ToolError(f"Search failed\nReason: {e}")
+
+
+@traced
+async def mirror_bug_info(id: int) -> dict[str, Any]:
+    """Returns the entire information about a given bugzilla bug id, from the local mirror when it is up to date"""
+
+    bz = _bugzilla()
+    mirror = _mirror(bz)
+
+    try:
+        bug = mirror.bug(id) if mirror is not None else None
+        return bug if bug is not None else await bz.bug_info(id)
+
+    except Exception as e:
+        raise ToolError(f"Failed to fetch bug info\nReason: {e}")
+
+
+@traced
+async def mirror_bug_comments(id: int, new_since: str | None = None) -> list[Comment]:
+    """Returns the public comments of given bug id, from the local mirror when it is up to date
+
+    new_since (ISO 8601 timestamp, e.g. 2024-01-15T10:30:00Z) only returns newer comments.
+    Use bug_comments for private comments, they are never mirrored
+    """
+
+    bz = _bugzilla()
+    mirror = _mirror(bz)
+
+    try:
+        if mirror is not None and mirror.has_bug(id):
+            return mirror.comments(id, new_since)
+
+        comments = await bz.comments(id, new_since)
+        return [c for c in comments if not c.is_private]
+
+    except Exception as e:
+        raise ToolError(f"Failed to fetch bug comments\nReason: {e}")
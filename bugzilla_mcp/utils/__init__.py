@@ -1,8 +1,81 @@
 """Utilities for Bugzilla MCP server"""
 
+from contextvars import ContextVar
+import httpx
 from .bugzilla import Bugzilla
+from .cache import ResponseCache
+from .metrics import CallbackCounter, Gauge, Metrics
+from .registry import ClientRegistry
+from .singleflight import SingleFlight
 
-# Global Bugzilla instance, set by middleware
-bz = None
+# Bugzilla client of the MCP message being handled, set by middleware.
+# A context variable keeps concurrent messages from different tenants apart.
+current_bz: ContextVar[Bugzilla | None] = ContextVar("current_bz", default=None)
 
-__all__ = ["Bugzilla", "bz"]
+# Cache of read-only responses, keyed per tenant
+cache = ResponseCache()
+
+# Identical upstream calls in flight at the same time, see SingleFlight
+inflight = SingleFlight()
+
+# Tool and upstream metrics, served on /metrics
+metrics = Metrics()
+
+# Pooled clients shared by every MCP message, see ClientRegistry
+registry = ClientRegistry(cache=cache, inflight=inflight, metrics=metrics)
+
+# state of the shared structures, read when the metrics are rendered
+# (through the module globals, which tests and benchmarks may replace);
+# the size of a cache shared between processes is not known by this one
+metrics.add(Gauge(
+    "bugzilla_mcp_cache_entries", "Responses in the cache", lambda: {(): len(cache)} if cache.backend.local else {}
+))
+metrics.add(Gauge(
+    "bugzilla_mcp_cache_bytes", "Size of the cached responses", lambda: {(): cache.bytes} if cache.backend.local else {}
+))
+metrics.add(Gauge("bugzilla_mcp_clients", "Pooled Bugzilla clients", lambda: {(): len(registry)}))
+metrics.add(Gauge(
+    "bugzilla_mcp_circuit_open",
+    "1 while the circuit breaker of a Bugzilla instance rejects requests",
+    lambda: {(httpx.URL(url).host,): float(b.state != b.CLOSED) for url, b in registry.breakers.items()},
+    ("host",),
+    combine=max,
+))
+metrics.add(Gauge("bugzilla_mcp_upstream_in_flight", "Distinct requests to Bugzilla in flight", lambda: {(): len(inflight)}))
+metrics.add(CallbackCounter(
+    "bugzilla_mcp_upstream_calls_total",
+    "Reads from Bugzilla which started a request (result=started) or joined an identical one in flight"
+    " (result=coalesced)",
+    lambda: {("started",): inflight.stats()["calls"], ("coalesced",): inflight.stats()["coalesced"]},
+    ("result",),
+))
+metrics.add(CallbackCounter(
+    "bugzilla_mcp_client_lookups_total",
+    "Requests of a Bugzilla client from the pool, which found one (result=hit) or created it (result=miss)",
+    lambda: {("hit",): registry.stats()["hits"], ("miss",): registry.stats()["misses"]},
+    ("result",),
+))
+metrics.add(CallbackCounter(
+    "bugzilla_mcp_client_evictions_total",
+    "Pooled Bugzilla clients closed after being idle or to make room for another",
+    lambda: {(): registry.stats()["evictions"]},
+))
+metrics.add(Gauge(
+    "bugzilla_mcp_upstream_rate_limited",
+    "Requests waiting for the rate limit of a Bugzilla instance",
+    lambda: {(httpx.URL(url).host,): limiter.waiting for url, limiter in registry.limiters.items()},
+    ("host",),
+))
+
+__all__ = [
+    "Bugzilla",
+    "ClientRegistry",
+    "Metrics",
+    "ResponseCache",
+    "SingleFlight",
+    "cache",
+    "current_bz",
+    "inflight",
+    "metrics",
+    "registry",
+]
@@ -0,0 +1,128 @@
+"""Fitting tool responses into a size budget
+
+Long bugs and discussions make megabytes of JSON that the LLM then has to
+read. With a budget, empty fields are left out, long comment texts are cut
+and what did not fit is reported so that the caller can ask for it next.
+"""
+
+from typing import Any, Iterable
+from . import jsonlib
+from .models import COMMENT_FIELDS, ESSENTIAL_FIELDS, Comment
+
+
+# rough number of bytes of JSON per token, for English text and identifiers
+BYTES_PER_TOKEN = 4
+# a comment text is never cut shorter than this many characters
+MIN_TEXT_CHARS = 200
+# fields of a bug never left out, whatever the budget
+KEPT_BUG_FIELDS = frozenset(ESSENTIAL_FIELDS.values())
+
+
+def byte_budget(max_tokens: int | None = None, max_bytes: int | None = None) -> int | None:
+    """The budget in bytes, the smallest of both limits, or None without any"""
+
+    limits = [limit for limit in (max_bytes, max_tokens and max_tokens * BYTES_PER_TOKEN) if limit]
+    return min(limits) if limits else None
+
+
+def size(value: Any) -> int:
+    """Bytes of value as sent to the client"""
+    return len(jsonlib.dumps(value).encode())
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value == "" or value == [] or value == {}
+
+
+def compact(fields: Iterable[tuple[str, Any]]) -> dict[str, Any]:
+    """The (name, value) pairs as a dict, without empty values"""
+    return {name: value for name, value in fields if not _is_empty(value)}
+
+
+def cut(text: str, max_chars: int) -> str:
+    """text, ending with a note of the number of characters left out if it is longer than max_chars"""
+
+    if len(text) <= max_chars:
+        return text
+
+    return f"{text[:max_chars]}\n[{len(text) - max_chars} more characters, request this comment alone to read them]"
+
+
+def fit_bug(bug: dict[str, Any], budget: int) -> dict[str, Any]:
+    """bug without its empty fields and, while over budget, without its largest fields
+
+    The essential fields are always kept. Left out fields are listed in
+    `omitted_fields`, to be requested with include_fields.
+    """
+
+    result = compact(bug.items())
+    used = size(result)
+
+    if used <= budget:
+        return result
+
+    omitted = []
+    sizes = {name: size({name: value}) for name, value in result.items() if name not in KEPT_BUG_FIELDS}
+
+    for name in sorted(sizes, key=sizes.__getitem__, reverse=True):
+        if used <= budget:
+            break
+        del result[name]
+        omitted.append(name)
+        used -= sizes[name] - 1  # the separating comma stays accounted for
+
+    result["omitted_fields"] = omitted
+    return result
+
+
+def fit_comments(comments: list[Comment], budget: int) -> list[dict[str, Any]]:
+    """The leading comments fitting in budget, without their empty fields
+
+    Each text is cut to a quarter of the budget (but not below MIN_TEXT_CHARS)
+    so that a single pasted log does not take all of it. The first comment is
+    always returned, cut to what is left of the budget if needed, so that
+    reading a discussion in parts always progresses.
+    """
+
+    max_chars = max(MIN_TEXT_CHARS, budget // 4)
+    result: list[dict[str, Any]] = []
+    used = 2  # []
+
+    for comment in comments:
+        shaped = compact((name, getattr(comment, name)) for name in COMMENT_FIELDS)
+        if comment.text:
+            shaped["text"] = cut(comment.text, max_chars)
+        shaped_size = size(shaped) + 1  # and a comma
+
+        if used + shaped_size > budget:
+            if result:
+                break
+            if comment.text:
+                other_fields = shaped_size - size(shaped["text"])
+                shaped["text"] = cut(comment.text, max(MIN_TEXT_CHARS, budget - used - other_fields))
+                shaped_size = size(shaped) + 1
+
+        result.append(shaped)
+        used += shaped_size
+
+    return result
+
+
+def fit_latest(items: list[dict[str, Any]], budget: int) -> list[dict[str, Any]]:
+    """The trailing, most recent, items fitting in budget, without their empty fields"""
+
+    result: list[dict[str, Any]] = []
+    used = 2  # []
+
+    for item in reversed(items):
+        shaped = compact(item.items())
+        shaped_size = size(shaped) + 1  # and a comma
+
+        if used + shaped_size > budget:
+            break
+
+        result.append(shaped)
+        used += shaped_size
+
+    result.reverse()
+    return result
@@ -1,63 +1,960 @@
 """Bugzilla API client"""
 
-from typing import Any
+import asyncio
+import contextlib
+import hashlib
+import time
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Callable, Iterator, TypedDict
 import httpx
+from .cache import ResponseCache
+from .jsonlib import bugs_decoder, loads, typed_decoder
+from .metrics import Metrics, endpoint
+from .models import COMMENT_FIELDS, ESSENTIAL_FIELDS, Bug, Comment
+from .resilience import DEFAULT_TIMEOUT, CircuitBreaker, CircuitOpenError, Retry, TokenBucket
+from .singleflight import SingleFlight
+from .text import html_to_text
+from . import tracing
+
+
+# Bugzilla accepts many ids in one GET /rest/bug request, but the id list
+# ends up in the query string. Keep each batch well below common URL limits.
+MAX_BATCH_IDS = 100
+MAX_BATCH_CHARS = 1500
+
+# attachment metadata returned by bug_dossier, never the (base64) content
+ATTACHMENT_FIELDS = [
+    "id", "file_name", "summary", "content_type", "size", "creator",
+    "creation_time", "last_change_time", "is_obsolete", "is_patch", "is_private",
+]
+
+
+# Bugzilla error codes of an invalid, missing or inaccessible bug id
+BAD_ID_CODES = {100, 101, 102}
+
+# transport errors raised before any byte of the request was sent
+UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class StatusError(httpx.TransportError):
+    """Raised when Bugzilla answers with an unexpected status code
+
+    code is the Bugzilla error code of the body, if any (e.g. 101 for a bug
+    which does not exist)
+    """
+
+    def __init__(self, message: str, status_code: int, code: int | None = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.code = code
+
+
+class UnknownOutcomeError(Exception):
+    """Raised instead of repeating a write whose earlier attempt may have succeeded"""
+
+
+class _BugsPage(TypedDict, total=False):
+    bugs: list[Bug]
+    faults: list[Any]
+
+
+class _BugComments(TypedDict):
+    comments: list[Comment]
+
+
+class _CommentsPage(TypedDict):
+    bugs: dict[str, _BugComments]
+
+
+def _second_before(timestamp: str) -> str:
+    """The ISO 8601 timestamp one second before, Bugzilla's resolution"""
+
+    moment = datetime.fromisoformat(timestamp.replace("Z", "+00:00")) - timedelta(seconds=1)
+    return moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _error_code(r: httpx.Response) -> int | None:
+    """Bugzilla error code of an error response, None when the body holds none"""
+
+    try:
+        code = loads(r.content).get("code")
+    except (ValueError, AttributeError):
+        # not a JSON object, e.g. the HTML error page of a proxy
+        return None
+
+    return code if isinstance(code, int) else None
+
+
+def _to_bugs(page: dict[str, Any]) -> dict[str, Any]:
+    if "bugs" in page:
+        page["bugs"] = [Bug.from_dict(bug) for bug in page["bugs"]]
+    return page
+
+
+def _to_comments(page: dict[str, Any]) -> dict[str, Any]:
+    for bug in page["bugs"].values():
+        bug["comments"] = [Comment.from_dict(c) for c in bug["comments"]]
+    return page
+
+
+# decoders of responses into records, see jsonlib.typed_decoder
+_decode_bugs = typed_decoder(_BugsPage, _to_bugs)
+_decode_comments = typed_decoder(_CommentsPage, _to_comments)
+
+
+def projection(include_fields: list[str] | None = None, exclude_fields: list[str] | None = None) -> dict[str, str]:
+    """Request params asking Bugzilla to only serialize the wanted fields"""
+
+    params = {}
+
+    if include_fields:
+        params["include_fields"] = ",".join(dict.fromkeys(include_fields))
+    if exclude_fields:
+        params["exclude_fields"] = ",".join(dict.fromkeys(exclude_fields))
+
+    return params
+
+
+def batch_ids(
+    ids: list[int], max_ids: int = MAX_BATCH_IDS, max_chars: int = MAX_BATCH_CHARS, separator: str = ","
+) -> Iterator[list[int]]:
+    """Split ids into batches whose form in the query string stays URL-safe
+
+    separator is what comes before each id: "," for id=1,2,3 or "&ids=" for ids=1&ids=2
+    """
+
+    batch: list[int] = []
+    length = 0
+
+    for bug_id in ids:
+        id_length = len(str(bug_id)) + len(separator)
+        if batch and (len(batch) >= max_ids or length + id_length > max_chars):
+            yield batch
+            batch, length = [], 0
+        batch.append(bug_id)
+        length += id_length
+
+    if batch:
+        yield batch
 
 
 class Bugzilla:
     """Bugzilla API class"""
 
-    def __init__(self, url: str, api_key: str):
+    def __init__(
+        self,
+        url: str,
+        api_key: str,
+        limits: httpx.Limits | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+        cache: ResponseCache | None = None,
+        inflight: SingleFlight | None = None,
+        timeout: httpx.Timeout | None = None,
+        retry: Retry | None = None,
+        breaker: CircuitBreaker | None = None,
+        metrics: Metrics | None = None,
+        rate_limiter: TokenBucket | None = None,
+        max_concurrent_requests: int | None = None,
+    ):
         self.api_url: str = url + "/rest"
         self.base_url: str = url
+        # metrics label of the instance; the API key never appears in metrics
+        self.host: str = httpx.URL(url).host
         self.api_key: str = api_key
+        # identifies the caller in shared structures without exposing the API key
+        self.tenant: str = f"{url}#{hashlib.sha256(api_key.encode()).hexdigest()[:16]}"
+        # optional cache of read-only responses, shared between clients
+        self.cache: ResponseCache | None = cache
+        # identical GETs in flight at the same time share one upstream request
+        self.inflight: SingleFlight = inflight or SingleFlight()
         # request params sent for each request
         self.params: dict[str, Any] = {"api_key": self.api_key}
-        # Create a shared async client
-        self.client: httpx.AsyncClient = httpx.AsyncClient()
+        # retry schedule of idempotent requests
+        self.retry: Retry = retry or Retry()
+        # shared by every client talking to the same Bugzilla instance
+        self.breaker: CircuitBreaker = breaker or CircuitBreaker()
+        # Create a shared async client, its connections are kept alive between requests
+        self.client: httpx.AsyncClient = httpx.AsyncClient(
+            limits=limits or httpx.Limits(), transport=transport, timeout=timeout or DEFAULT_TIMEOUT
+        )
+        # how many id batches of a single bugs_info call run at the same time
+        self.max_concurrent_batches: int = 4
+        # optional recorder of upstream requests and cache lookups
+        self.metrics: Metrics | None = metrics
+        # optional rate limit shared by every client talking to the same Bugzilla instance
+        self.rate_limiter: TokenBucket | None = rate_limiter
+        # optional bound of the requests of this tenant in flight at once, others wait for a slot
+        self.semaphore: asyncio.Semaphore | None = (
+            asyncio.Semaphore(max_concurrent_requests) if max_concurrent_requests else None
+        )
 
-    async def bug_info(self, bug_id: int) -> dict[str, Any]:
-        """get information about a given bug"""
+    async def _send(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """Send a request through the circuit breaker, once its turn came (see _turn)
 
-        r = await self.client.get(url=f"{self.api_url}/bug/{bug_id}", params=self.params)
+        GET requests are idempotent and retried on connection errors and on
+        RETRY_STATUSES, waiting as long as Retry-After asks when it is present.
+        """
 
-        if r.status_code != 200:
-            raise httpx.TransportError(
-                f"Failed to fetch API with Status code: {r.status_code}"
-            )
+        idempotent = method == "GET"
+        attempt = 0
 
-        return r.json()["bugs"][0]
+        while True:
+            try:
+                self.breaker.before_request()
+            except CircuitOpenError:
+                if self.metrics:
+                    self.metrics.upstream_rejected.inc(self.host)
+                raise
 
-    async def bug_comments(self, bug_id: int) -> dict[str, Any]:
-        """Get comments of a bug"""
+            started = time.perf_counter()
 
-        r = await self.client.get(url=f"{self.api_url}/bug/{bug_id}/comment", params=self.params)
+            try:
+                async with self._turn():
+                    started = time.perf_counter()
 
-        if r.status_code != 200:
-            raise httpx.TransportError(
-                f"Failed to fetch API with Status code: {r.status_code}"
+                    if tracing.tracer is None:
+                        r = await self.client.request(method, url, **kwargs)
+                    else:
+                        r = await self._traced_request(method, url, attempt, **kwargs)
+            except httpx.TransportError:
+                if self.metrics:
+                    self._record(method, url, started)
+                self.breaker.record_failure()
+                if not idempotent or attempt + 1 >= self.retry.attempts:
+                    if idempotent:
+                        self.retry.exhausted += 1
+                    raise
+                delay = self.retry.delay(attempt)
+            except BaseException:
+                # cancelled, or failed without an answer: the probe, if this was it, must not keep the circuit half open
+                self.breaker.abandon()
+                raise
+            else:
+                if self.metrics:
+                    self._record(method, url, started, r)
+
+                # 429 means the upstream is alive, only count server errors against it
+                if r.status_code >= 500:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+
+                if not idempotent or r.status_code not in self.retry.statuses:
+                    return r
+
+                if attempt + 1 >= self.retry.attempts:
+                    self.retry.exhausted += 1
+                    return r
+
+                delay = self.retry.delay(attempt, r.headers.get("Retry-After"))
+
+            self.retry.retries += 1
+            if self.metrics:
+                self.metrics.upstream_retries.inc(self.host)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    @contextlib.asynccontextmanager
+    async def _turn(self) -> AsyncIterator[None]:
+        """Hold one of the tenant's request slots, once the rate limit of the instance lets the request through
+
+        Each attempt waits in turn, a retry waits again. Slots are released
+        while waiting before a retry.
+        """
+
+        queued = time.perf_counter()
+
+        async with self.semaphore or contextlib.nullcontext():
+            slot = time.perf_counter()
+
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire()
+
+            if self.metrics:
+                self.metrics.upstream_queue_wait.observe(slot - queued, self.host, "tenant")
+                if self.rate_limiter is not None:
+                    self.metrics.upstream_queue_wait.observe(time.perf_counter() - slot, self.host, "rate_limit")
+
+            yield
+
+    def _endpoint(self, url: str) -> str:
+        # every URL is built from base_url
+        return endpoint(url[len(self.base_url):].partition("?")[0])
+
+    async def _traced_request(self, method: str, url: str, attempt: int, **kwargs: Any) -> httpx.Response:
+        """Send a request in a client span, with the connection phases as child spans"""
+
+        label = self._endpoint(url)
+        attributes: dict[str, Any] = {
+            "http.request.method": method,
+            "server.address": self.host,
+            "url.template": label,
+        }
+        if attempt:
+            attributes["http.request.resend_count"] = attempt
+
+        with tracing.tracer.start_as_current_span(
+            f"{method} {label}", kind=tracing.trace.SpanKind.CLIENT, attributes=attributes
+        ) as span:
+            r = await self.client.request(method, url, extensions={"trace": tracing.HttpPhases()}, **kwargs)
+
+            span.set_attribute("http.response.status_code", r.status_code)
+            span.set_attribute("http.response.body.size", len(r.content))
+            if r.status_code >= 500:
+                span.set_status(tracing.trace.StatusCode.ERROR)
+
+            return r
+
+    def _json(self, r: httpx.Response, decode: Callable[[bytes], Any] | None = None) -> Any:
+        """Decode a JSON response, in a span of its own when tracing
+
+        The body bytes are parsed directly, without decoding them to text
+        first, by `decode` or the fastest JSON library installed.
+        """
+
+        decode = decode or loads
+
+        if tracing.tracer is None:
+            return decode(r.content)
+
+        with tracing.tracer.start_as_current_span("decode json", attributes={"http.response.body.size": len(r.content)}):
+            return decode(r.content)
+
+    def _record(self, method: str, url: str, started: float, r: httpx.Response | None = None):
+        """Record an upstream request in self.metrics, r is None when no response was received"""
+
+        label = self._endpoint(url)
+        metrics = self.metrics
+
+        metrics.upstream_duration.observe(time.perf_counter() - started, self.host, method, label)
+        metrics.upstream_responses.inc(self.host, method, label, str(r.status_code) if r is not None else "error")
+
+        if r is not None:
+            metrics.upstream_received_bytes.inc(self.host, label, amount=len(r.content))
+            if r.request.content:
+                metrics.upstream_sent_bytes.inc(self.host, label, amount=len(r.request.content))
+
+    async def _request(
+        self, path: str, params: dict[str, Any] | None = None, etag: str | None = None
+    ) -> httpx.Response:
+        """GET an API path. A 304 is only accepted for conditional requests"""
+
+        headers = {"If-None-Match": etag} if etag else None
+        r = await self._send("GET", f"{self.api_url}{path}", params={**self.params, **(params or {})}, headers=headers)
+
+        if r.status_code == 401 and self.cache is not None:
+            # a revoked API key must not keep reading what it cached
+            await self.cache.clear(self.tenant)
+
+        if r.status_code != 200 and not (etag and r.status_code == 304):
+            raise StatusError(
+                f"Failed to fetch API with Status code: {r.status_code}", r.status_code, _error_code(r)
             )
 
-        return r.json()["bugs"][f"{bug_id}"]["comments"]
+        return r
+
+    async def _get(
+        self,
+        path: str,
+        params: dict[str, Any] | None = None,
+        cache_as: str | None = None,
+        bug_ids: tuple[int, ...] = (),
+        decode: Callable[[bytes], Any] | None = None,
+    ) -> Any:
+        """GET an API path and return the JSON body, decoded by `decode` if given
+
+        Concurrent identical calls of a tenant are coalesced into one.
+
+        With a cache and `cache_as` (the endpoint name used for its TTL), the
+        response is cached. Stale entries are revalidated with their ETag, or
+        for a single bug by comparing its last_change_time, before being
+        downloaded again. `bug_ids` tag the entry for invalidation.
+        """
+
+        params = params or {}
+        key = (self.tenant, "GET", path, tuple(sorted((k, str(v)) for k, v in params.items())))
+
+        return await self.inflight.do(key, lambda: self._get_once(path, params, cache_as, bug_ids, decode))
+
+    async def _get_once(
+        self,
+        path: str,
+        params: dict[str, Any],
+        cache_as: str | None,
+        bug_ids: tuple[int, ...],
+        decode: Callable[[bytes], Any] | None = None,
+    ) -> Any:
+        if self.cache is None or cache_as is None:
+            return self._json(await self._request(path, params), decode)
+
+        key = self.cache.key(self.tenant, cache_as, path, params)
+        entry = await self.cache.get(key)
+
+        if entry is not None:
+            if entry.is_fresh():
+                self._record_lookup(cache_as, "hit")
+                return entry.value
+
+            if entry.etag is None and entry.last_change_time and len(bug_ids) == 1:
+                # cheap probe: ask for a single field instead of the whole response
+                probe = await self._request(f"/bug/{bug_ids[0]}", {"include_fields": "last_change_time"})
+                if self._json(probe)["bugs"][0].get("last_change_time") == entry.last_change_time:
+                    await self.cache.refresh(key, cache_as)
+                    self._record_lookup(cache_as, "revalidated")
+                    return entry.value
+
+        r = await self._request(path, params, etag=entry.etag if entry else None)
+
+        if r.status_code == 304:
+            await self.cache.refresh(key, cache_as)
+            self._record_lookup(cache_as, "revalidated")
+            return entry.value
+
+        self._record_lookup(cache_as, "miss")
+
+        data = self._json(r, decode)
+
+        last_change_time = None
+        if cache_as == "bug" and len(bug_ids) == 1 and data.get("bugs"):
+            last_change_time = data["bugs"][0].get("last_change_time")
+
+        await self.cache.set(
+            key,
+            cache_as,
+            data,
+            size=len(r.content),
+            etag=r.headers.get("ETag"),
+            last_change_time=last_change_time,
+            tags=tuple(self._bug_tag(bug_id) for bug_id in bug_ids),
+        )
+
+        return data
+
+    def _record_lookup(self, cache_as: str, result: str):
+        if self.metrics:
+            self.metrics.cache_lookups.inc(self.host, cache_as, result)
+
+    def _bug_tag(self, bug_id: int) -> str:
+        # scoped to the Bugzilla instance, so a write by one tenant
+        # invalidates what every tenant cached about the bug
+        return f"{self.base_url}|bug:{bug_id}"
+
+    async def bug_info(
+        self,
+        bug_id: int,
+        include_fields: list[str] | None = None,
+        exclude_fields: list[str] | None = None,
+    ) -> dict[str, Any]:
+        """get information about a given bug, optionally restricted to some fields"""
+
+        data = await self._get(
+            f"/bug/{bug_id}", projection(include_fields, exclude_fields), cache_as="bug", bug_ids=(bug_id,)
+        )
+
+        return data["bugs"][0]
+
+    async def bugs_info(
+        self, bug_ids: list[int], include_fields: list[str] | None = None
+    ) -> dict[int, dict[str, Any]]:
+        """get information about many bugs using as few requests as possible
+
+        Ids are sent in URL-safe batches which run concurrently. The result is
+        keyed by bug id; bugs which could not be fetched map to {"error": reason}
+        """
+
+        # keep the caller's order but never ask twice for the same bug
+        bug_ids = list(dict.fromkeys(bug_ids))
+        semaphore = asyncio.Semaphore(self.max_concurrent_batches)
+
+        # the id is needed to key the results
+        params: dict[str, Any] = {"permissive": 1, **projection(["id", *include_fields] if include_fields else None)}
+
+        async def fetch(batch: list[int]) -> dict[int, dict[str, Any]]:
+            async with semaphore:
+                try:
+                    data = await self._get(
+                        "/bug", {**params, "id": ",".join(map(str, batch))}, cache_as="bug", bug_ids=tuple(batch)
+                    )
+                except Exception as e:
+                    return {bug_id: {"error": str(e)} for bug_id in batch}
+
+            found: dict[int, dict[str, Any]] = {bug["id"]: bug for bug in data.get("bugs", [])}
+
+            # permissive mode reports inaccessible bugs as faults instead of failing the request
+            for fault in data.get("faults", []):
+                if str(fault.get("id")).isdigit():
+                    found.setdefault(int(fault["id"]), {"error": fault.get("faultString", "Unknown error")})
+
+            return {
+                bug_id: found.get(bug_id, {"error": f"Bug #{bug_id} was not returned by Bugzilla"})
+                for bug_id in batch
+            }
+
+        results: dict[int, dict[str, Any]] = {}
+
+        for batch_result in await asyncio.gather(*(fetch(b) for b in batch_ids(bug_ids))):
+            results.update(batch_result)
+
+        # results come back per batch, restore the requested order
+        return {bug_id: results[bug_id] for bug_id in bug_ids}
+
+    async def bugs_quicksearch(
+        self,
+        query: str,
+        limit: int = 50,
+        offset: int = 0,
+        include_fields: list[str] | None = None,
+        exclude_fields: list[str] | None = None,
+    ) -> list[Any]:
+        """Search bugs using the quicksearch syntax
+
+        Only the essential fields are requested, and returned as Bug records,
+        unless include_fields or exclude_fields is given: bugs are then dicts
+        """
+
+        params = self._quicksearch_params(query, limit, offset, include_fields, exclude_fields)
+        decode = self._quicksearch_decoder(include_fields, exclude_fields)
+
+        return (await self._get("/bug", params, cache_as="search", decode=decode))["bugs"]
+
+    async def iter_quicksearch(
+        self,
+        query: str,
+        page_size: int = 200,
+        max_results: int | None = None,
+        offset: int = 0,
+        include_fields: list[str] | None = None,
+        exclude_fields: list[str] | None = None,
+    ) -> AsyncIterator[Any]:
+        """Yield every bug matching a quicksearch, walking the result pages
+
+        Bugs are Bug records or dicts, as returned by bugs_quicksearch.
+
+        The next page is requested while the current one is consumed. At most
+        two pages are held at once and pages are not cached, so large result
+        sets stream through with bounded memory.
+        """
+
+        decode = self._quicksearch_decoder(include_fields, exclude_fields)
+
+        async def fetch(page_offset: int, limit: int) -> list[dict[str, Any]]:
+            params = self._quicksearch_params(query, limit, page_offset, include_fields, exclude_fields)
+            return (await self._get("/bug", params, decode=decode))["bugs"]
+
+        def next_limit(fetched: int) -> int:
+            if max_results is None:
+                return page_size
+            return min(page_size, max_results - fetched)
+
+        fetched = 0
+        limit = next_limit(fetched)
+        next_page: asyncio.Task | None = asyncio.create_task(fetch(offset, limit)) if limit > 0 else None
+
+        try:
+            while next_page is not None:
+                page = await next_page
+                next_page = None
+                fetched += len(page)
+
+                # a short page is the last one
+                if len(page) == limit and (limit := next_limit(fetched)) > 0:
+                    next_page = asyncio.create_task(fetch(offset + fetched, limit))
+
+                for bug in page:
+                    yield bug
+
+                del page
+        finally:
+            if next_page is not None and not next_page.done():
+                next_page.cancel()
+
+    def _quicksearch_params(
+        self,
+        query: str,
+        limit: int,
+        offset: int,
+        include_fields: list[str] | None,
+        exclude_fields: list[str] | None,
+    ) -> dict[str, Any]:
+        # only the essential fields are requested unless include_fields is given
+        fields = include_fields or list(ESSENTIAL_FIELDS.values())
+
+        return {
+            "quicksearch": query,
+            "limit": limit,
+            "offset": offset,
+            **projection(["id", *fields], exclude_fields),
+        }
+
+    @staticmethod
+    def _quicksearch_decoder(
+        include_fields: list[str] | None, exclude_fields: list[str] | None
+    ) -> Callable[[bytes], Any] | None:
+        """Decoder of a search page: Bug records for the essential fields, otherwise
+        dicts of only the requested fields of each bug
+
+        None (the generic decoder) when the fields are not a plain list, i.e. with
+        exclude_fields or Bugzilla's special _default / _all / _custom names.
+        """
+
+        if exclude_fields:
+            return None
+
+        if not include_fields:
+            return _decode_bugs
+
+        if any(field.startswith("_") for field in include_fields):
+            return None
+
+        return bugs_decoder(["id", *include_fields])
+
+    async def comments(self, bug_id: int, new_since: str | None = None) -> list[Comment]:
+        """Get comments of a bug as Comment records, only the fields they hold being requested
+
+        new_since (an ISO 8601 timestamp) only returns the comments made after it
+        """
+
+        params = projection(COMMENT_FIELDS)
+        if new_since:
+            params["new_since"] = new_since
+
+        data = await self._get(
+            f"/bug/{bug_id}/comment", params, cache_as="comments", bug_ids=(bug_id,), decode=_decode_comments
+        )
+
+        return data["bugs"][f"{bug_id}"]["comments"]
+
+    async def bugs_comments(
+        self, bug_ids: list[int], new_since: str | None = None
+    ) -> dict[int, list[Comment] | dict[str, str]]:
+        """Get the comments of many bugs using as few requests as possible
+
+        Ids are sent to the multi-bug comment endpoint in URL-safe batches which
+        run concurrently. Bugzilla fails a whole batch when one of its bugs is
+        missing or inaccessible, the bugs of such a batch are then fetched one
+        by one; other failures are reported for every bug of the batch. The result is keyed by bug id; bugs whose comments could not be
+        fetched map to {"error": reason}
+        """
+
+        bug_ids = list(dict.fromkeys(bug_ids))
+        semaphore = asyncio.Semaphore(self.max_concurrent_batches)
+
+        params = projection(COMMENT_FIELDS)
+        if new_since:
+            params["new_since"] = new_since
+
+        async def fetch_one(bug_id: int) -> list[Comment] | dict[str, str]:
+            async with semaphore:
+                try:
+                    return await self.comments(bug_id, new_since)
+                except Exception as e:
+                    return {"error": str(e)}
+
+        async def fetch(batch: list[int]) -> dict[int, list[Comment] | dict[str, str]]:
+            if len(batch) == 1:
+                return {batch[0]: await fetch_one(batch[0])}
+
+            async with semaphore:
+                try:
+                    data = await self._get(
+                        "/bug/comment", {**params, "ids": batch}, cache_as="comments", bug_ids=tuple(batch),
+                        decode=_decode_comments,
+                    )
+                except StatusError as e:
+                    if not (400 <= e.status_code < 500 and e.code in BAD_ID_CODES):
+                        return {bug_id: {"error": str(e)} for bug_id in batch}
+                    data = None
+                except Exception as e:
+                    # Bugzilla is failing: asking bug by bug would only add to its load
+                    return {bug_id: {"error": str(e)} for bug_id in batch}
+
+            if data is None:
+                # one of the ids was refused, find which
+                results = await asyncio.gather(*(fetch_one(bug_id) for bug_id in batch))
+                return dict(zip(batch, results))
+
+            return {
+                bug_id: data["bugs"][f"{bug_id}"]["comments"] if f"{bug_id}" in data["bugs"]
+                else {"error": f"Comments of bug #{bug_id} were not returned by Bugzilla"}
+                for bug_id in batch
+            }
+
+        results: dict[int, list[Comment] | dict[str, str]] = {}
+
+        for batch_result in await asyncio.gather(*(fetch(b) for b in batch_ids(bug_ids, separator="&ids="))):
+            results.update(batch_result)
+
+        return {bug_id: results[bug_id] for bug_id in bug_ids}
+
+    async def bug_history(self, bug_id: int, new_since: str | None = None) -> list[dict[str, Any]]:
+        """Get the change history of a bug, optionally only the changes made after new_since"""
+
+        params = {"new_since": new_since} if new_since else {}
+        data = await self._get(f"/bug/{bug_id}/history", params)
+
+        return data["bugs"][0]["history"] if data.get("bugs") else []
+
+    async def attachments(self, bug_id: int) -> list[dict[str, Any]]:
+        """Get the metadata of the attachments of a bug, without their content"""
+
+        data = await self._get(
+            f"/bug/{bug_id}/attachment", projection(ATTACHMENT_FIELDS), cache_as="attachments", bug_ids=(bug_id,)
+        )
+
+        return data["bugs"].get(f"{bug_id}", [])
+
+    async def bug_dossier(self, bug_id: int, include_fields: list[str] | None = None) -> dict[str, Any]:
+        """Get a bug with its comments, history and attachments metadata
+
+        The four requests run concurrently instead of one after the other, so
+        the dossier costs about the latency of the slowest one.
+        include_fields restricts the fields of the bug
+        """
+
+        bug, comments, history, attachments = await asyncio.gather(
+            self.bug_info(bug_id, include_fields),
+            self.comments(bug_id),
+            self.bug_history(bug_id),
+            self.attachments(bug_id),
+        )
+
+        return {"bug": bug, "comments": comments, "history": history, "attachments": attachments}
+
+    async def changed_bugs(
+        self,
+        since: str,
+        product: str | None = None,
+        limit: int = 100,
+        offset: int = 0,
+        include_fields: list[str] | None = None,
+    ) -> list[dict[str, Any]]:
+        """Bugs whose last_change_time is at or after since, least recently changed first"""
+
+        params: dict[str, Any] = {
+            "last_change_time": since,
+            "limit": limit,
+            "offset": offset,
+            # ties in id order, so that paging through bugs changed at the same time is stable
+            "order": "changeddate,bug_id",
+            **projection(include_fields),
+        }
+        if product:
+            params["product"] = product
+
+        return (await self._get("/bug", params))["bugs"]
+
+    async def changed_bugs_since(
+        self, since: str, product: str | None = None, limit: int = 100, after_id: int | None = None
+    ) -> dict[str, Any]:
+        """Bugs changed since a timestamp, with the field changes made after it
+
+        Only bugs whose last_change_time is after `since` are listed, and their
+        histories are fetched concurrently, so the cost follows the churn rather
+        than the size of the product. With after_id, the bugs changed at `since`
+        with a greater id are listed too. The returned watermark and after_id
+        are the `since` and after_id of the next call: bugs changed at the same
+        time are never listed twice nor skipped, however many they are.
+        """
+
+        fields = ["id", "summary", "status", "resolution", "product", "component", "last_change_time"]
+        semaphore = asyncio.Semaphore(self.max_concurrent_batches)
+
+        def is_new(bug: dict[str, Any]) -> bool:
+            # Bugzilla matches last_change_time >= since
+            if bug["last_change_time"] == since:
+                return after_id is not None and bug["id"] > after_id
+            return True
+
+        bugs: list[dict[str, Any]] = []
+        offset = 0
+
+        # the bugs at `since` come first (changeddate,bug_id order) and are mostly skipped
+        while len(bugs) < limit:
+            page = await self.changed_bugs(since, product, limit, offset, include_fields=fields)
+            bugs += [bug for bug in page if is_new(bug)]
+            if len(page) < limit:
+                break
+            offset += len(page)
+
+        truncated = len(bugs) >= limit
+        bugs = bugs[:limit]
+
+        async def changes(bug: dict[str, Any]) -> list[dict[str, Any]]:
+            # the changes made at `since` were listed by the previous call, up to after_id
+            tied = after_id is not None and bug["id"] > after_id
+
+            async with semaphore:
+                history = await self.bug_history(bug["id"], new_since=_second_before(since) if tied else since)
+
+            return [
+                {
+                    "when": entry["when"],
+                    "who": entry["who"],
+                    "field": change["field_name"],
+                    "removed": change.get("removed", ""),
+                    "added": change.get("added", ""),
+                }
+                for entry in history
+                if entry["when"] > since or (tied and entry["when"] == since)
+                for change in entry.get("changes", [])
+            ]
+
+        histories = await asyncio.gather(*(changes(bug) for bug in bugs))
+
+        records = [
+            {
+                "bug_id": bug["id"],
+                "summary": bug.get("summary"),
+                "product": bug.get("product"),
+                "component": bug.get("component"),
+                "status": bug.get("status"),
+                "resolution": bug.get("resolution"),
+                "last_change_time": bug.get("last_change_time"),
+                "changes": history,
+            }
+            for bug, history in zip(bugs, histories)
+        ]
+
+        return {
+            "since": since,
+            # bugs are in (last_change_time, id) order, the last one is the cursor
+            "watermark": bugs[-1]["last_change_time"] if bugs else since,
+            "after_id": bugs[-1]["id"] if bugs else after_id,
+            # more bugs changed than returned, call again from the watermark and after_id
+            "truncated": truncated,
+            "bugs": records,
+        }
+
+    async def quicksearch_syntax(self, compact: bool = False) -> str:
+        """Get the quicksearch documentation page
+
+        The page is the same for every user of a Bugzilla instance, so it is
+        cached per base_url and concurrent first requests share one download.
+        With compact, the HTML is reduced to plain text.
+        """
+
+        async def load() -> tuple[str, int]:
+            if compact:
+                text = html_to_text(await self.quicksearch_syntax())
+                return text, len(text)
+
+            r = await self._send("GET", f"{self.base_url}/page.cgi?id=quicksearch.html")
+
+            if r.status_code != 200:
+                raise httpx.TransportError(
+                    f"Failed to fetch quicksearch documentation with Status code: {r.status_code}"
+                )
+
+            return r.text, len(r.content)
+
+        if self.cache is None:
+            return (await load())[0]
+
+        key = self.cache.key(self.base_url, "docs", "/page.cgi", {"id": "quicksearch.html", "compact": compact})
+
+        return await self.cache.get_or_load(key, "docs", load)
 
     async def add_comment(
-        self, bug_id: int, comment: str, is_private: bool
+        self, bug_id: int, comment: str, is_private: bool, dedupe_key: str | None = None
     ) -> dict[str, int]:
-        """Add a comment to bug, which can optionally be private"""
+        """Add a comment to bug, which can optionally be private
+
+        With a dedupe_key, a call repeating the key of an earlier one returns
+        the comment posted then, with `replayed` set, instead of posting it
+        again. Keys are kept as records of the response cache for a day, by
+        every worker sharing it (see _add_comment_once); without a cache only
+        concurrent calls are merged.
+        """
+
+        if dedupe_key is None:
+            return await self._created_comment(bug_id, await self._post_comment(bug_id, comment, is_private))
+
+        key = (self.tenant, "POST", f"/bug/{bug_id}/comment", dedupe_key)
+
+        return await self.inflight.do(key, lambda: self._add_comment_once(bug_id, comment, is_private, dedupe_key))
+
+    async def _add_comment_once(self, bug_id: int, comment: str, is_private: bool, dedupe_key: str) -> dict[str, int]:
+        if self.cache is None:
+            return await self._created_comment(bug_id, await self._post_comment(bug_id, comment, is_private))
+
+        key = self.cache.key(self.tenant, "writes", f"/bug/{bug_id}/comment", {"dedupe_key": dedupe_key})
 
+        # recorded empty before posting: if the answer is lost, a retry must not post again.
+        # Only one of the workers sharing the cache adds it, the others find it
+        while not await self.cache.add_record(key, "writes", {}):
+            record = await self.cache.get_record(key)
+
+            if record:
+                return {**record, "replayed": True}
+            if record is not None:
+                raise UnknownOutcomeError(
+                    f"An attempt with dedupe key {dedupe_key!r} got no answer from Bugzilla yet, "
+                    f"the comment may have been posted. Check bug #{bug_id} and use a new key to post it"
+                )
+            # dropped since, by an attempt which posted nothing
+
+        try:
+            r = await self._post_comment(bug_id, comment, is_private)
+        except (CircuitOpenError, *UNSENT_ERRORS):
+            # not sent, a retry may post it
+            await self.cache.delete_record(key)
+            raise
+
+        if r.status_code != 201 and r.status_code < 500:
+            # refused by Bugzilla, nothing was posted
+            await self.cache.delete_record(key)
+
+        result = await self._created_comment(bug_id, r)
+        await self.cache.set_record(key, "writes", result)
+
+        return result
+
+    async def _post_comment(self, bug_id: int, comment: str, is_private: bool) -> httpx.Response:
         c = {"comment": comment, "is_private": is_private}
 
-        r = await self.client.post(
-            url=f"{self.api_url}/bug/{bug_id}/comment", params=self.params, json=c
+        return await self._send(
+            "POST", f"{self.api_url}/bug/{bug_id}/comment", params=self.params, json=c
         )
 
+    async def _created_comment(self, bug_id: int, r: httpx.Response) -> dict[str, int]:
         if r.status_code != 201:
             raise httpx.TransportError(
                 f"Failed to fetch API with Status code: {r.status_code}"
             )
 
+        if self.cache is not None:
+            await self.cache.invalidate(self._bug_tag(bug_id))
+
         return r.json()
 
+    async def add_comments(
+        self, items: list[tuple[int, str, bool]], dedupe_key: str | None = None
+    ) -> list[dict[str, Any]]:
+        """Add many (bug_id, comment, is_private) comments, returning one result per item in order
+
+        Comments are posted concurrently, at most max_concurrent_batches at a
+        time, each request waiting for its turn like any other of the tenant.
+        With a dedupe_key, each item is deduplicated on the key, its bug and
+        its content, so retrying a call only posts the comments missing.
+        Items which could not be posted map to {"bug_id": id, "error": reason}
+        """
+
+        semaphore = asyncio.Semaphore(self.max_concurrent_batches)
+
+        async def add(bug_id: int, comment: str, is_private: bool) -> dict[str, Any]:
+            item_key = None
+            if dedupe_key is not None:
+                digest = hashlib.sha256(f"{is_private}:{comment}".encode()).hexdigest()[:16]
+                item_key = f"{dedupe_key}:{digest}"
+
+            async with semaphore:
+                try:
+                    return {"bug_id": bug_id, **await self.add_comment(bug_id, comment, is_private, item_key)}
+                except Exception as e:
+                    return {"bug_id": bug_id, "error": str(e)}
+
+        return list(await asyncio.gather(*(add(*item) for item in items)))
+
     async def close(self):
         """Close the async client"""
         await self.client.aclose()
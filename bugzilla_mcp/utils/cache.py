@@ -0,0 +1,384 @@
+"""Response cache for read-only Bugzilla calls"""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Protocol
+from . import jsonlib
+from .singleflight import SingleFlight
+
+
+# Seconds a response is served without asking Bugzilla again, per endpoint
+DEFAULT_TTLS: dict[str, float] = {
+    "bug": 60.0,
+    "comments": 60.0,
+    "attachments": 60.0,
+    "search": 30.0,
+    "docs": 24 * 3600.0,
+    # records of the writes made with a dedupe key, see Bugzilla.add_comment
+    "writes": 24 * 3600.0,
+}
+
+
+@dataclass
+class CacheEntry:
+    """A cached, decoded response"""
+
+    value: Any
+    size: int
+    expires: float
+    # validators used to revalidate a stale entry instead of downloading it again
+    etag: str | None = None
+    last_change_time: str | None = None
+    tags: tuple[str, ...] = field(default_factory=tuple)
+
+    def is_fresh(self) -> bool:
+        return time.monotonic() < self.expires
+
+
+class CacheBackend(Protocol):
+    """Storage of the cache entries
+
+    `local` backends keep the entries of this process only. Others are shared
+    between processes; they keep stale entries (for revalidation) at least
+    `keep` seconds and then may drop them.
+    """
+
+    local: bool
+
+    async def get(self, key: str) -> CacheEntry | None: ...
+
+    async def set(self, key: str, entry: CacheEntry, keep: float): ...
+
+    async def refresh(self, key: str, expires: float, keep: float): ...
+
+    async def invalidate(self, tag: str): ...
+
+    async def clear(self):
+        """Drop every entry"""
+
+    async def close(self): ...
+
+    # Records: small values kept exactly `keep` seconds, never evicted for
+    # space, and left alone by invalidate and clear
+
+    async def add_record(self, key: str, value: bytes, keep: float) -> bool:
+        """Store a record unless key holds one, atomically for every process sharing the backend"""
+
+    async def set_record(self, key: str, value: bytes, keep: float): ...
+
+    async def get_record(self, key: str) -> bytes | None: ...
+
+    async def delete_record(self, key: str): ...
+
+
+class MemoryBackend:
+    """Entries kept in this process as live objects, least recently used evicted past max_bytes"""
+
+    local = True
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        # tag -> keys of the entries carrying it
+        self._tags: dict[str, set[str]] = {}
+        # key -> (record, monotonic expiry), oldest first
+        self._records: dict[str, tuple[bytes, float]] = {}
+        self.bytes = 0
+        self.evictions = 0
+
+    async def get(self, key: str) -> CacheEntry | None:
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            self._entries.move_to_end(key)
+
+        return entry
+
+    async def set(self, key: str, entry: CacheEntry, keep: float):
+        # stale entries are kept until evicted, `keep` is not needed
+        self._remove(key)
+
+        self._entries[key] = entry
+        self.bytes += entry.size
+
+        for tag in entry.tags:
+            self._tags.setdefault(tag, set()).add(key)
+
+        while self.bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    async def refresh(self, key: str, expires: float, keep: float):
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            entry.expires = expires
+
+    async def invalidate(self, tag: str):
+        for key in self._tags.pop(tag, set()):
+            self._remove(key)
+
+    async def clear(self):
+        self._entries.clear()
+        self._tags.clear()
+        self.bytes = 0
+
+    async def close(self):
+        pass
+
+    async def add_record(self, key: str, value: bytes, keep: float) -> bool:
+        now = time.monotonic()
+
+        # records mostly share one duration, the expired ones are at the front
+        while self._records:
+            oldest = next(iter(self._records))
+            if self._records[oldest][1] > now:
+                break
+            del self._records[oldest]
+
+        if await self.get_record(key) is not None:
+            return False
+
+        self._records[key] = (value, now + keep)
+        return True
+
+    async def set_record(self, key: str, value: bytes, keep: float):
+        self._records[key] = (value, time.monotonic() + keep)
+
+    async def get_record(self, key: str) -> bytes | None:
+        record = self._records.get(key)
+
+        if record is None or record[1] <= time.monotonic():
+            return None
+
+        return record[0]
+
+    async def delete_record(self, key: str):
+        self._records.pop(key, None)
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+
+        if entry is None:
+            return
+
+        self.bytes -= entry.size
+
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ResponseCache:
+    """Size-bounded cache of decoded Bugzilla responses
+
+    Keys start with the tenant, their namespace, so two API keys never share
+    entries even on the same Bugzilla, and the entries of a tenant can be
+    dropped together. Entries can carry tags (e.g. one per bug id) used to
+    drop every response about a bug once it has been modified.
+
+    Entries live in `backend`, by default a MemoryBackend of max_bytes. See
+    backend_from_url for the others.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttls: dict[str, float] | None = None,
+        backend: CacheBackend | None = None,
+        stale_ttl: float = 3600.0,
+    ):
+        self.max_bytes = max_bytes
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.backend: CacheBackend = backend if backend is not None else MemoryBackend(max_bytes)
+        # seconds a stale entry is kept for revalidation by backends which expire entries
+        self.stale_ttl = stale_ttl
+
+        # loads in progress, see get_or_load
+        self._loading = SingleFlight()
+
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+
+    @staticmethod
+    def key(tenant: str, endpoint: str, path: str, params: dict[str, Any]) -> str:
+        """Cache key of a request. `params` must not contain the API key"""
+        query = "&".join(f"{k}={params[k]}" for k in sorted(params))
+        return f"{tenant}|{endpoint}|{path}?{query}"
+
+    @staticmethod
+    def namespace(key: str) -> str:
+        """The tenant a key was built for"""
+        return key.partition("|")[0]
+
+    @staticmethod
+    def _namespace_tag(namespace: str) -> str:
+        # carried by every entry of the namespace, see clear
+        return f"namespace:{namespace}"
+
+    async def get(self, key: str) -> CacheEntry | None:
+        """Return the entry for key, even if stale so that it can be revalidated"""
+
+        entry = await self.backend.get(key)
+
+        if entry is not None and entry.is_fresh():
+            self.hits += 1
+        else:
+            self.misses += 1
+
+        return entry
+
+    async def set(
+        self,
+        key: str,
+        endpoint: str,
+        value: Any,
+        size: int,
+        etag: str | None = None,
+        last_change_time: str | None = None,
+        tags: tuple[str, ...] = (),
+    ):
+        """Store a response. `size` is the size of the raw body in bytes"""
+
+        if size > self.max_bytes:
+            return
+
+        ttl = self.ttls.get(endpoint, 0.0)
+        entry = CacheEntry(
+            value=value,
+            size=size,
+            expires=time.monotonic() + ttl,
+            etag=etag,
+            last_change_time=last_change_time,
+            tags=(*tags, self._namespace_tag(self.namespace(key))),
+        )
+
+        await self.backend.set(key, entry, ttl + self.stale_ttl)
+
+    async def get_or_load(
+        self, key: str, endpoint: str, load: Callable[[], Awaitable[tuple[Any, int]]]
+    ) -> Any:
+        """Return the fresh value for key, calling load() to fill it on a miss
+
+        load returns (value, size in bytes). Concurrent misses on the same key
+        share a single call to load.
+        """
+
+        entry = await self.get(key)
+
+        if entry is not None and entry.is_fresh():
+            return entry.value
+
+        async def load_and_store():
+            value, size = await load()
+            await self.set(key, endpoint, value, size)
+            return value
+
+        return await self._loading.do(key, load_and_store)
+
+    async def refresh(self, key: str, endpoint: str):
+        """Mark a stale entry fresh again after Bugzilla confirmed it is unchanged"""
+
+        ttl = self.ttls.get(endpoint, 0.0)
+        await self.backend.refresh(key, time.monotonic() + ttl, ttl + self.stale_ttl)
+        self.revalidations += 1
+
+    async def invalidate(self, tag: str):
+        """Drop every entry carrying tag"""
+        await self.backend.invalidate(tag)
+
+    async def add_record(self, key: str, endpoint: str, value: Any) -> bool:
+        """Store a record for key unless there is one, atomically across the processes sharing the backend
+
+        Records are JSON values kept for the TTL of endpoint. Unlike entries,
+        they are not evicted for space nor dropped by invalidate or clear:
+        they hold what cannot be fetched again (see Bugzilla.add_comment).
+        """
+        return await self.backend.add_record(key, jsonlib.dumps(value).encode(), self.ttls.get(endpoint, 0.0))
+
+    async def set_record(self, key: str, endpoint: str, value: Any):
+        """Store a record for key, replacing any"""
+        await self.backend.set_record(key, jsonlib.dumps(value).encode(), self.ttls.get(endpoint, 0.0))
+
+    async def get_record(self, key: str) -> Any:
+        """The record of key, None if there is none"""
+
+        data = await self.backend.get_record(key)
+
+        return None if data is None else jsonlib.loads(data)
+
+    async def delete_record(self, key: str):
+        await self.backend.delete_record(key)
+
+    async def clear(self, namespace: str | None = None):
+        """Drop every entry, or those of one tenant"""
+
+        if namespace is None:
+            await self.backend.clear()
+        else:
+            await self.backend.invalidate(self._namespace_tag(namespace))
+
+    async def close(self):
+        await self.backend.close()
+
+    @property
+    def bytes(self) -> int:
+        """Size of the entries of a local backend"""
+        return getattr(self.backend, "bytes", 0)
+
+    @property
+    def evictions(self) -> int:
+        return getattr(self.backend, "evictions", 0)
+
+    def __len__(self) -> int:
+        return len(self.backend) if self.backend.local else 0
+
+    def stats(self) -> dict[str, Any]:
+        """Cache counters"""
+        return {
+            "entries": len(self),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "evictions": self.evictions,
+        }
+
+
+def backend_from_url(url: str | None, max_bytes: int = 64 * 1024 * 1024, prefix: str = "bugzilla-mcp:") -> CacheBackend:
+    """The cache backend of a URL
+
+    - None or memory:// - entries in this process, lost on restart
+    - sqlite:///path/to/cache.db - entries in a file, kept across restarts and shared by the processes of a host
+    - unix:///path/to.sock, redis://host:port/db or rediss:// - entries in a server speaking the Redis protocol,
+      shared by every process using it. `prefix` starts the keys in the server.
+
+    max_bytes bounds the entries kept in memory or on disk, a server bounds its own.
+    """
+
+    scheme = url.partition("://")[0] if url else "memory"
+
+    if scheme == "memory":
+        return MemoryBackend(max_bytes)
+
+    if scheme == "sqlite":
+        from .disk_cache import SQLiteBackend
+
+        return SQLiteBackend(url.removeprefix("sqlite://"), max_bytes)
+
+    if scheme in ("unix", "redis", "rediss"):
+        from .resp import RespBackend
+
+        return RespBackend(url, prefix)
+
+    raise ValueError(f"unsupported cache URL {url!r}")
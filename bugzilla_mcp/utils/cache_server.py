@@ -0,0 +1,385 @@
+"""Small in-memory cache server speaking the subset of the Redis protocol used by RespBackend
+
+Started by server.py for its workers to share one cache, on a Unix socket
+only the current user can open. It can also be run alone:
+
+    python -m bugzilla_mcp.utils.cache_server /run/bugzilla-mcp/cache.sock --max-bytes 268435456
+
+Values are evicted least recently used first past max_bytes and at the
+expiry set by SET PX / PEXPIRE. Values stored with SET NX (records, see
+CacheBackend.add_record) are only dropped at their expiry and are not
+counted in max_bytes.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Any
+from .resp import RespError
+
+
+logger = logging.getLogger(__name__)
+
+
+class Store:
+    """Keys to bytes or sets of bytes, bounded in size"""
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        # key -> value, least recently used first
+        self.values: OrderedDict[bytes, bytes | set[bytes]] = OrderedDict()
+        # keys set with NX -> value, never evicted, oldest first
+        self.records: dict[bytes, bytes] = {}
+        # key -> monotonic expiry
+        self.expires: dict[bytes, float] = {}
+        self.bytes = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _size(key: bytes, value: bytes | set[bytes]) -> int:
+        if isinstance(value, bytes):
+            return len(key) + len(value)
+        return len(key) + sum(len(member) for member in value)
+
+    def _lookup(self, key: bytes) -> bytes | set[bytes] | None:
+        if key in self.records:
+            if self.expires.get(key, float("inf")) <= time.monotonic():
+                self.delete(key)
+                return None
+            return self.records[key]
+
+        value = self.values.get(key)
+
+        if value is None:
+            return None
+
+        if key in self.expires and self.expires[key] <= time.monotonic():
+            self.delete(key)
+            return None
+
+        self.values.move_to_end(key)
+        return value
+
+    def _store(self, key: bytes, value: bytes | set[bytes]):
+        self.bytes += self._size(key, value)
+        self.values[key] = value
+        self.values.move_to_end(key)
+
+        while self.bytes > self.max_bytes and len(self.values) > 1:
+            self.delete(next(iter(self.values)))
+            self.evictions += 1
+
+    def delete(self, key: bytes) -> bool:
+        self.expires.pop(key, None)
+
+        if self.records.pop(key, None) is not None:
+            return True
+
+        value = self.values.pop(key, None)
+
+        if value is None:
+            return False
+
+        self.bytes -= self._size(key, value)
+        return True
+
+    def get(self, key: bytes) -> bytes | None:
+        value = self._lookup(key)
+
+        if isinstance(value, set):
+            raise RespError("WRONGTYPE Operation against a key holding the wrong kind of value")
+
+        return value
+
+    def set(self, key: bytes, value: bytes, ttl_ms: int | None = None, nx: bool = False) -> bool:
+        """Store a value, with nx only if key holds none and as a record. False if not stored"""
+
+        if nx:
+            self._drop_expired_records()
+            if self._lookup(key) is not None:
+                return False
+
+        record = nx or key in self.records
+        self.delete(key)
+
+        if record:
+            self.records[key] = value
+        else:
+            self._store(key, value)
+
+        if ttl_ms is not None:
+            self.expires[key] = time.monotonic() + ttl_ms / 1000
+
+        return True
+
+    def _drop_expired_records(self):
+        # records mostly share one duration, the expired ones are at the front
+        now = time.monotonic()
+
+        while self.records:
+            oldest = next(iter(self.records))
+            if self.expires.get(oldest, float("inf")) > now:
+                break
+            self.delete(oldest)
+
+    def sadd(self, key: bytes, members: list[bytes]) -> int:
+        current = self._lookup(key)
+
+        if isinstance(current, bytes):
+            raise RespError("WRONGTYPE Operation against a key holding the wrong kind of value")
+
+        new = set(members) - (current or set())
+
+        if current is None:
+            self._store(key, set(new))
+        else:
+            current |= new
+            self.bytes += sum(len(member) for member in new)
+
+        return len(new)
+
+    def smembers(self, key: bytes) -> list[bytes]:
+        value = self._lookup(key)
+
+        if isinstance(value, bytes):
+            raise RespError("WRONGTYPE Operation against a key holding the wrong kind of value")
+
+        return list(value or ())
+
+    def pexpire(self, key: bytes, ttl_ms: int, nx: bool = False, gt: bool = False) -> int:
+        """Set the expiry of key; with nx only if it has none, with gt only if later (none being the latest)"""
+
+        if self._lookup(key) is None:
+            return 0
+
+        expires = time.monotonic() + ttl_ms / 1000
+        current = self.expires.get(key)
+
+        if (nx and current is not None) or (gt and (current is None or expires <= current)):
+            return 0
+
+        self.expires[key] = expires
+        return 1
+
+    def clear(self):
+        self.values.clear()
+        self.records.clear()
+        self.expires.clear()
+        self.bytes = 0
+
+    def keys(self) -> list[bytes]:
+        return [*self.values, *self.records]
+
+    def __len__(self) -> int:
+        return len(self.values) + len(self.records)
+
+
+def glob_pattern(pattern: bytes) -> re.Pattern[bytes]:
+    """Regular expression of a Redis glob pattern: *, ?, [set] and \\ escapes"""
+
+    parts = []
+    i = 0
+
+    while i < len(pattern):
+        c = pattern[i:i + 1]
+        if c == b"\\" and i + 1 < len(pattern):
+            parts.append(re.escape(pattern[i + 1:i + 2]))
+            i += 1
+        elif c == b"*":
+            parts.append(b".*")
+        elif c == b"?":
+            parts.append(b".")
+        elif c == b"[" and b"]" in pattern[i + 1:]:
+            end = pattern.index(b"]", i + 1)
+            members = pattern[i + 1:end]
+            negate = members.startswith(b"^")
+            parts.append(b"[" + (b"^" if negate else b"") + re.escape(members[negate:]).replace(b"\\-", b"-") + b"]")
+            i = end
+        else:
+            parts.append(re.escape(c))
+        i += 1
+
+    return re.compile(b"".join(parts), re.DOTALL)
+
+
+def encode_reply(value: Any) -> bytes:
+    """A reply in RESP: str as status, bytes as bulk string, int, list, None or RespError"""
+
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, RespError):
+        return b"-%s\r\n" % str(value).encode()
+    if isinstance(value, str):
+        return b"+%s\r\n" % value.encode()
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, bytes):
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+    if isinstance(value, list):
+        return b"*%d\r\n" % len(value) + b"".join(map(encode_reply, value))
+
+    raise TypeError(f"cannot encode {type(value).__name__} as a reply")
+
+
+class CacheServer:
+    """RESP server over a Store"""
+
+    def __init__(self, store: Store | None = None):
+        self.store = store or Store()
+        self.commands = {
+            b"PING": self._ping,
+            b"GET": self._get,
+            b"SET": self._set,
+            b"DEL": self._del,
+            b"SADD": self._sadd,
+            b"SMEMBERS": self._smembers,
+            b"PEXPIRE": self._pexpire,
+            b"SCAN": self._scan,
+            b"FLUSHDB": self._flushdb,
+            b"DBSIZE": self._dbsize,
+        }
+
+    def execute(self, command: list[bytes]) -> Any:
+        """Run one command and return its reply"""
+
+        if not command:
+            return RespError("ERR empty command")
+
+        handler = self.commands.get(command[0].upper())
+
+        if handler is None:
+            return RespError(f"ERR unknown command '{command[0].decode(errors='replace')}'")
+
+        try:
+            return handler(*command[1:])
+        except TypeError:
+            return RespError(f"ERR wrong number of arguments for '{command[0].decode().lower()}' command")
+        except ValueError:
+            return RespError("ERR value is not an integer or out of range")
+        except RespError as e:
+            return e
+
+    def _ping(self, message: bytes | None = None) -> str | bytes:
+        return "PONG" if message is None else message
+
+    def _get(self, key: bytes) -> bytes | None:
+        return self.store.get(key)
+
+    def _set(self, key: bytes, value: bytes, *options: bytes) -> str | None:
+        ttl_ms = None
+        nx = False
+        options_left = [option.upper() for option in options]
+
+        while options_left:
+            option = options_left.pop(0)
+            if option == b"NX" and not nx:
+                nx = True
+            elif option in (b"PX", b"EX") and ttl_ms is None and options_left:
+                ttl_ms = int(options_left.pop(0)) * (1000 if option == b"EX" else 1)
+            else:
+                raise RespError("ERR syntax error")
+
+        return "OK" if self.store.set(key, value, ttl_ms, nx) else None
+
+    def _del(self, key: bytes, *keys: bytes) -> int:
+        return sum(self.store.delete(k) for k in (key, *keys))
+
+    def _sadd(self, key: bytes, member: bytes, *members: bytes) -> int:
+        return self.store.sadd(key, [member, *members])
+
+    def _smembers(self, key: bytes) -> list[bytes]:
+        return self.store.smembers(key)
+
+    def _pexpire(self, key: bytes, ttl_ms: bytes, *options: bytes) -> int:
+        condition = options[0].upper() if len(options) == 1 else b""
+
+        if options and condition not in (b"NX", b"GT"):
+            raise RespError("ERR syntax error")
+
+        return self.store.pexpire(key, int(ttl_ms), nx=condition == b"NX", gt=condition == b"GT")
+
+    def _scan(self, cursor: bytes, *options: bytes) -> list:
+        """Every matching key at once, with the end cursor (COUNT is only a hint in Redis too)"""
+
+        int(cursor)
+        options_by_name = dict(zip((o.upper() for o in options[::2]), options[1::2]))
+        pattern = glob_pattern(options_by_name.get(b"MATCH", b"*"))
+
+        return [b"0", [key for key in self.store.keys() if pattern.fullmatch(key)]]
+
+    def _flushdb(self) -> str:
+        self.store.clear()
+        return "OK"
+
+    def _dbsize(self) -> int:
+        return len(self.store)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve one client connection"""
+
+        try:
+            while command := await self._read_command(reader):
+                writer.write(encode_reply(self.execute(command)))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_command(reader: asyncio.StreamReader) -> list[bytes] | None:
+        line = await reader.readline()
+
+        if not line:
+            return None
+
+        if not line.startswith(b"*"):
+            # inline command, as typed in telnet
+            return line.split()
+
+        command = []
+
+        for _ in range(int(line[1:])):
+            header = await reader.readline()
+            if not header.startswith(b"$"):
+                raise ValueError("expected a bulk string")
+            command.append((await reader.readexactly(int(header[1:]) + 2))[:-2])
+
+        return command
+
+    async def serve_unix(self, path: str) -> asyncio.AbstractServer:
+        """Listen on a Unix socket only the current user can open"""
+
+        if os.path.exists(path):
+            os.unlink(path)
+
+        umask = os.umask(0o177)
+        try:
+            return await asyncio.start_unix_server(self.handle, path)
+        finally:
+            os.umask(umask)
+
+
+async def main(path: str, max_bytes: int):
+    server = await CacheServer(Store(max_bytes)).serve_unix(path)
+    logger.info("Cache server listening on %s", path)
+
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="Unix socket to listen on")
+    parser.add_argument("--max-bytes", type=int, default=256 * 1024 * 1024, help="size of the cached values")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(main(args.path, args.max_bytes))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,108 @@
+"""Binary format of the cache entries stored outside the process
+
+An entry is a 3 byte header (format version, flags, marshal version)
+followed by the entry fields in the marshal format, compressed with zlib
+above COMPRESS_ABOVE bytes. Records (Bug, SearchRow, Comment) are stored as
+tuples of their type code and fields: decoded JSON never contains tuples,
+so they cannot be mistaken for a value.
+
+Unlike pickle, decoding never runs code or imports modules, so a shared
+cache server cannot make the workers run anything.
+"""
+
+import marshal
+import time
+import zlib
+from typing import Any
+from .cache import CacheEntry
+from .models import Bug, Comment, SearchRow
+
+
+FORMAT = 1
+# entries of at least this many bytes are compressed
+COMPRESS_ABOVE = 1024
+
+_COMPRESSED = 1
+_RECORDS = 2
+
+# append only: the position of a type is its code in stored entries
+RECORD_TYPES = (Bug, SearchRow, Comment)
+_CODES = {record_type: code for code, record_type in enumerate(RECORD_TYPES)}
+
+
+def _pack(value: Any) -> Any:
+    """value with its records replaced by tuples"""
+
+    code = _CODES.get(type(value))
+
+    if code is not None:
+        return (code, *(getattr(value, name) for name in value.__slots__))
+    if isinstance(value, list):
+        return [_pack(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _pack(item) for key, item in value.items()}
+
+    return value
+
+
+def _unpack(value: Any) -> Any:
+    if isinstance(value, tuple):
+        return RECORD_TYPES[value[0]](*value[1:])
+    if isinstance(value, list):
+        return [_unpack(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _unpack(item) for key, item in value.items()}
+
+    return value
+
+
+def encode(entry: CacheEntry) -> bytes:
+    """entry in the binary format, its expiry in wall-clock time as monotonic clocks differ between processes
+
+    Raises ValueError for values which are neither JSON nor records.
+    """
+
+    flags = 0
+    fields = [entry.value, entry.size, entry.expires - time.monotonic() + time.time(),
+              entry.etag, entry.last_change_time, list(entry.tags)]
+
+    try:
+        data = marshal.dumps(fields)
+    except ValueError:
+        # records inside, the slow path
+        flags |= _RECORDS
+        fields[0] = _pack(entry.value)
+        data = marshal.dumps(fields)
+
+    if len(data) >= COMPRESS_ABOVE:
+        flags |= _COMPRESSED
+        data = zlib.compress(data, 1)
+
+    return bytes((FORMAT, flags, marshal.version)) + data
+
+
+def decode(data: bytes) -> CacheEntry:
+    """The entry encoded in data, expiring on this process' monotonic clock. Raises ValueError if unreadable"""
+
+    if len(data) < 3 or data[0] != FORMAT or data[2] != marshal.version:
+        raise ValueError("cache entry of another format")
+
+    flags, body = data[1], data[3:]
+
+    try:
+        if flags & _COMPRESSED:
+            body = zlib.decompress(body)
+        value, size, expires, etag, last_change_time, tags = marshal.loads(body)
+        if flags & _RECORDS:
+            value = _unpack(value)
+    except (zlib.error, EOFError, TypeError, IndexError) as e:
+        raise ValueError(f"corrupt cache entry: {e}") from e
+
+    return CacheEntry(
+        value=value,
+        size=size,
+        expires=expires - time.time() + time.monotonic(),
+        etag=etag,
+        last_change_time=last_change_time,
+        tags=tuple(tags),
+    )
@@ -0,0 +1,248 @@
+"""Response cache kept on disk, in SQLite"""
+
+import asyncio
+import logging
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+from . import codec
+from .cache import CacheEntry
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    data BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    -- wall-clock times: when the entry was stored and until when it is kept
+    stored REAL NOT NULL,
+    keep_until REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS entries_stored ON entries (stored);
+CREATE INDEX IF NOT EXISTS entries_keep_until ON entries (keep_until);
+
+CREATE TABLE IF NOT EXISTS tags (
+    tag TEXT NOT NULL,
+    key TEXT NOT NULL,
+    PRIMARY KEY (tag, key)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS tags_key ON tags (key);
+
+-- size of the entries, kept up to date by every process writing to the file
+CREATE TABLE IF NOT EXISTS usage (bytes INTEGER NOT NULL);
+INSERT INTO usage (bytes) SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM usage);
+
+CREATE TRIGGER IF NOT EXISTS entries_added AFTER INSERT ON entries BEGIN
+    UPDATE usage SET bytes = bytes + NEW.size;
+END;
+
+CREATE TRIGGER IF NOT EXISTS entries_removed AFTER DELETE ON entries BEGIN
+    UPDATE usage SET bytes = bytes - OLD.size;
+END;
+
+-- see CacheBackend.add_record, not counted in the size
+CREATE TABLE IF NOT EXISTS records (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    keep_until REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS records_keep_until ON records (keep_until);
+"""
+
+# files with another layout are emptied, they only hold a cache
+SCHEMA_VERSION = 1
+
+# stores between two checks of the size of the database
+EVICT_EVERY = 100
+
+
+class SQLiteBackend:
+    """Entries stored in a SQLite database, kept across restarts
+
+    Every process of a host can open the same file (the journal is in WAL
+    mode, readers never wait for the writer). Entries are dropped `keep`
+    seconds after being stored and, past max_bytes, least recently stored
+    first: recording every read would turn each cache hit into a write.
+
+    The database is only used from a thread of its own, so that waiting for
+    the disk or for another process holding the write lock never blocks the
+    event loop.
+    """
+
+    local = False
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.db = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        if path != ":memory:":
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+        if self.db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self.db.executescript(
+                "DROP TABLE IF EXISTS entries; DROP TABLE IF EXISTS tags; DROP TABLE IF EXISTS usage;"
+                "DROP TABLE IF EXISTS records;"
+                f"PRAGMA user_version = {SCHEMA_VERSION};"
+            )
+        self.db.executescript(SCHEMA)
+
+        # one thread: the connection is never used by two at once
+        self._thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-cache")
+
+        self.evictions = 0
+        self._stores = 0
+
+    async def _run(self, fn: Callable[..., T], *args: Any) -> T:
+        return await asyncio.get_running_loop().run_in_executor(self._thread, fn, *args)
+
+    async def get(self, key: str) -> CacheEntry | None:
+        return await self._run(self._get, key)
+
+    def _get(self, key: str) -> CacheEntry | None:
+        row = self.db.execute(
+            "SELECT data FROM entries WHERE key = ? AND keep_until > ?", (key, time.time())
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        try:
+            return codec.decode(row[0])
+        except ValueError:
+            # written by another version of the server
+            return None
+
+    async def set(self, key: str, entry: CacheEntry, keep: float):
+        await self._run(self._set, key, entry, keep)
+
+    def _set(self, key: str, entry: CacheEntry, keep: float):
+        try:
+            data = codec.encode(entry)
+        except ValueError:
+            logger.debug("Not caching %s, its value cannot be encoded", key)
+            return
+
+        now = time.time()
+
+        with self.db:
+            # not INSERT OR REPLACE: the replaced row would not fire entries_removed
+            self.db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self.db.execute(
+                "INSERT INTO entries (key, data, size, stored, keep_until) VALUES (?, ?, ?, ?, ?)",
+                (key, data, len(data), now, now + keep),
+            )
+            self.db.execute("DELETE FROM tags WHERE key = ?", (key,))
+            self.db.executemany("INSERT OR IGNORE INTO tags (tag, key) VALUES (?, ?)", [(tag, key) for tag in entry.tags])
+
+        self._stores += 1
+        if self._stores % EVICT_EVERY == 0:
+            self.evict()
+
+    async def refresh(self, key: str, expires: float, keep: float):
+        await self._run(self._refresh, key, expires, keep)
+
+    def _refresh(self, key: str, expires: float, keep: float):
+        entry = self._get(key)
+
+        if entry is not None:
+            entry.expires = expires
+            self._set(key, entry, keep)
+
+    async def invalidate(self, tag: str):
+        await self._run(self._invalidate, tag)
+
+    def _invalidate(self, tag: str):
+        with self.db:
+            keys = [(key,) for (key,) in self.db.execute("SELECT key FROM tags WHERE tag = ?", (tag,))]
+            self.db.executemany("DELETE FROM entries WHERE key = ?", keys)
+            self.db.executemany("DELETE FROM tags WHERE key = ?", keys)
+
+    async def clear(self):
+        await self._run(self._clear)
+
+    def _clear(self):
+        with self.db:
+            self.db.execute("DELETE FROM entries")
+            self.db.execute("DELETE FROM tags")
+
+    async def add_record(self, key: str, value: bytes, keep: float) -> bool:
+        return await self._run(self._add_record, key, value, keep)
+
+    def _add_record(self, key: str, value: bytes, keep: float) -> bool:
+        now = time.time()
+
+        # one transaction: the first statement takes the write lock of the file
+        with self.db:
+            self.db.execute("DELETE FROM records WHERE key = ? AND keep_until <= ?", (key, now))
+            added = self.db.execute(
+                "INSERT OR IGNORE INTO records (key, value, keep_until) VALUES (?, ?, ?)", (key, value, now + keep)
+            ).rowcount
+
+        return added == 1
+
+    async def set_record(self, key: str, value: bytes, keep: float):
+        await self._run(self._set_record, key, value, keep)
+
+    def _set_record(self, key: str, value: bytes, keep: float):
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO records (key, value, keep_until) VALUES (?, ?, ?)", (key, value, time.time() + keep)
+            )
+
+    async def get_record(self, key: str) -> bytes | None:
+        return await self._run(self._get_record, key)
+
+    def _get_record(self, key: str) -> bytes | None:
+        row = self.db.execute("SELECT value FROM records WHERE key = ? AND keep_until > ?", (key, time.time())).fetchone()
+
+        return None if row is None else row[0]
+
+    async def delete_record(self, key: str):
+        await self._run(self._delete_record, key)
+
+    def _delete_record(self, key: str):
+        with self.db:
+            self.db.execute("DELETE FROM records WHERE key = ?", (key,))
+
+    async def close(self):
+        await self._run(self.db.close)
+        self._thread.shutdown()
+
+    def evict(self):
+        """Drop the entries and records kept long enough, then the oldest entries while over max_bytes"""
+
+        with self.db:
+            self.db.execute("DELETE FROM records WHERE keep_until <= ?", (time.time(),))
+
+            expired = self.db.execute("SELECT key FROM entries WHERE keep_until <= ?", (time.time(),)).fetchall()
+            self.db.executemany("DELETE FROM entries WHERE key = ?", expired)
+            self.db.executemany("DELETE FROM tags WHERE key = ?", expired)
+
+            excess = self.bytes - self.max_bytes
+            if excess > 0:
+                oldest = []
+                for key, size in self.db.execute("SELECT key, size FROM entries ORDER BY stored"):
+                    if excess <= 0:
+                        break
+                    oldest.append((key,))
+                    excess -= size
+                self.db.executemany("DELETE FROM entries WHERE key = ?", oldest)
+                self.db.executemany("DELETE FROM tags WHERE key = ?", oldest)
+                self.evictions += len(oldest)
+
+    @property
+    def bytes(self) -> int:
+        """Size of the stored entries"""
+        return self.db.execute("SELECT bytes FROM usage").fetchone()[0]
+
+    def __len__(self) -> int:
+        return self.db.execute("SELECT count(*) FROM entries").fetchone()[0]
@@ -0,0 +1,92 @@
+"""JSON encoding and decoding with the fastest library installed
+
+orjson is used when available, then msgspec, then the standard library. Every
+backend produces the same compact JSON as fastmcp's default tool serializer.
+"""
+
+import dataclasses
+import json
+from functools import lru_cache
+from typing import Any, Callable, Sequence, TypedDict
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # optional speedup
+    msgspec = None
+
+
+if orjson is not None:
+    BACKEND = "orjson"
+
+    def loads(data: bytes | str) -> Any:
+        return orjson.loads(data)
+
+    def dumps(obj: Any) -> str:
+        # non str keys: bugs_info results are keyed by bug id
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+
+elif msgspec is not None:
+    BACKEND = "msgspec"
+    _encoder = msgspec.json.Encoder(enc_hook=str)
+
+    def loads(data: bytes | str) -> Any:
+        return msgspec.json.decode(data)
+
+    def dumps(obj: Any) -> str:
+        return _encoder.encode(obj).decode()
+
+else:
+    BACKEND = "json"
+
+    def _default(obj: Any) -> Any:
+        # records of .models, which orjson and msgspec encode natively
+        if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+            return dataclasses.asdict(obj)
+        return str(obj)
+
+    def loads(data: bytes | str) -> Any:
+        return json.loads(data)
+
+    def dumps(obj: Any) -> str:
+        return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":"))
+
+
+def typed_decoder(type_: Any, convert: Callable[[Any], Any]) -> Callable[[bytes], Any]:
+    """Decoder of a JSON document into type_, e.g. a TypedDict holding records of .models
+
+    msgspec parses the document straight into type_, skipping the fields it
+    does not declare. Without it, the document is decoded by `loads` and then
+    passed to `convert`, which must build the same result.
+    """
+
+    if msgspec is None:
+        return lambda data: convert(loads(data))
+
+    return msgspec.json.Decoder(type_).decode
+
+
+@lru_cache(maxsize=64)
+def _bugs_decoder(fields: tuple[str, ...]) -> Callable[[bytes], Any]:
+    # a TypedDict only materializes its declared keys, unknown ones are skipped while parsing
+    bug = TypedDict("Bug", {field: Any for field in fields}, total=False)
+    page = TypedDict("Page", {"bugs": list[bug], "faults": list[Any]}, total=False)
+    return msgspec.json.Decoder(page).decode
+
+
+def bugs_decoder(fields: Sequence[str]) -> Callable[[bytes], Any]:
+    """Decoder of a {"bugs": [...]} response keeping only `fields` of each bug
+
+    With msgspec the other fields are skipped by the parser instead of being
+    built as Python objects and thrown away, which matters when a Bugzilla
+    ignores include_fields. Without it, this is plain `loads`.
+    """
+
+    if msgspec is None:
+        return loads
+
+    return _bugs_decoder(tuple(dict.fromkeys(fields)))
@@ -0,0 +1,268 @@
+"""Prometheus metrics of tool calls and upstream Bugzilla requests
+
+A small in-process implementation of counters, histograms and gauges
+rendered in the Prometheus text exposition format. Recording is a dict lookup
+and a few additions, cheap enough for every request.
+"""
+
+import re
+from bisect import bisect_left
+from typing import Any, Callable, Iterable, Iterator
+
+
+# seconds; tool calls and Bugzilla requests range from cache hits to slow searches
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# numeric path segments, e.g. the bug id of /bug/123/comment
+_IDS = re.compile(r"/\d+(?=/|$)")
+
+
+def endpoint(path: str) -> str:
+    """Low cardinality label for an API path, e.g. /bug/{id}/comment"""
+    return _IDS.sub("/{id}", path)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(int(value)) if float(value).is_integer() else repr(value)
+
+
+def _without(series: dict[tuple[str, ...], Any], names: tuple[str, ...], label: str, value: str) -> dict:
+    if label not in names:
+        return series
+
+    i = names.index(label)
+    return {labels: v for labels, v in series.items() if labels[i] != value}
+
+
+class Counter:
+    """Monotonic counter, one series per combination of label values"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def current(self) -> dict[tuple[str, ...], float]:
+        return self.values
+
+    @staticmethod
+    def merge(a: float, b: float) -> float:
+        return a + b
+
+    def forget(self, label: str, value: str):
+        """Drop the series whose `label` is value"""
+        self.values = _without(self.values, self.labels, label, value)
+
+    def samples(self, values: dict[tuple[str, ...], float] | None = None) -> Iterator[str]:
+        for labels, value in (self.current() if values is None else values).items():
+            yield f"{self.name}{_labels(self.labels, labels)} {_number(value)}"
+
+
+class Histogram:
+    """Distribution of observed values over fixed buckets"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        # per series: [count of each bucket (not cumulative) and +Inf..., sum]
+        self.series: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, *labels: str):
+        series = self.series.get(labels)
+
+        if series is None:
+            series = self.series[labels] = [0.0] * (len(self.buckets) + 2)
+
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def current(self) -> dict[tuple[str, ...], list[float]]:
+        return self.series
+
+    @staticmethod
+    def merge(a: list[float], b: list[float]) -> list[float]:
+        return [x + y for x, y in zip(a, b)]
+
+    def forget(self, label: str, value: str):
+        """Drop the series whose `label` is value"""
+        self.series = _without(self.series, self.labels, label, value)
+
+    def samples(self, values: dict[tuple[str, ...], list[float]] | None = None) -> Iterator[str]:
+        for labels, series in (self.current() if values is None else values).items():
+            cumulative = 0.0
+
+            for bound, count in zip((*self.buckets, float("inf")), series):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                yield f"{self.name}_bucket{_labels(self.labels, labels, le)} {_number(cumulative)}"
+
+            yield f"{self.name}_sum{_labels(self.labels, labels)} {_number(series[-1])}"
+            yield f"{self.name}_count{_labels(self.labels, labels)} {_number(cumulative)}"
+
+
+class Gauge:
+    """Value read when the metrics are rendered, from a callback returning {label values: value}
+
+    The values of several processes are added up, or combined by `combine`
+    (e.g. max) when a sum means nothing.
+    """
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        collect: Callable[[], dict[tuple[str, ...], float]],
+        labels: tuple[str, ...] = (),
+        combine: Callable[[tuple[float, float]], float] = sum,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.collect = collect
+        self.combine = combine
+
+    def current(self) -> dict[tuple[str, ...], float]:
+        return self.collect()
+
+    def merge(self, a: float, b: float) -> float:
+        return self.combine((a, b))
+
+    def samples(self, values: dict[tuple[str, ...], float] | None = None) -> Iterator[str]:
+        for labels, value in (self.current() if values is None else values).items():
+            yield f"{self.name}{_labels(self.labels, labels)} {_number(value)}"
+
+
+class CallbackCounter(Gauge):
+    """Counter kept by another object, read from a callback when the metrics are rendered"""
+
+    kind = "counter"
+
+
+class Metrics:
+    """The server's metrics
+
+    Upstream series are labelled by the host of the Bugzilla instance, never by
+    API key, so that the number of series does not grow with the users. The
+    series of a host are dropped once no pooled client uses it (see
+    ClientRegistry), as any URL can be sent by a client.
+    """
+
+    def __init__(self):
+        self._metrics: list[Any] = []
+
+        self.tool_duration = self.add(Histogram(
+            "bugzilla_mcp_tool_duration_seconds", "Duration of MCP tool calls", ("tool", "host")
+        ))
+        self.tool_errors = self.add(Counter(
+            "bugzilla_mcp_tool_errors_total", "MCP tool calls which raised an error", ("tool", "host")
+        ))
+        self.upstream_duration = self.add(Histogram(
+            "bugzilla_mcp_upstream_request_duration_seconds",
+            "Duration of requests to Bugzilla, each retry counted apart",
+            ("host", "method", "endpoint"),
+        ))
+        self.upstream_responses = self.add(Counter(
+            "bugzilla_mcp_upstream_responses_total",
+            "Responses from Bugzilla by status code, `error` when none was received",
+            ("host", "method", "endpoint", "status"),
+        ))
+        self.upstream_received_bytes = self.add(Counter(
+            "bugzilla_mcp_upstream_received_bytes_total", "Body bytes received from Bugzilla", ("host", "endpoint")
+        ))
+        self.upstream_sent_bytes = self.add(Counter(
+            "bugzilla_mcp_upstream_sent_bytes_total", "Body bytes sent to Bugzilla", ("host", "endpoint")
+        ))
+        self.upstream_retries = self.add(Counter(
+            "bugzilla_mcp_upstream_retries_total", "Requests to Bugzilla sent again after a failure", ("host",)
+        ))
+        self.upstream_rejected = self.add(Counter(
+            "bugzilla_mcp_upstream_rejected_total",
+            "Requests not sent because the circuit breaker of the Bugzilla instance is open",
+            ("host",),
+        ))
+        self.upstream_queue_wait = self.add(Histogram(
+            "bugzilla_mcp_upstream_queue_wait_seconds",
+            "Time requests to Bugzilla waited before being sent, for a free slot of the tenant"
+            " (queue=tenant) or for the rate limit of the instance (queue=rate_limit)",
+            ("host", "queue"),
+        ))
+        self.cache_lookups = self.add(Counter(
+            "bugzilla_mcp_cache_lookups_total",
+            "Response cache lookups by result: hit, miss or revalidated (stale but unchanged)",
+            ("host", "endpoint", "result"),
+        ))
+
+    def forget_host(self, host: str):
+        """Drop the series of a Bugzilla instance no client talks to anymore"""
+
+        for metric in self._metrics:
+            if hasattr(metric, "forget"):
+                metric.forget("host", host)
+
+    def add(self, metric: Any) -> Any:
+        """Register a Counter, Histogram, Gauge or CallbackCounter to be rendered"""
+        self._metrics.append(metric)
+        return metric
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        """Every series, JSON serialisable, for another process to render with its own (see render)"""
+
+        return {
+            metric.name: {"kind": metric.kind, "series": [[list(labels), v] for labels, v in metric.current().items()]}
+            for metric in self._metrics
+        }
+
+    def render(self, snapshots: Iterable[dict[str, dict[str, Any]]] = ()) -> str:
+        """Every metric in the Prometheus text exposition format (version 0.0.4)
+
+        The series of snapshots taken by other processes are merged with
+        those of this one, so that one scrape covers them all.
+        """
+
+        lines = []
+        snapshots = list(snapshots)
+
+        for metric in self._metrics:
+            values = dict(metric.current())
+
+            for snapshot in snapshots:
+                for labels, value in snapshot.get(metric.name, {}).get("series", []):
+                    labels = tuple(labels)
+                    values[labels] = metric.merge(values[labels], value) if labels in values else value
+
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples(values))
+
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,74 @@
+"""Record types of the bugs and comments handled by the client and the tools
+
+Slotted dataclasses: a record holds its fields in a fixed layout instead of a
+per-instance dict, so large search results and cached pages take less memory.
+msgspec, when installed, decodes Bugzilla responses straight into them.
+"""
+
+from dataclasses import dataclass, field, fields
+from typing import Any, Mapping
+
+
+@dataclass(slots=True)
+class Bug:
+    """The essential fields of a bug, those requested by searches"""
+
+    id: int
+    product: str | None = None
+    component: str | None = None
+    assigned_to: str | None = None
+    status: str | None = None
+    resolution: str | None = None
+    summary: str | None = None
+    last_change_time: str | None = None
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "Bug":
+        return cls(*map(data.get, BUG_FIELDS))
+
+
+@dataclass(slots=True)
+class SearchRow:
+    """A bug as returned by the search tools, fields named as the tools document them"""
+
+    bug_id: int = field(metadata={"source": "id"})
+    product: str | None = None
+    component: str | None = None
+    assigned_to: str | None = None
+    status: str | None = None
+    resolution: str | None = None
+    summary: str | None = None
+    last_updated: str | None = field(default=None, metadata={"source": "last_change_time"})
+
+    @classmethod
+    def from_bug(cls, bug: Bug | Mapping[str, Any]) -> "SearchRow":
+        if isinstance(bug, Bug):
+            return cls(*(getattr(bug, source) for source in ESSENTIAL_FIELDS.values()))
+
+        return cls(*map(bug.get, ESSENTIAL_FIELDS.values()))
+
+
+@dataclass(slots=True)
+class Comment:
+    """A comment, without the duplicates Bugzilla also sends like `time` and `author`"""
+
+    id: int
+    bug_id: int | None = None
+    count: int | None = None
+    creator: str | None = None
+    creation_time: str | None = None
+    text: str = ""
+    is_private: bool = False
+    attachment_id: int | None = None
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "Comment":
+        return cls(**{name: data[name] for name in COMMENT_FIELDS if name in data})
+
+
+BUG_FIELDS: list[str] = [f.name for f in fields(Bug)]
+
+# {search result key: Bugzilla field}
+ESSENTIAL_FIELDS: dict[str, str] = {f.name: f.metadata.get("source", f.name) for f in fields(SearchRow)}
+
+COMMENT_FIELDS: list[str] = [f.name for f in fields(Comment)]
@@ -0,0 +1,270 @@
+"""Pool of long-lived Bugzilla clients shared across MCP messages"""
+
+import contextlib
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator
+import httpx
+from .bugzilla import Bugzilla
+from .cache import ResponseCache
+from .metrics import Metrics
+from .resilience import CircuitBreaker, Retry, TokenBucket
+from .singleflight import SingleFlight
+
+
+def tenant_key(url: str, api_key: str) -> tuple[str, str]:
+    """Registry key for a tenant. The API key is hashed so it is never kept as a dict key"""
+    return (url, hashlib.sha256(api_key.encode()).hexdigest())
+
+
+class ClientRegistry:
+    """LRU registry of Bugzilla clients keyed by (bugzilla_url, api_key hash)
+
+    Each client keeps its own keep-alive connection pool. Clients are evicted
+    (and closed) when the registry is full or when they have been idle for
+    longer than `idle_ttl` seconds. The connection budget `max_connections`
+    is split evenly between the `max_clients` slots so the total number of
+    open upstream connections stays bounded. A client leased by a message
+    being handled (see lease) is only closed once that message is done.
+
+    Each tenant has at most `max_concurrent_requests` requests in flight (by
+    default as many as its connections), and with `rate_limit` every Bugzilla
+    instance gets at most that many requests per second from all of its
+    tenants. Requests over these limits wait instead of failing.
+
+    The circuit breaker, rate limit and metric series of an instance are
+    dropped with its last client: their number stays bounded by max_clients
+    whatever URLs the callers send.
+    """
+
+    def __init__(
+        self,
+        max_clients: int = 64,
+        idle_ttl: float = 300.0,
+        max_connections: int = 256,
+        keepalive_expiry: float = 30.0,
+        transport: httpx.AsyncBaseTransport | None = None,
+        cache: ResponseCache | None = None,
+        inflight: SingleFlight | None = None,
+        timeout: httpx.Timeout | None = None,
+        retry: Retry | None = None,
+        breaker_failure_threshold: int = 5,
+        breaker_reset_timeout: float = 30.0,
+        metrics: Metrics | None = None,
+        rate_limit: float | None = None,
+        rate_burst: int | None = None,
+        max_concurrent_requests: int | None = None,
+    ):
+        if max_clients < 1:
+            raise ValueError("max_clients must be at least 1")
+
+        self.max_clients = max_clients
+        self.idle_ttl = idle_ttl
+        self.max_connections = max_connections
+        self.limits = httpx.Limits(
+            max_connections=max(1, max_connections // max_clients),
+            max_keepalive_connections=max(1, max_connections // max_clients),
+            keepalive_expiry=keepalive_expiry,
+        )
+        # only used by tests & benchmarks to route requests to a fake Bugzilla
+        self.transport = transport
+        # response cache and in-flight call de-duplication shared by every pooled client
+        self.cache = cache
+        self.inflight = inflight or SingleFlight()
+
+        self.timeout = timeout
+        self.retry = retry or Retry()
+        self.metrics = metrics
+        # one circuit breaker per Bugzilla instance, shared by all of its tenants
+        self.breakers: dict[str, CircuitBreaker] = {}
+        self.breaker_failure_threshold = breaker_failure_threshold
+        self.breaker_reset_timeout = breaker_reset_timeout
+        # requests per second to each Bugzilla instance, shared by all of its tenants
+        self.rate_limit = rate_limit
+        self.rate_burst = rate_burst
+        self.limiters: dict[str, TokenBucket] = {}
+        # a tenant waiting for a free slot rather than for a pooled connection never hits the pool timeout
+        self.max_concurrent_requests = max_concurrent_requests or self.limits.max_connections
+
+        # key -> (client, last used monotonic time), least recently used first
+        # no await happens while the dict is mutated, so no lock is needed
+        self._clients: OrderedDict[tuple[str, str], tuple[Bugzilla, float]] = OrderedDict()
+        # number of leases of the clients in use, and those evicted while in use
+        self._leases: dict[Bugzilla, int] = {}
+        self._retired: set[Bugzilla] = set()
+        # hosts of the clients, labelling metric series
+        self._hosts: set[str] = set()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def get(self, url: str, api_key: str) -> Bugzilla:
+        """Return the pooled client for a tenant, creating it if needed
+
+        The client may be closed by a later call evicting it, use lease to
+        keep it open while it is used.
+        """
+
+        client, evicted = self._checkout(url, api_key)
+        await self._retire(evicted)
+
+        return client
+
+    @contextlib.asynccontextmanager
+    async def lease(self, url: str, api_key: str) -> AsyncIterator[Bugzilla]:
+        """The pooled client for a tenant, kept open until the block exits even if evicted meanwhile"""
+
+        client, evicted = self._checkout(url, api_key)
+        # taken before any await, another message cannot close it in between
+        self._leases[client] = self._leases.get(client, 0) + 1
+
+        try:
+            await self._retire(evicted)
+            yield client
+        finally:
+            self._leases[client] -= 1
+            if not self._leases[client]:
+                del self._leases[client]
+                if client in self._retired:
+                    self._retired.discard(client)
+                    await self._close_all([client])
+                    self._prune()
+
+    def _checkout(self, url: str, api_key: str) -> tuple[Bugzilla, list[Bugzilla]]:
+        """The client for a tenant, now the most recently used, and the clients evicted to make room"""
+
+        key = tenant_key(url, api_key)
+        now = time.monotonic()
+
+        expired = self._pop_expired(now)
+
+        entry = self._clients.pop(key, None)
+
+        if entry is not None:
+            self.hits += 1
+            client = entry[0]
+        else:
+            self.misses += 1
+            client = Bugzilla(
+                url=url,
+                api_key=api_key,
+                limits=self.limits,
+                transport=self.transport,
+                cache=self.cache,
+                inflight=self.inflight,
+                timeout=self.timeout,
+                retry=self.retry,
+                breaker=self.breaker(url),
+                metrics=self.metrics,
+                rate_limiter=self.limiter(url),
+                max_concurrent_requests=self.max_concurrent_requests,
+            )
+            self._hosts.add(client.host)
+
+            while len(self._clients) >= self.max_clients:
+                _, (evicted, _) = self._clients.popitem(last=False)
+                expired.append(evicted)
+
+        self._clients[key] = (client, now)
+        self.evictions += len(expired)
+
+        return client, expired
+
+    async def _retire(self, clients: list[Bugzilla]):
+        """Close evicted clients, or those in use once their last lease ends"""
+
+        if not clients:
+            return
+
+        idle = []
+
+        for client in clients:
+            if client in self._leases:
+                self._retired.add(client)
+            else:
+                idle.append(client)
+
+        await self._close_all(idle)
+        self._prune()
+
+    def _prune(self):
+        """Drop the breakers, limiters and metric series of the instances no client uses anymore"""
+
+        clients = [client for client, _ in self._clients.values()] + list(self._leases)
+        urls = {client.base_url for client in clients}
+        hosts = {client.host for client in clients}
+
+        for url in [url for url in self.breakers if url not in urls]:
+            del self.breakers[url]
+        for url in [url for url in self.limiters if url not in urls]:
+            del self.limiters[url]
+
+        if self.metrics is not None:
+            for host in self._hosts - hosts:
+                self.metrics.forget_host(host)
+        self._hosts = hosts
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        """Circuit breaker of a Bugzilla instance"""
+
+        if url not in self.breakers:
+            self.breakers[url] = CircuitBreaker(self.breaker_failure_threshold, self.breaker_reset_timeout)
+
+        return self.breakers[url]
+
+    def limiter(self, url: str) -> TokenBucket | None:
+        """Rate limit of a Bugzilla instance, None without rate_limit"""
+
+        if self.rate_limit is None:
+            return None
+
+        if url not in self.limiters:
+            self.limiters[url] = TokenBucket(self.rate_limit, self.rate_burst)
+
+        return self.limiters[url]
+
+    def _pop_expired(self, now: float) -> list[Bugzilla]:
+        """Remove clients idle for longer than idle_ttl"""
+
+        expired = []
+
+        # entries are ordered by last use, so stop at the first fresh one
+        while self._clients:
+            key, (client, last_used) = next(iter(self._clients.items()))
+            if now - last_used < self.idle_ttl:
+                break
+            del self._clients[key]
+            expired.append(client)
+
+        return expired
+
+    async def _close_all(self, clients: list[Bugzilla]):
+        for client in clients:
+            try:
+                await client.close()
+            except Exception:
+                # a broken client must not fail the request that evicted it
+                pass
+
+    async def close(self):
+        """Close every pooled client"""
+
+        clients = [client for client, _ in self._clients.values()] + list(self._retired)
+        self._clients.clear()
+        self._retired.clear()
+
+        await self._close_all(clients)
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def stats(self) -> dict[str, Any]:
+        """Registry counters"""
+        return {
+            "clients": len(self._clients),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
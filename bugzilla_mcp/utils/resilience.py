@@ -0,0 +1,212 @@
+"""Timeouts, retries, circuit breaking and rate limiting for upstream Bugzilla requests"""
+
+import asyncio
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any
+import httpx
+
+
+# Default upstream timeouts: fail fast on connect, give big searches time to answer
+DEFAULT_TIMEOUT = httpx.Timeout(connect=5.0, read=30.0, write=30.0, pool=10.0)
+
+# Statuses worth retrying: rate limited or the upstream (or a proxy in front of it) failing
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class Retry:
+    """Retry schedule for idempotent requests, with full jitter exponential backoff
+
+    `attempts` counts the first try, so attempts=1 disables retries.
+    """
+
+    def __init__(
+        self,
+        attempts: int = 3,
+        backoff: float = 0.25,
+        max_backoff: float = 10.0,
+        statuses: frozenset[int] = RETRY_STATUSES,
+    ):
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.statuses = statuses
+
+        self.retries = 0
+        self.exhausted = 0
+
+    def delay(self, attempt: int, retry_after: str | None = None) -> float:
+        """Seconds to wait before retrying after the given (0 based) attempt"""
+
+        if retry_after:
+            seconds = parse_retry_after(retry_after)
+            if seconds is not None:
+                return min(seconds, self.max_backoff)
+
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def stats(self) -> dict[str, Any]:
+        """Retry counters"""
+        return {"retries": self.retries, "exhausted": self.exhausted}
+
+
+def parse_retry_after(value: str) -> float | None:
+    """Seconds from a Retry-After header, given either as seconds or as an HTTP date"""
+
+    value = value.strip()
+
+    if value.isdigit():
+        return float(value)
+
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class CircuitOpenError(httpx.TransportError):
+    """Raised instead of sending a request while the upstream is considered down"""
+
+
+class CircuitBreaker:
+    """Fail fast while a Bugzilla instance keeps failing
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    requests are rejected for `reset_timeout` seconds. Then a single probe
+    request is let through: its success closes the circuit, its failure opens
+    it again. A probe which ends without an outcome (see abandon), or takes
+    longer than `reset_timeout`, lets another one through.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_started = 0.0
+
+        self.failures = 0
+        self.opened = 0
+        self.rejected = 0
+
+    def before_request(self):
+        """Raise CircuitOpenError unless a request may be sent now"""
+
+        if self.state == self.CLOSED:
+            return
+
+        now = time.monotonic()
+
+        if self.state == self.OPEN:
+            remaining = self.opened_at + self.reset_timeout - now
+        else:
+            # a probe is already in flight, unless it got lost
+            remaining = self.probe_started + self.reset_timeout - now
+
+        if remaining <= 0:
+            # let this request through as the probe
+            self.state = self.HALF_OPEN
+            self.probe_started = now
+            return
+
+        self.rejected += 1
+        raise CircuitOpenError(f"Bugzilla is unavailable, not retrying for {remaining:.0f}s")
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+
+    def abandon(self):
+        """A request let through ended without an outcome, e.g. cancelled while queued
+
+        If it was the probe, the circuit opens again and the next request
+        after reset_timeout probes: nothing is known about the upstream.
+        """
+
+        if self.state == self.HALF_OPEN:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def record_failure(self):
+        self.failures += 1
+        self.consecutive_failures += 1
+
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.opened += 1
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> dict[str, Any]:
+        """Circuit breaker counters"""
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
+
+
+class TokenBucket:
+    """Rate limit of a Bugzilla instance, shared by all of its tenants
+
+    Lets `rate` requests per second through on average, in bursts of up to
+    `burst`. Requests over the limit wait for their turn, in arrival order,
+    instead of failing.
+    """
+
+    def __init__(self, rate: float, burst: int | None = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        # may go negative: tokens reserved by the waiting requests
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+
+        self.waiting = 0
+        self.delayed = 0
+
+    async def acquire(self) -> float:
+        """Take a token, waiting until one is available. Returns the seconds waited"""
+
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+
+        if self.tokens >= 0:
+            return 0.0
+
+        # the token is reserved, later requests queue behind this one
+        delay = -self.tokens / self.rate
+        self.delayed += 1
+        self.waiting += 1
+
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.tokens += 1
+            raise
+        finally:
+            self.waiting -= 1
+
+        return delay
+
+    def stats(self) -> dict[str, Any]:
+        """Rate limit counters"""
+        return {"waiting": self.waiting, "delayed": self.delayed}
@@ -0,0 +1,325 @@
+"""Cache shared between processes, over the Redis protocol (RESP)
+
+RespBackend stores the cache entries in a server speaking RESP: the bundled
+cache_server over a Unix socket for the workers of one host, or Redis for
+several hosts.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any
+from urllib.parse import unquote, urlsplit
+from . import codec
+from .cache import CacheEntry
+
+
+logger = logging.getLogger(__name__)
+
+
+class RespError(Exception):
+    """Error reply of the server"""
+
+
+def encode_command(*args: bytes | str | int | float) -> bytes:
+    """A command as a RESP array of bulk strings"""
+
+    parts = [b"*%d\r\n" % len(args)]
+
+    for arg in args:
+        if not isinstance(arg, bytes):
+            arg = str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+
+    return b"".join(parts)
+
+
+async def read_reply(reader: asyncio.StreamReader) -> Any:
+    """Next reply from the server: bytes, int, str (status), list or None. Error replies are returned as RespError"""
+
+    line = await reader.readline()
+
+    if not line.endswith(b"\r\n"):
+        raise ConnectionError("connection closed by the cache server")
+
+    kind, rest = line[:1], line[1:-2]
+
+    if kind == b"+":
+        return rest.decode()
+    if kind == b"-":
+        return RespError(rest.decode())
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        length = int(rest)
+        if length < 0:
+            return None
+        return (await reader.readexactly(length + 2))[:-2]
+    if kind == b"*":
+        length = int(rest)
+        if length < 0:
+            return None
+        return [await read_reply(reader) for _ in range(length)]
+
+    raise ConnectionError(f"unexpected reply from the cache server: {line[:40]!r}")
+
+
+class RespClient:
+    """Pipelined connection to a RESP server
+
+    Commands of concurrent tasks are written as they come on a single
+    connection and their replies, which come back in the same order, are
+    dispatched by a reader task. The connection is opened on first use and
+    again after a failure.
+    """
+
+    def __init__(self, url: str, timeout: float = 2.0):
+        parts = urlsplit(url)
+
+        if parts.scheme == "unix":
+            self.path: str | None = unquote(parts.path)
+            self.host, self.port, database = None, None, None
+        elif parts.scheme in ("redis", "rediss"):
+            self.path = None
+            self.host, self.port = parts.hostname or "localhost", parts.port or 6379
+            database = parts.path.strip("/") or None
+        else:
+            raise ValueError(
+                f"unsupported cache URL {url!r}, expected unix:///path or redis[s]://[[user]:password@]host[:port][/db]"
+            )
+
+        # never logged with the password
+        self.url = url if parts.password is None else url.replace(f":{parts.password}@", ":***@")
+        self.timeout = timeout
+        self.ssl = parts.scheme == "rediss"
+
+        # commands run on every new connection
+        self._handshake: list[tuple[str, ...]] = []
+        if parts.password is not None:
+            credentials = (unquote(parts.username), unquote(parts.password)) if parts.username else (unquote(parts.password),)
+            self._handshake.append(("AUTH", *credentials))
+        if database is not None:
+            self._handshake.append(("SELECT", database))
+
+        self._connection: _Connection | None = None
+        self._connecting: asyncio.Lock | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    async def _connect(self) -> "_Connection":
+        if self.path is not None:
+            reader, writer = await asyncio.open_unix_connection(self.path)
+        else:
+            reader, writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl or None)
+
+        connection = _Connection(reader, writer)
+
+        for command in self._handshake:
+            reply = await connection.send(encode_command(*command))
+            if isinstance(reply, RespError):
+                connection.close(reply)
+                raise reply
+
+        return connection
+
+    async def execute(self, *args: bytes | str | int | float) -> Any:
+        """Send one command and return its reply. Raises RespError on error replies, OSError when unreachable"""
+
+        loop = asyncio.get_running_loop()
+
+        if self._loop is not loop:
+            # connections belong to the loop that opened them
+            self._connection, self._loop = None, loop
+            self._connecting = asyncio.Lock()
+
+        connection = self._connection
+
+        if connection is None or connection.closed:
+            async with self._connecting:
+                if self._connection is None or self._connection.closed:
+                    self._connection = await asyncio.wait_for(self._connect(), self.timeout)
+                connection = self._connection
+
+        future = connection.send(encode_command(*args))
+
+        try:
+            reply = await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            # later replies can no longer be matched with their commands
+            future.cancel()
+            connection.close(ConnectionError("cache server timed out"))
+            raise
+
+        if isinstance(reply, RespError):
+            raise reply
+
+        return reply
+
+    async def close(self):
+        if self._connection is not None:
+            self._connection.close(ConnectionError("connection closed"))
+            self._connection = None
+
+
+class _Connection:
+    """An open connection and the commands waiting for their reply, in order"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.pending: deque[asyncio.Future] = deque()
+        self.closed = False
+        self.reader_task = asyncio.create_task(self._read_replies(reader))
+
+    def send(self, command: bytes) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append(future)
+        self.writer.write(command)
+        return future
+
+    async def _read_replies(self, reader: asyncio.StreamReader):
+        try:
+            while True:
+                reply = await read_reply(reader)
+                future = self.pending.popleft()
+                if not future.done():
+                    future.set_result(reply)
+        except (OSError, EOFError, asyncio.IncompleteReadError, IndexError, ValueError) as e:
+            self.close(ConnectionError(f"cache server connection lost: {e}"))
+
+    def close(self, error: Exception):
+        """Close the connection, failing the commands waiting for a reply"""
+
+        if self.closed:
+            return
+
+        self.closed = True
+        self.writer.close()
+        if self.reader_task is not asyncio.current_task():
+            self.reader_task.cancel()
+
+        while self.pending:
+            future = self.pending.popleft()
+            if not future.done():
+                future.set_exception(error)
+
+
+class RespBackend:
+    """Cache entries stored in a RESP server, shared by every process using it
+
+    Entries are stored in the codec format and expire in the server `keep`
+    seconds after being stored. Tags are server-side sets of keys. Every key
+    starts with `prefix`, so that several deployments can share a server.
+
+    The cache is an optimisation: when the server is unreachable, lookups miss
+    and stores are dropped, with a warning at most every 30s. Records are not:
+    their methods raise instead. They are set with SET NX, which the bundled
+    cache server never evicts; configure Redis with a volatile-* or noeviction
+    maxmemory-policy to keep them too.
+    """
+
+    local = False
+
+    def __init__(self, url: str, prefix: str = "bugzilla-mcp:", timeout: float = 2.0):
+        self.client = RespClient(url, timeout)
+        self.prefix = prefix
+        self.errors = 0
+        self._warned = 0.0
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.prefix}tag:{tag}"
+
+    def _record_key(self, key: str) -> str:
+        return f"{self.prefix}record:{key}"
+
+    async def _execute(self, *args) -> Any:
+        try:
+            return await self.client.execute(*args)
+        except (OSError, RespError, asyncio.TimeoutError) as e:
+            self.errors += 1
+            if time.monotonic() - self._warned > 30:
+                self._warned = time.monotonic()
+                logger.warning("Shared cache %s unavailable: %s", self.client.url, e)
+            return None
+
+    async def get(self, key: str) -> CacheEntry | None:
+        data = await self._execute("GET", self.prefix + key)
+
+        if data is None:
+            return None
+
+        try:
+            return codec.decode(data)
+        except ValueError:
+            # written by another version of the server
+            return None
+
+    async def set(self, key: str, entry: CacheEntry, keep: float):
+        try:
+            data = codec.encode(entry)
+        except ValueError:
+            logger.debug("Not caching %s, its value cannot be encoded", key)
+            return
+
+        keep_ms = max(1, int(keep * 1000))
+        key = self.prefix + key
+
+        # pipelined on the connection. A tag lives as long as the longest kept of its
+        # entries: the expiry of a new tag is set (NX), that of an existing one only extended (GT)
+        await asyncio.gather(
+            self._execute("SET", key, data, "PX", keep_ms),
+            *(self._execute("SADD", self._tag_key(tag), key) for tag in entry.tags),
+            *(self._execute("PEXPIRE", self._tag_key(tag), keep_ms, "NX") for tag in entry.tags),
+            *(self._execute("PEXPIRE", self._tag_key(tag), keep_ms, "GT") for tag in entry.tags),
+        )
+
+    async def refresh(self, key: str, expires: float, keep: float):
+        entry = await self.get(key)
+
+        if entry is not None:
+            entry.expires = expires
+            await self.set(key, entry, keep)
+
+    async def invalidate(self, tag: str):
+        keys = await self._execute("SMEMBERS", self._tag_key(tag))
+
+        await self._execute("DEL", self._tag_key(tag), *(keys or ()))
+
+    async def add_record(self, key: str, value: bytes, keep: float) -> bool:
+        reply = await self.client.execute("SET", self._record_key(key), value, "NX", "PX", max(1, int(keep * 1000)))
+        return reply is not None
+
+    async def set_record(self, key: str, value: bytes, keep: float):
+        # replacing a value set with NX, which stays a record in the bundled cache server
+        await self.client.execute("SET", self._record_key(key), value, "PX", max(1, int(keep * 1000)))
+
+    async def get_record(self, key: str) -> bytes | None:
+        return await self.client.execute("GET", self._record_key(key))
+
+    async def delete_record(self, key: str):
+        await self.client.execute("DEL", self._record_key(key))
+
+    async def clear(self):
+        """Drop every entry of the prefix, leaving the records and the keys of other deployments"""
+
+        cursor = b"0"
+
+        while True:
+            reply = await self._execute("SCAN", cursor, "MATCH", f"{_escape(self.prefix)}*", "COUNT", 1000)
+            if reply is None:
+                return
+
+            cursor, keys = reply
+            records = self._record_key("").encode()
+            keys = [key for key in keys if not key.startswith(records)]
+            if keys:
+                await self._execute("DEL", *keys)
+            if cursor == b"0":
+                return
+
+    async def close(self):
+        await self.client.close()
+
+
+def _escape(pattern: str) -> str:
+    """pattern matching itself literally in MATCH"""
+    return "".join(f"\\{c}" if c in "*?[]\\" else c for c in pattern)
@@ -0,0 +1,68 @@
+"""De-duplication of identical in-flight upstream calls"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call:
+    """A shared call and the number of callers waiting for it"""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Share one in-flight call between concurrent callers using the same key
+
+    The first caller starts the call in its own task; callers arriving while
+    it is in flight wait for it and receive the same result (or exception).
+    A cancelled caller, the first one included, leaves the call running for
+    the others; the call is only cancelled once no caller waits for it.
+    Nothing is kept once the call is over, caching is left to ResponseCache.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, _Call] = {}
+
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run fn(), unless an identical call is already in flight"""
+
+        call = self._calls.get(key)
+
+        if call is None:
+            self.calls += 1
+            call = self._calls[key] = _Call(asyncio.ensure_future(fn()))
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+
+        try:
+            # shield: a cancelled caller must not cancel the shared call
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if not call.waiters and not call.task.done():
+                call.task.cancel()
+
+    def _forget(self, key: Hashable, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def stats(self) -> dict[str, Any]:
+        """Single-flight counters"""
+        return {
+            "in_flight": len(self._calls),
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,57 @@
+"""Helpers to turn Bugzilla HTML pages into compact text"""
+
+import re
+from html.parser import HTMLParser
+
+
+# elements whose content is never useful to the LLM
+SKIPPED_TAGS = {"script", "style", "head", "nav", "header", "footer", "form", "noscript", "svg"}
+# elements which end a line of text
+BLOCK_TAGS = {
+    "p", "div", "br", "li", "tr", "table", "section", "article",
+    "h1", "h2", "h3", "h4", "h5", "h6", "dt", "dd", "pre", "ul", "ol", "dl",
+}
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: list[str] = []
+        self.skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self.skipping += 1
+        elif tag == "li":
+            self.parts.append("\n- ")
+        elif tag in BLOCK_TAGS:
+            self.parts.append("\n")
+        elif tag in ("td", "th"):
+            self.parts.append(" | ")
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS:
+            self.skipping = max(0, self.skipping - 1)
+        elif tag in BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self.skipping:
+            self.parts.append(data)
+
+
+def html_to_text(html: str) -> str:
+    """Strip markup, scripts and page chrome, keeping one line per block of text"""
+
+    parser = _TextExtractor()
+    parser.feed(html)
+    parser.close()
+
+    lines = []
+
+    for line in "".join(parser.parts).splitlines():
+        line = re.sub(r"\s+", " ", line).strip(" |")
+        if line:
+            lines.append(line)
+
+    return "\n".join(lines)
@@ -0,0 +1,125 @@
+"""Optional OpenTelemetry tracing of MCP messages, tools and Bugzilla requests
+
+Tracing is off unless configure() is called with an exporter and the
+opentelemetry-api and opentelemetry-sdk packages are installed. While it is
+off, `tracer` is None and instrumented code skips every tracing call.
+"""
+
+import functools
+import time
+from typing import Any, Awaitable, Callable, TypeVar
+
+try:
+    from opentelemetry import trace
+except ImportError:  # tracing is an optional feature
+    trace = None
+
+T = TypeVar("T")
+
+# the tracer used by the instrumented code, None while tracing is disabled
+tracer: Any = None
+# provider created by configure(), flushed by disable()
+_provider: Any = None
+
+
+def enabled() -> bool:
+    return tracer is not None
+
+
+def configure(exporter: str | None) -> bool:
+    """Enable tracing, exporting spans as configured by `exporter`
+
+    - "console": print spans as JSON on stdout
+    - "file:PATH": append spans as JSON to PATH
+    - "otlp": send spans to an OTLP collector (needs opentelemetry-exporter-otlp,
+      configured by the standard OTEL_EXPORTER_OTLP_* variables)
+    - "global": use the tracer provider already set up by the application
+
+    Returns whether tracing is enabled. Empty or None leaves it disabled.
+    """
+
+    global tracer, _provider
+
+    if not exporter:
+        return False
+
+    if trace is None:
+        raise RuntimeError("Tracing needs the opentelemetry-api and opentelemetry-sdk packages")
+
+    if exporter == "global":
+        tracer = trace.get_tracer("bugzilla_mcp")
+        return True
+
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+    if exporter == "console":
+        span_exporter = ConsoleSpanExporter()
+    elif exporter.startswith("file:"):
+        span_exporter = ConsoleSpanExporter(out=open(exporter.removeprefix("file:"), "a"))
+    elif exporter == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        span_exporter = OTLPSpanExporter()
+    else:
+        raise ValueError(f"Unknown tracing exporter: {exporter}")
+
+    _provider = TracerProvider(resource=Resource.create({"service.name": "bugzilla-mcp"}))
+    _provider.add_span_processor(BatchSpanProcessor(span_exporter))
+    tracer = _provider.get_tracer("bugzilla_mcp")
+
+    return True
+
+
+def disable():
+    """Stop tracing, exporting the spans still buffered"""
+
+    global tracer, _provider
+
+    if _provider is not None:
+        _provider.shutdown()
+
+    tracer = _provider = None
+
+
+def traced(fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+    """Run an async tool function in a span named after it, when tracing is enabled"""
+
+    name = f"tool {fn.__name__}"
+
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        if tracer is None:
+            return await fn(*args, **kwargs)
+
+        with tracer.start_as_current_span(name):
+            return await fn(*args, **kwargs)
+
+    return wrapper
+
+
+class HttpPhases:
+    """httpx `trace` extension turning the connection phases of a request into child spans
+
+    httpcore reports events such as connection.connect_tcp.started / .complete
+    or http11.receive_response_headers.started / .complete; each pair becomes
+    a span (connect_tcp, receive_response_headers...) under the request span.
+    """
+
+    def __init__(self):
+        self.started: dict[str, int] = {}
+
+    async def __call__(self, event: str, info: dict[str, Any]):
+        phase, _, stage = event.rpartition(".")
+
+        if stage == "started":
+            self.started[phase] = time.time_ns()
+            return
+
+        start = self.started.pop(phase, None)
+
+        if start is not None and stage in ("complete", "failed"):
+            span = tracer.start_span(phase.rpartition(".")[2], start_time=start)
+            if stage == "failed":
+                span.set_attribute("error.type", type(info.get("exception")).__name__)
+            span.end(end_time=time.time_ns())
@@ -0,0 +1,200 @@
+"""Running the HTTP server as several worker processes
+
+One process serves every request on a single event loop, so decoding large
+responses keeps it to one core. With workers, uvicorn forks that many
+processes accepting on the same port, and a cache server started alongside
+them lets every worker answer from the responses fetched by the others.
+
+Workers keep no MCP session state (see server.http_app): any worker can
+answer any request, so no sticky routing is needed. Upstream limits are
+kept by each worker in memory, so each one enforces its share of them.
+Metrics are saved by each worker to a directory shared with the others, and
+added up by the worker answering a scrape.
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager, nullcontext
+from typing import AsyncIterator, Iterator
+import uvicorn
+from .utils.metrics import Metrics
+
+
+logger = logging.getLogger(__name__)
+
+# seconds between two saves of the metrics of a worker
+METRICS_INTERVAL = 1.0
+
+
+def available_cores() -> int:
+    """Cores this process may run on, which can be fewer than the machine's under a CPU affinity or cgroup"""
+
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def worker_count(value: str | None) -> int:
+    """Number of workers for BUGZILLA_MCP_WORKERS: a number, or `auto` (the default) for one per available core"""
+
+    if not value or value == "auto":
+        return available_cores()
+
+    workers = int(value)
+
+    if workers < 1:
+        raise ValueError(f"BUGZILLA_MCP_WORKERS must be at least 1 or auto, got {value!r}")
+
+    return workers
+
+
+def worker_share(limit: float, workers: int) -> float:
+    """Share of a limit on the whole server that each of `workers` workers enforces"""
+
+    return limit / workers
+
+
+def worker_slots(limit: int, workers: int) -> int:
+    """Share of a count on the whole server for each of `workers` workers, at least one"""
+
+    return max(1, limit // workers)
+
+
+def save_metrics(directory: str, metrics: Metrics):
+    """Write the metrics of this worker to directory, replacing those saved before"""
+
+    path = os.path.join(directory, f"{os.getpid()}.json")
+
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(metrics.snapshot(), f)
+
+    # readers never see a partly written file
+    os.replace(f"{path}.tmp", path)
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+
+    return True
+
+
+def render_metrics(directory: str, metrics: Metrics) -> str:
+    """The metrics of this worker added to those saved by the others
+
+    Counters of workers which exited are kept, so that totals never go down
+    when uvicorn replaces a worker, but not their gauges.
+    """
+
+    snapshots = []
+
+    for name in os.listdir(directory):
+        pid, extension = os.path.splitext(name)
+
+        if extension != ".json" or pid == str(os.getpid()):
+            continue
+
+        try:
+            with open(os.path.join(directory, name)) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            continue
+
+        if not _alive(int(pid)):
+            snapshot = {metric: s for metric, s in snapshot.items() if s["kind"] != "gauge"}
+
+        snapshots.append(snapshot)
+
+    return metrics.render(snapshots)
+
+
+@contextlib.asynccontextmanager
+async def publish_metrics(directory: str, metrics: Metrics, interval: float = METRICS_INTERVAL) -> AsyncIterator[None]:
+    """Save the metrics of this worker every interval seconds, and once more when leaving"""
+
+    async def publish():
+        while True:
+            save_metrics(directory, metrics)
+            await asyncio.sleep(interval)
+
+    task = asyncio.create_task(publish())
+
+    try:
+        yield
+    finally:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+        save_metrics(directory, metrics)
+
+
+@contextmanager
+def cache_server(max_bytes: int, timeout: float = 10.0) -> Iterator[str]:
+    """Run a cache server process on a private Unix socket, yielding its URL"""
+
+    directory = tempfile.mkdtemp(prefix="bugzilla-mcp-")
+    path = os.path.join(directory, "cache.sock")
+
+    process = subprocess.Popen(
+        [sys.executable, "-m", "bugzilla_mcp.utils.cache_server", path, "--max-bytes", str(max_bytes)]
+    )
+
+    try:
+        deadline = time.monotonic() + timeout
+        while not os.path.exists(path):
+            if process.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError("the cache server did not start")
+            time.sleep(0.05)
+
+        yield f"unix://{path}"
+    finally:
+        process.terminate()
+        process.wait()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def run_workers(
+    app: str,
+    workers: int,
+    host: str,
+    port: int,
+    log_level: str = "info",
+    cache_max_bytes: int = 256 * 1024 * 1024,
+):
+    """Serve the ASGI app factory `app` ("module:function") from several processes
+
+    Unless BUGZILLA_MCP_CACHE_URL already points at a shared cache, a cache
+    server is started for the lifetime of the workers. The workers learn how
+    many they are from BUGZILLA_MCP_WORKER_COUNT, to split the upstream limits,
+    and where to save their metrics from BUGZILLA_MCP_METRICS_DIR.
+    """
+
+    shared = nullcontext() if os.getenv("BUGZILLA_MCP_CACHE_URL") else cache_server(cache_max_bytes)
+    metrics_directory = tempfile.mkdtemp(prefix="bugzilla-mcp-metrics-")
+
+    try:
+        with shared as url:
+            # inherited by the workers
+            if url:
+                os.environ["BUGZILLA_MCP_CACHE_URL"] = url
+            os.environ["BUGZILLA_MCP_WORKER_COUNT"] = str(workers)
+            os.environ["BUGZILLA_MCP_METRICS_DIR"] = metrics_directory
+
+            logger.info("Starting %d workers on %s:%d", workers, host, port)
+            uvicorn.run(app, factory=True, workers=workers, host=host, port=port, log_level=log_level.lower())
+    finally:
+        shutil.rmtree(metrics_directory, ignore_errors=True)
+
@@ -1,11 +1,29 @@
+import os
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
+import fastmcp
+import httpx
 from fastmcp import FastMCP
-from bugzilla_mcp.middleware import ValidateHeaders
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+import bugzilla_mcp.utils as utils
+from bugzilla_mcp import workers
+from bugzilla_mcp.utils import jsonlib, tracing
+from bugzilla_mcp.utils.cache import backend_from_url
+from bugzilla_mcp.utils.resilience import DEFAULT_TIMEOUT, Retry
+from bugzilla_mcp.middleware import RecordMetrics, TraceMessages, ValidateHeaders
+from bugzilla_mcp.mirror import MirrorStore
+from bugzilla_mcp.tools import mirror
 from bugzilla_mcp.tools.bugzilla import (
     bug_info,
+    bugs_info,
     bug_comments,
+    bugs_comments,
+    bug_dossier,
     add_comment,
+    add_comments_bulk,
     bugs_quicksearch,
+    changed_bugs_since,
     learn_quicksearch_syntax,
     server_url,
     bug_url,
@@ -14,20 +32,126 @@ from bugzilla_mcp.tools.bugzilla import (
 # Load environment variables from .env file
 load_dotenv()
 
-mcp = FastMCP("Bugzilla")
+mcp = FastMCP("Bugzilla", tool_serializer=jsonlib.dumps)
 
 mcp.add_middleware(ValidateHeaders())
+mcp.add_middleware(RecordMetrics())
+
+# Optional OpenTelemetry spans: BUGZILLA_MCP_TRACING=console, file:PATH, otlp or global
+if tracing.configure(os.getenv("BUGZILLA_MCP_TRACING")):
+    mcp.add_middleware(TraceMessages())
+
+# Upstream limits: requests per second to each Bugzilla instance (unlimited by default)
+# and requests in flight per tenant, for the whole server: each worker started by
+# run_workers enforces its share. By default a tenant may use its share of the
+# connection pool of each worker, which is already per worker and is not divided
+worker_total = int(os.getenv("BUGZILLA_MCP_WORKER_COUNT", 1))
+if os.getenv("BUGZILLA_MCP_RATE_LIMIT"):
+    rate_limit = float(os.environ["BUGZILLA_MCP_RATE_LIMIT"])
+    rate_burst = int(os.getenv("BUGZILLA_MCP_RATE_BURST", 0)) or max(1, int(rate_limit))
+    utils.registry.rate_limit = workers.worker_share(rate_limit, worker_total)
+    utils.registry.rate_burst = workers.worker_slots(rate_burst, worker_total)
+if os.getenv("BUGZILLA_MCP_MAX_CONCURRENT_REQUESTS"):
+    utils.registry.max_concurrent_requests = workers.worker_slots(
+        int(os.environ["BUGZILLA_MCP_MAX_CONCURRENT_REQUESTS"]), worker_total
+    )
+
+# Upstream failures: seconds to wait for Bugzilla to send or answer, retries of failed reads,
+# and consecutive failures after which requests to an instance are refused for a while
+if os.getenv("BUGZILLA_TIMEOUT"):
+    timeout = float(os.environ["BUGZILLA_TIMEOUT"])
+    utils.registry.timeout = httpx.Timeout(
+        connect=DEFAULT_TIMEOUT.connect, read=timeout, write=timeout, pool=DEFAULT_TIMEOUT.pool
+    )
+if os.getenv("BUGZILLA_RETRIES"):
+    utils.registry.retry = Retry(attempts=int(os.environ["BUGZILLA_RETRIES"]) + 1)
+if os.getenv("BUGZILLA_BREAKER_THRESHOLD"):
+    utils.registry.breaker_failure_threshold = int(os.environ["BUGZILLA_BREAKER_THRESHOLD"])
+if os.getenv("BUGZILLA_BREAKER_RESET"):
+    utils.registry.breaker_reset_timeout = float(os.environ["BUGZILLA_BREAKER_RESET"])
+
+# Where cached responses are kept: memory://, sqlite:///path/to/cache.db, unix:///path/to.sock
+# or redis://host:port (see backend_from_url), set for its workers by run_workers when unset
+if os.getenv("BUGZILLA_MCP_CACHE_URL"):
+    utils.cache.backend = backend_from_url(
+        os.environ["BUGZILLA_MCP_CACHE_URL"],
+        max_bytes=int(os.getenv("BUGZILLA_MCP_CACHE_MAX_BYTES", utils.cache.max_bytes)),
+        prefix=os.getenv("BUGZILLA_MCP_CACHE_PREFIX", "bugzilla-mcp:"),
+    )
 
 # Register tools from bugzilla_mcp module
 mcp.tool()(bug_info)
+mcp.tool()(bugs_info)
 mcp.tool()(bug_comments)
+mcp.tool()(bugs_comments)
+mcp.tool()(bug_dossier)
 mcp.tool()(add_comment)
+mcp.tool()(add_comments_bulk)
 mcp.tool()(bugs_quicksearch)
+mcp.tool()(changed_bugs_since)
 mcp.tool()(learn_quicksearch_syntax)
 mcp.tool()(server_url)
 mcp.tool()(bug_url)
 
+# Tools answering from the local mirror, kept up to date by `python -m bugzilla_mcp.mirror`
+if os.getenv("BUGZILLA_MIRROR_DB"):
+    mirror.store = MirrorStore(os.environ["BUGZILLA_MIRROR_DB"])
+    mirror.max_age = float(os.getenv("BUGZILLA_MIRROR_MAX_AGE", mirror.max_age))
+
+    mcp.tool()(mirror.mirror_search)
+    mcp.tool()(mirror.mirror_quicksearch)
+    mcp.tool()(mirror.mirror_bug_info)
+    mcp.tool()(mirror.mirror_bug_comments)
+
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics(request: Request) -> PlainTextResponse:
+    """Prometheus metrics of the server, of every worker when started by run_workers"""
+
+    if os.getenv("BUGZILLA_MCP_METRICS_DIR"):
+        text = workers.render_metrics(os.environ["BUGZILLA_MCP_METRICS_DIR"], utils.metrics)
+    else:
+        text = utils.metrics.render()
+
+    return PlainTextResponse(text, media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def http_app():
+    """ASGI app of a worker process
+
+    Stateless: MCP sessions would live in the memory of the worker that
+    opened them, while the next request may reach another one. Its metrics
+    are saved for the worker answering /metrics while it runs.
+    """
+    app = mcp.http_app(stateless_http=True)
+
+    if os.getenv("BUGZILLA_MCP_METRICS_DIR"):
+        lifespan = app.router.lifespan_context
+
+        @asynccontextmanager
+        async def publishing_metrics(app):
+            async with lifespan(app) as state:
+                async with workers.publish_metrics(os.environ["BUGZILLA_MCP_METRICS_DIR"], utils.metrics):
+                    yield state
+
+        app.router.lifespan_context = publishing_metrics
+
+    return app
+
 
 # start the MCP server (only when run directly, not during import/inspection)
+# as one process per available core, or BUGZILLA_MCP_WORKERS processes
 if __name__ == "__main__":
-    mcp.run(transport="http")
+    worker_count = workers.worker_count(os.getenv("BUGZILLA_MCP_WORKERS"))
+
+    if worker_count == 1:
+        mcp.run(transport="http")
+    else:
+        workers.run_workers(
+            "server:http_app",
+            worker_count,
+            host=fastmcp.settings.host,
+            port=fastmcp.settings.port,
+            log_level=fastmcp.settings.log_level,
+            cache_max_bytes=int(os.getenv("BUGZILLA_MCP_CACHE_MAX_BYTES", 256 * 1024 * 1024)),
+        )
@@ -3,7 +3,8 @@
 import pytest
 from unittest.mock import AsyncMock, MagicMock
 import bugzilla_mcp.utils as utils
-from bugzilla_mcp.utils import Bugzilla
+from bugzilla_mcp.utils import Bugzilla, ClientRegistry
+from bugzilla_mcp.utils.models import Comment
 
 
 # Sample bug data
@@ -104,12 +105,26 @@ def mock_bugzilla_client():
     client.base_url = "https://bugzilla.mozilla.org"
     client.api_url = "https://bugzilla.mozilla.org/rest"
     client.api_key = "test-api-key"
+    client.tenant = "https://bugzilla.mozilla.org#test-tenant"
     client.params = {"api_key": "test-api-key"}
     
     # Setup async mock methods
     client.bug_info = AsyncMock(return_value=SAMPLE_BUG)
-    client.bug_comments = AsyncMock(return_value=SAMPLE_COMMENTS)
+    client.bugs_info = AsyncMock(return_value={12345: SAMPLE_BUG})
+    client.comments = AsyncMock(return_value=[Comment.from_dict(c) for c in SAMPLE_COMMENTS])
+    client.bugs_comments = AsyncMock(return_value={12345: [Comment.from_dict(c) for c in SAMPLE_COMMENTS]})
+    client.bug_dossier = AsyncMock(side_effect=lambda *args: {
+        "bug": dict(SAMPLE_BUG),
+        "comments": [Comment.from_dict(c) for c in SAMPLE_COMMENTS],
+        "history": [{"when": f"2023-01-0{i}T00:00:00Z", "who": "dev@example.com", "changes": []} for i in range(1, 10)],
+        "attachments": [{"id": 1, "file_name": "log.txt", "is_private": False}, {"id": 2, "file_name": "core", "is_private": True}],
+    })
+    client.bugs_quicksearch = AsyncMock(return_value=SAMPLE_SEARCH_RESULTS["bugs"])
+    client.changed_bugs_since = AsyncMock(return_value={"since": "", "watermark": "", "after_id": None, "truncated": False, "bugs": []})
     client.add_comment = AsyncMock(return_value=SAMPLE_ADD_COMMENT_RESPONSE)
+    client.add_comments = AsyncMock(side_effect=lambda items, dedupe_key=None: [
+        {"bug_id": bug_id, **SAMPLE_ADD_COMMENT_RESPONSE} for bug_id, _, _ in items
+    ])
     client.close = AsyncMock()
     
     # Mock the httpx client
@@ -123,17 +138,25 @@ def mock_bugzilla_client():
 
 @pytest.fixture
 def set_bugzilla_client(mock_bugzilla_client):
-    """Set the global bugzilla client"""
-    original_bz = utils.bz
-    utils.bz = mock_bugzilla_client
+    """Bind the mock client as the current bugzilla client"""
+    token = utils.current_bz.set(mock_bugzilla_client)
     yield mock_bugzilla_client
-    utils.bz = original_bz
+    utils.current_bz.reset(token)
 
 
 @pytest.fixture
 def reset_bugzilla_client():
-    """Reset the global bugzilla client to None"""
-    original_bz = utils.bz
-    utils.bz = None
+    """Reset the current bugzilla client to None"""
+    token = utils.current_bz.set(None)
     yield
-    utils.bz = original_bz
+    utils.current_bz.reset(token)
+
+
+@pytest.fixture
+async def fresh_registry():
+    """Replace the global client registry with an empty one"""
+    original_registry = utils.registry
+    utils.registry = ClientRegistry()
+    yield utils.registry
+    await utils.registry.close()
+    utils.registry = original_registry
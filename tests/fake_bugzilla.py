@@ -0,0 +1,372 @@
+"""In-process fake Bugzilla REST API used by integration style tests"""
+
+import asyncio
+import random
+import re
+from typing import Any
+import httpx
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import HTMLResponse, JSONResponse
+from starlette.routing import Route
+
+
+# what the fake knows of Bugzilla's quicksearch, written independently of
+# bugzilla_mcp.mirror.quicksearch so that the two can be compared
+STATUS_WORDS = {
+    "UNCONFIRMED", "NEW", "ASSIGNED", "REOPENED", "IN_PROGRESS", "CONFIRMED", "RESOLVED", "VERIFIED", "CLOSED",
+    "FIXED", "INVALID", "WONTFIX", "DUPLICATE", "WORKSFORME", "INCOMPLETE", "MOVED", "INACTIVE", "EXPIRED",
+}
+QUICKSEARCH_FIELDS = {
+    "product": ["product"], "prod": ["product"],
+    "component": ["component"], "comp": ["component"],
+    "assignee": ["assigned_to"], "assigned_to": ["assigned_to"], "owner": ["assigned_to"],
+    "keywords": ["keywords"], "kw": ["keywords"],
+    "summary": ["summary"], "short_desc": ["summary"],
+}
+
+
+def quicksearch_matches(query: str, bug: dict[str, Any]) -> bool:
+    """Reference quicksearch: statuses word, field:values, :product, @assignee, -negation, words
+
+    Words are searched like Bugzilla without full-text search: in the summary,
+    whiteboard and alias, the product and component when longer than two
+    characters, and equal to a keyword.
+    """
+
+    words = re.findall(r'[^\s"]*"[^"]*"[^\s"]*|\S+', query)
+
+    if all(re.fullmatch(r"[\d,]+", w) for w in words):
+        return str(bug["id"]) in ",".join(words).split(",")
+
+    if words[0] == "ALL":
+        words = words[1:]
+    elif words[0] == "OPEN" or not set(words[0].split(",")) <= STATUS_WORDS:
+        if words[0] == "OPEN":
+            words = words[1:]
+        if bug["resolution"]:
+            return False
+    else:
+        wanted = words[0].split(",")
+        words = words[1:]
+        if bug["status"] not in wanted and bug["resolution"] not in wanted:
+            return False
+
+    for word in words:
+        negate = False
+        if word.startswith("-") and len(word) > 1:
+            negate, word = True, word[1:]
+
+        if word.startswith(":"):
+            fields, values = ["product", "component"], word[1:]
+        elif word.startswith("@"):
+            fields, values = ["assigned_to"], word[1:]
+        elif ":" in word and not word.startswith('"'):
+            name, values = word.split(":", 1)
+            fields = QUICKSEARCH_FIELDS[name.lower()]
+        else:
+            # Bugzilla's default fields, keywords compared whole below
+            needle = word.replace('"', "").lower()
+            fields, values = ["summary", "whiteboard", "alias"], word
+            if len(needle) > 2:
+                fields += ["product", "component"]
+            if needle in (k.lower() for k in bug.get("keywords", [])):
+                if negate:
+                    return False
+                continue
+
+        haystack = []
+        for field in fields:
+            value = bug.get(field)
+            haystack += value if isinstance(value, list) else [value or ""]
+
+        found = False
+        for needle in values.replace('"', "").lower().split(","):
+            for text in haystack:
+                if needle and needle in text.lower():
+                    found = True
+
+        if found == negate:
+            return False
+
+    return True
+
+
+# words drawn into the summaries of generated bugs
+WORDS = ["crash", "startup", "slow", "scrolling", "memory", "leak", "tab", "video", "font", "network"]
+
+
+def make_bug(bug_id: int, **fields: Any) -> dict[str, Any]:
+    """A bug with every field the tools read"""
+    bug = {
+        "id": bug_id,
+        "product": "Firefox",
+        "component": "General",
+        "summary": f"Bug {bug_id}",
+        "status": "NEW",
+        "resolution": "",
+        "assigned_to": "developer@example.com",
+        "creator": "reporter@example.com",
+        "creation_time": "2023-01-15T10:30:00Z",
+        "last_change_time": "2023-01-20T15:45:00Z",
+        "keywords": [],
+        "priority": "P2",
+        "severity": "normal",
+    }
+    bug.update(fields)
+    return bug
+
+
+def generate_bugs(
+    count: int, comments_per_bug: int = 0, bug_bytes: int = 0, comment_bytes: int = 0, seed: int = 0
+) -> tuple[list[dict[str, Any]], dict[int, list[dict[str, Any]]]]:
+    """Bugs 1 to count and their comments, drawn from a seeded random generator
+
+    Every bug carries bug_bytes of filler in its whiteboard and every comment
+    comment_bytes of text, to give responses the size of real ones.
+    """
+
+    rng = random.Random(seed)
+    bugs, comments = [], {}
+
+    for bug_id in range(1, count + 1):
+        resolution = rng.choice(["", "", "", "FIXED", "WONTFIX"])
+        bugs.append(make_bug(
+            bug_id,
+            summary=" ".join(rng.sample(WORDS, 3)).capitalize(),
+            product=rng.choice(["Firefox", "Core", "Thunderbird"]),
+            component=rng.choice(["General", "Graphics", "Networking"]),
+            status="RESOLVED" if resolution else rng.choice(["NEW", "ASSIGNED"]),
+            resolution=resolution,
+            assigned_to=f"dev{rng.randint(1, 50)}@example.com",
+            creator=f"user{rng.randint(1, 500)}@example.com",
+            last_change_time=f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T00:00:00Z",
+            keywords=rng.sample(["crash", "perf", "regression"], rng.randint(0, 2)),
+            whiteboard="x" * bug_bytes,
+        ))
+        comments[bug_id] = [
+            {
+                "id": bug_id * 1000 + count,
+                "bug_id": bug_id,
+                "count": count,
+                "creator": f"user{count}@example.com",
+                "creation_time": f"2024-01-01T00:{count % 60:02d}:00Z",
+                "text": "y" * comment_bytes,
+                "is_private": count % 7 == 6,
+                "attachment_id": None,
+            }
+            for count in range(comments_per_bug)
+        ]
+
+    return bugs, comments
+
+
+class FakeBugzilla:
+    """Serve a small set of bugs over the Bugzilla REST routes used by the client
+
+    Every bug returned carries a `served_for` field holding the host and API key
+    of the request, which lets tests detect responses crossing tenants.
+
+    Each response is delayed between min_latency and max_latency seconds, and
+    error_rate of them are answered with a 503, as drawn from seed.
+    """
+
+    def __init__(
+        self,
+        bugs: list[dict[str, Any]] | None = None,
+        comments: dict[int, list[dict[str, Any]]] | None = None,
+        history: dict[int, list[dict[str, Any]]] | None = None,
+        attachments: dict[int, list[dict[str, Any]]] | None = None,
+        min_latency: float = 0.0,
+        max_latency: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int | None = None,
+    ):
+        self.bugs: dict[int, dict[str, Any]] = {b["id"]: b for b in (bugs or [])}
+        self.comments: dict[int, list[dict[str, Any]]] = comments or {}
+        self.history: dict[int, list[dict[str, Any]]] = history or {}
+        self.attachments: dict[int, list[dict[str, Any]]] = attachments or {}
+        self.min_latency = min_latency
+        self.max_latency = max_latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        # (method, path, query params) of every request received
+        self.requests: list[tuple[str, str, dict[str, str]]] = []
+
+        self.app = Starlette(
+            routes=[
+                Route("/rest/bug", self._search, methods=["GET"]),
+                Route("/rest/bug/{bug_id:int}", self._bug, methods=["GET"]),
+                Route("/rest/bug/comment", self._many_comments, methods=["GET"]),
+                Route("/rest/bug/{bug_id:int}/comment", self._comments, methods=["GET"]),
+                Route("/rest/bug/{bug_id:int}/comment", self._add_comment, methods=["POST"]),
+                Route("/rest/bug/{bug_id:int}/history", self._history, methods=["GET"]),
+                Route("/rest/bug/{bug_id:int}/attachment", self._attachments, methods=["GET"]),
+                Route("/page.cgi", self._page, methods=["GET"]),
+            ]
+        )
+
+    def transport(self) -> httpx.AsyncBaseTransport:
+        """httpx transport routing requests to this fake"""
+        return httpx.ASGITransport(app=self.app)
+
+    async def _enter(self, request: Request, authenticated: bool = True) -> JSONResponse | None:
+        self.requests.append((request.method, request.url.path, dict(request.query_params)))
+
+        if self.max_latency:
+            # random latency so that concurrent requests interleave
+            await asyncio.sleep(self.random.uniform(self.min_latency, self.max_latency))
+
+        if self.error_rate and self.random.random() < self.error_rate:
+            return JSONResponse({"error": True, "message": "Service Unavailable"}, status_code=503)
+
+        if authenticated and "api_key" not in request.query_params:
+            return JSONResponse({"error": True, "message": "api_key required"}, status_code=401)
+
+        return None
+
+    def _served(self, request: Request, bug: dict[str, Any]) -> dict[str, Any]:
+        """Apply include_fields / exclude_fields and tag the bug with its tenant"""
+
+        if include := request.query_params.get("include_fields"):
+            bug = {k: v for k, v in bug.items() if k in include.split(",")}
+        if exclude := request.query_params.get("exclude_fields"):
+            bug = {k: v for k, v in bug.items() if k not in exclude.split(",")}
+
+        served_for = f"{request.url.hostname}/{request.query_params['api_key']}"
+        return {**bug, "served_for": served_for}
+
+    async def _search(self, request: Request) -> JSONResponse:
+        if error := await self._enter(request):
+            return error
+
+        bugs = list(self.bugs.values())
+
+        if "id" in request.query_params:
+            ids = {int(i) for i in request.query_params["id"].split(",")}
+            bugs = [b for b in bugs if b["id"] in ids]
+
+        if "quicksearch" in request.query_params:
+            bugs = [b for b in bugs if quicksearch_matches(request.query_params["quicksearch"], b)]
+
+        if "last_change_time" in request.query_params:
+            since = request.query_params["last_change_time"]
+            bugs = [b for b in bugs if b["last_change_time"] >= since]
+
+        if "product" in request.query_params:
+            bugs = [b for b in bugs if b["product"] == request.query_params["product"]]
+
+        if request.query_params.get("order", "").startswith("changeddate"):
+            bugs.sort(key=lambda b: (b["last_change_time"], b["id"]))
+
+        offset = int(request.query_params.get("offset", 0))
+        limit = int(request.query_params.get("limit", 0)) or len(bugs)
+        bugs = bugs[offset:offset + limit]
+
+        return JSONResponse({"bugs": [self._served(request, b) for b in bugs]})
+
+    async def _bug(self, request: Request) -> JSONResponse:
+        if error := await self._enter(request):
+            return error
+
+        bug_id = request.path_params["bug_id"]
+
+        if bug_id not in self.bugs:
+            return JSONResponse({"error": True, "code": 101, "message": f"Bug #{bug_id} does not exist."}, status_code=404)
+
+        return JSONResponse({"bugs": [self._served(request, self.bugs[bug_id])]})
+
+    async def _comments(self, request: Request) -> JSONResponse:
+        if error := await self._enter(request):
+            return error
+
+        bug_id = request.path_params["bug_id"]
+
+        if bug_id not in self.bugs:
+            return JSONResponse({"error": True, "code": 101, "message": f"Bug #{bug_id} does not exist."}, status_code=404)
+
+        comments = self.comments.get(bug_id, [])
+
+        if since := request.query_params.get("new_since"):
+            comments = [c for c in comments if c["creation_time"] > since]
+
+        return JSONResponse({"bugs": {str(bug_id): {"comments": comments}}, "comments": {}})
+
+    async def _many_comments(self, request: Request) -> JSONResponse:
+        if error := await self._enter(request):
+            return error
+
+        bug_ids = [int(i) for i in request.query_params.getlist("ids")]
+        self.requests[-1][2]["ids"] = ",".join(map(str, bug_ids))
+
+        # like Bugzilla, a single missing bug fails the whole request
+        for bug_id in bug_ids:
+            if bug_id not in self.bugs:
+                return JSONResponse({"error": True, "code": 101, "message": f"Bug #{bug_id} does not exist."}, status_code=404)
+
+        since = request.query_params.get("new_since")
+        bugs = {
+            str(bug_id): {"comments": [c for c in self.comments.get(bug_id, []) if not since or c["creation_time"] > since]}
+            for bug_id in bug_ids
+        }
+
+        return JSONResponse({"bugs": bugs, "comments": {}})
+
+    async def _history(self, request: Request) -> JSONResponse:
+        if error := await self._enter(request):
+            return error
+
+        bug_id = request.path_params["bug_id"]
+        history = self.history.get(bug_id, [])
+
+        if since := request.query_params.get("new_since"):
+            history = [h for h in history if h["when"] > since]
+
+        return JSONResponse({"bugs": [{"id": bug_id, "alias": [], "history": history}]})
+
+    async def _attachments(self, request: Request) -> JSONResponse:
+        if error := await self._enter(request):
+            return error
+
+        bug_id = request.path_params["bug_id"]
+
+        if bug_id not in self.bugs:
+            return JSONResponse({"error": True, "code": 101, "message": f"Bug #{bug_id} does not exist."}, status_code=404)
+
+        attachments = self.attachments.get(bug_id, [])
+
+        if include := request.query_params.get("include_fields"):
+            attachments = [{k: v for k, v in a.items() if k in include.split(",")} for a in attachments]
+
+        return JSONResponse({"bugs": {str(bug_id): attachments}, "attachments": {}})
+
+    async def _add_comment(self, request: Request) -> JSONResponse:
+        if error := await self._enter(request):
+            return error
+
+        bug_id = request.path_params["bug_id"]
+
+        if bug_id not in self.bugs:
+            return JSONResponse({"error": True, "code": 101, "message": f"Bug #{bug_id} does not exist."}, status_code=404)
+
+        body = await request.json()
+        comments = self.comments.setdefault(bug_id, [])
+        comment_id = 1000 * bug_id + len(comments)
+        comments.append({
+            "id": comment_id,
+            "bug_id": bug_id,
+            "count": len(comments),
+            "creator": request.query_params["api_key"],
+            "creation_time": "2023-01-21T00:00:00Z",
+            "text": body["comment"],
+            "is_private": body.get("is_private", False),
+        })
+
+        return JSONResponse({"id": comment_id}, status_code=201)
+
+    async def _page(self, request: Request) -> HTMLResponse | JSONResponse:
+        # documentation pages are public
+        if error := await self._enter(request, authenticated=False):
+            return error
+
+        return HTMLResponse("<html><body><h1>Quicksearch</h1>" + "<p>syntax</p>" * 200 + "</body></html>")
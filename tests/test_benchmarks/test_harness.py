@@ -0,0 +1,80 @@
+"""Tests for the benchmark harness"""
+
+import pytest
+from benchmarks.harness import FakeConfig, RunConfig, compare, percentile, report, run, scaling_report
+
+
+def results(**overrides):
+    result = {
+        "calls": 100, "errors": 0, "seconds": 1.0, "rps": 100.0,
+        "p50_ms": 10.0, "p95_ms": 20.0, "p99_ms": 30.0, "upstream_per_call": 1.0, "rss_mb": 100.0,
+    }
+    return {"results": {"bug_info": {**result, **overrides}}}
+
+
+class TestStatistics:
+    """Tests for percentile, compare and report"""
+
+    def test_percentile(self):
+        values = [float(v) for v in range(1, 101)]
+
+        assert percentile(values, 50) == pytest.approx(50.5)
+        assert percentile(values, 99) == pytest.approx(99.01)
+        assert percentile([3.0], 95) == 3.0
+        assert percentile([], 50) == 0.0
+
+    def test_compare_within_tolerance(self):
+        assert compare(results(), results(p95_ms=21.0, rps=95.0), tolerance=0.1) == []
+
+    def test_compare_regressions(self):
+        regressions = compare(results(), results(p95_ms=25.0, rps=80.0, errors=3), tolerance=0.1)
+
+        assert regressions == [
+            "bug_info: p95_ms 20.0 -> 25.0",
+            "bug_info: rps 100.0 -> 80.0",
+            "bug_info: errors 0 -> 3",
+        ]
+
+    def test_report_shows_change_from_baseline(self):
+        table = report(results(p50_ms=15.0), results())
+
+        assert "bug_info" in table
+        assert "15.0 (+50%)" in table
+
+    def test_scaling_report(self):
+        runs = [{**results(rps=100.0), "run": {"workers": 1}}, {**results(rps=180.0), "run": {"workers": 2}}]
+
+        table = scaling_report(runs)
+
+        assert "2 workers rps" in table
+        assert "180.0 (x1.80)" in table
+
+
+class TestRun:
+    """End to end run against the real server and the fake Bugzilla"""
+
+    async def test_small_run(self):
+        fake = FakeConfig(bugs=20, comments_per_bug=2, min_latency=0, max_latency=0.001)
+        config = RunConfig(scenarios=["bug_info", "bugs_info"], calls=10, concurrency=2, warmup=0)
+
+        output = await run(fake, config)
+
+        for name in ("bug_info", "bugs_info"):
+            result = output["results"][name]
+            assert result["calls"] == 10
+            assert result["errors"] == 0
+            assert 0 < result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"]
+            assert result["upstream_per_call"] > 0
+
+    async def test_run_with_workers(self):
+        """Test a run of server.py with two workers sharing the cache server"""
+        fake = FakeConfig(bugs=20, comments_per_bug=2, min_latency=0, max_latency=0.001)
+        config = RunConfig(scenarios=["bugs_quicksearch"], calls=10, concurrency=2, warmup=0, workers=2)
+
+        output = await run(fake, config)
+
+        result = output["results"]["bugs_quicksearch"]
+        assert result["calls"] == 10
+        assert result["errors"] == 0
+        # searches made by one worker are answered from the shared cache by the other
+        assert result["upstream_per_call"] < 1
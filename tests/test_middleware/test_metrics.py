@@ -0,0 +1,99 @@
+"""Unit tests for RecordMetrics middleware and the /metrics route"""
+
+import httpx
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+import bugzilla_mcp.utils as utils
+from bugzilla_mcp.middleware import RecordMetrics
+from bugzilla_mcp.utils import Metrics
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    """Record into fresh metrics"""
+    metrics = Metrics()
+    monkeypatch.setattr(utils, "metrics", metrics)
+    return metrics
+
+
+@pytest.fixture
+def context():
+    ctx = MagicMock()
+    ctx.message.name = "bug_info"
+    ctx.fastmcp_context.fastmcp.get_tools = AsyncMock(return_value={"bug_info": MagicMock()})
+    return ctx
+
+
+class TestRecordMetricsMiddleware:
+    """Tests for RecordMetrics middleware"""
+
+    async def test_tool_call_recorded_by_host(self, metrics, context, set_bugzilla_client):
+        """Test that a tool call is timed under its name and the tenant host"""
+        set_bugzilla_client.host = "bugzilla.mozilla.org"
+
+        result = await RecordMetrics().on_call_tool(context, AsyncMock(return_value="result"))
+
+        assert result == "result"
+        series = metrics.tool_duration.series[("bug_info", "bugzilla.mozilla.org")]
+        assert sum(series[:-1]) == 1
+        assert metrics.tool_errors.values == {}
+
+    async def test_tool_error_recorded(self, metrics, context, set_bugzilla_client):
+        """Test that failed tool calls are counted and the error is raised"""
+        set_bugzilla_client.host = "bugzilla.mozilla.org"
+
+        with pytest.raises(RuntimeError):
+            await RecordMetrics().on_call_tool(context, AsyncMock(side_effect=RuntimeError("boom")))
+
+        assert metrics.tool_errors.values == {("bug_info", "bugzilla.mozilla.org"): 1}
+        assert sum(metrics.tool_duration.series[("bug_info", "bugzilla.mozilla.org")][:-1]) == 1
+
+    async def test_unknown_tools_share_one_label(self, metrics, context, set_bugzilla_client):
+        """Test that names sent by clients for tools which do not exist never create series of their own"""
+        set_bugzilla_client.host = "bugzilla.mozilla.org"
+
+        for name in ("made_up_1", "made_up_2"):
+            context.message.name = name
+            with pytest.raises(RuntimeError):
+                await RecordMetrics().on_call_tool(context, AsyncMock(side_effect=RuntimeError("Unknown tool")))
+
+        assert metrics.tool_errors.values == {("unknown", "bugzilla.mozilla.org"): 2}
+        assert list(metrics.tool_duration.series) == [("unknown", "bugzilla.mozilla.org")]
+
+
+class TestMetricsRoute:
+    """Tests for the /metrics route of server.py"""
+
+    async def test_metrics_exposed(self, metrics):
+        """Test that the metrics are served in the Prometheus text format"""
+        from server import mcp
+
+        metrics.tool_errors.inc("bug_info", "bugzilla.mozilla.org")
+        transport = httpx.ASGITransport(app=mcp.http_app())
+
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            r = await client.get("/metrics")
+
+        assert r.status_code == 200
+        assert r.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert 'bugzilla_mcp_tool_errors_total{tool="bug_info",host="bugzilla.mozilla.org"} 1' in r.text
+
+    def test_shared_structures_exposed(self):
+        """Test that the server metrics include the state of the cache and client pool"""
+        text = utils.metrics.render()
+
+        assert "bugzilla_mcp_cache_entries " in text
+        assert "bugzilla_mcp_clients " in text
+
+    def test_pool_and_coalescing_counters_exposed(self, monkeypatch):
+        """Test that the counters of the client pool and of coalesced calls are exported"""
+        monkeypatch.setattr(utils.inflight, "coalesced", 4)
+        monkeypatch.setattr(utils.registry, "hits", 7)
+        monkeypatch.setattr(utils.registry, "evictions", 2)
+
+        text = utils.metrics.render()
+
+        assert "# TYPE bugzilla_mcp_upstream_calls_total counter\n" in text
+        assert 'bugzilla_mcp_upstream_calls_total{result="coalesced"} 4\n' in text
+        assert 'bugzilla_mcp_client_lookups_total{result="hit"} 7\n' in text
+        assert "bugzilla_mcp_client_evictions_total 2\n" in text
@@ -0,0 +1,83 @@
+"""Concurrency tests: many tenants served on one event loop without cross-talk"""
+
+import asyncio
+import random
+from contextvars import ContextVar
+from unittest.mock import MagicMock, patch
+import pytest
+from bugzilla_mcp.middleware.validate_headers import ValidateHeaders
+from bugzilla_mcp.tools.bugzilla import bug_info, server_url
+from bugzilla_mcp.utils import ClientRegistry
+import bugzilla_mcp.utils as utils
+from tests.fake_bugzilla import FakeBugzilla, make_bug
+
+
+# headers of the simulated HTTP request handled by the current task
+request_headers: ContextVar[dict[str, str]] = ContextVar("request_headers")
+
+TENANTS = [
+    (f"https://bugzilla-{host}.example.com", f"key-{key}")
+    for host in range(4)
+    for key in range(3)
+]
+
+
+class TestMultiTenantConcurrency:
+    """Stress the middleware + tools with interleaved calls from many tenants"""
+
+    @pytest.fixture
+    def fake(self):
+        return FakeBugzilla(bugs=[make_bug(i) for i in range(1, 21)], max_latency=0.002)
+
+    @pytest.fixture
+    async def registry(self, fake):
+        original_registry = utils.registry
+        utils.registry = ClientRegistry(max_clients=len(TENANTS), transport=fake.transport())
+        yield utils.registry
+        await utils.registry.close()
+        utils.registry = original_registry
+
+    async def test_interleaved_calls_do_not_cross_tenants(self, fake, registry):
+        """Hundreds of concurrent calls each only ever see their own tenant"""
+        middleware = ValidateHeaders()
+
+        async def tool_calls(ctx):
+            bug_id = ctx.bug_id
+            # yield to the loop between tool calls so that messages interleave
+            await asyncio.sleep(random.uniform(0, 0.001))
+            bug = await bug_info(bug_id)
+            await asyncio.sleep(random.uniform(0, 0.001))
+            url = await server_url()
+            return bug, url
+
+        async def message(url: str, api_key: str, bug_id: int):
+            request_headers.set({"bugzilla_url": url, "api_key": api_key})
+            ctx = MagicMock()
+            ctx.bug_id = bug_id
+            return await middleware.on_message(ctx, tool_calls)
+
+        calls = [
+            (url, api_key, random.randint(1, 20))
+            for _ in range(25)
+            for url, api_key in TENANTS
+        ]
+        random.shuffle(calls)
+
+        with patch(
+            "bugzilla_mcp.middleware.validate_headers.get_http_headers",
+            side_effect=lambda: request_headers.get(),
+        ):
+            results = await asyncio.gather(*(message(*call) for call in calls))
+
+        assert len(results) == 300
+
+        for (url, api_key, bug_id), (bug, seen_url) in zip(calls, results):
+            host = url.removeprefix("https://")
+            assert bug["id"] == bug_id
+            assert bug["served_for"] == f"{host}/{api_key}"
+            assert seen_url == url
+
+        # every tenant got exactly one pooled client
+        assert registry.misses == len(TENANTS)
+        assert registry.evictions == 0
+        assert utils.current_bz.get() is None
@@ -7,6 +7,19 @@ from bugzilla_mcp.middleware.validate_headers import ValidateHeaders
 import bugzilla_mcp.utils as utils
 
 
+def _recording_call_next(result="success"):
+    """call_next mock recording the Bugzilla client bound for each call"""
+    seen = []
+
+    async def call_next(ctx):
+        seen.append(utils.current_bz.get())
+        return result
+
+    mock = MagicMock(side_effect=call_next)
+    mock.seen = seen
+    return mock
+
+
 class TestValidateHeadersMiddleware:
     """Tests for ValidateHeaders middleware"""
 
@@ -22,17 +35,16 @@ class TestValidateHeadersMiddleware:
 
     @pytest.fixture
     def mock_call_next(self):
-        """Create a mock call_next function that returns an awaitable result"""
-        async_result = AsyncMock(return_value="success")
-        return MagicMock(side_effect=lambda ctx: async_result())
+        """Create a mock call_next function that returns an awaitable result
+
+        The Bugzilla client bound while the chain runs is recorded in `seen`
+        """
+        return _recording_call_next()
 
     @pytest.fixture(autouse=True)
-    def reset_global_bz(self):
-        """Reset the global bz before and after each test"""
-        original_bz = utils.bz
-        utils.bz = None
+    def reset_registry(self, fresh_registry):
+        """Use an empty client registry for each test"""
         yield
-        utils.bz = original_bz
 
     async def test_valid_headers_creates_bugzilla_client(self, middleware, mock_context, mock_call_next):
         """Test that valid headers create a Bugzilla client"""
@@ -44,9 +56,9 @@ class TestValidateHeadersMiddleware:
         with patch("bugzilla_mcp.middleware.validate_headers.get_http_headers", return_value=headers):
             await middleware.on_message(mock_context, mock_call_next)
         
-        assert utils.bz is not None
-        assert utils.bz.base_url == "https://bugzilla.example.com"
-        assert utils.bz.api_key == "test-api-key"
+        assert mock_call_next.seen[-1] is not None
+        assert mock_call_next.seen[-1].base_url == "https://bugzilla.example.com"
+        assert mock_call_next.seen[-1].api_key == "test-api-key"
 
     async def test_missing_api_key_raises_validation_error(self, middleware, mock_context, mock_call_next):
         """Test that missing api_key header raises ValidationError"""
@@ -82,7 +94,7 @@ class TestValidateHeadersMiddleware:
         with patch("bugzilla_mcp.middleware.validate_headers.get_http_headers", return_value=headers):
             await middleware.on_message(mock_context, mock_call_next)
         
-        assert utils.bz.base_url == "https://bugzilla.example.com"
+        assert mock_call_next.seen[-1].base_url == "https://bugzilla.example.com"
 
     async def test_url_normalization_preserves_http(self, middleware, mock_context, mock_call_next):
         """Test that URL with http:// is preserved"""
@@ -94,7 +106,7 @@ class TestValidateHeadersMiddleware:
         with patch("bugzilla_mcp.middleware.validate_headers.get_http_headers", return_value=headers):
             await middleware.on_message(mock_context, mock_call_next)
         
-        assert utils.bz.base_url == "http://bugzilla.example.com"
+        assert mock_call_next.seen[-1].base_url == "http://bugzilla.example.com"
 
     async def test_url_normalization_preserves_https(self, middleware, mock_context, mock_call_next):
         """Test that URL with https:// is preserved"""
@@ -106,24 +118,24 @@ class TestValidateHeadersMiddleware:
         with patch("bugzilla_mcp.middleware.validate_headers.get_http_headers", return_value=headers):
             await middleware.on_message(mock_context, mock_call_next)
         
-        assert utils.bz.base_url == "https://bugzilla.example.com"
+        assert mock_call_next.seen[-1].base_url == "https://bugzilla.example.com"
 
     async def test_empty_headers_creates_dummy_client(self, middleware, mock_context, mock_call_next):
         """Test that empty headers (inspection mode) creates a dummy client"""
         with patch("bugzilla_mcp.middleware.validate_headers.get_http_headers", return_value={}):
             await middleware.on_message(mock_context, mock_call_next)
         
-        assert utils.bz is not None
-        assert utils.bz.base_url == "https://bugzilla.example.com"
-        assert utils.bz.api_key == "inspection-placeholder"
+        assert mock_call_next.seen[-1] is not None
+        assert mock_call_next.seen[-1].base_url == "https://bugzilla.example.com"
+        assert mock_call_next.seen[-1].api_key == "inspection-placeholder"
 
     async def test_none_headers_creates_dummy_client(self, middleware, mock_context, mock_call_next):
         """Test that None headers (inspection mode) creates a dummy client"""
         with patch("bugzilla_mcp.middleware.validate_headers.get_http_headers", return_value=None):
             await middleware.on_message(mock_context, mock_call_next)
         
-        assert utils.bz is not None
-        assert utils.bz.base_url == "https://bugzilla.example.com"
+        assert mock_call_next.seen[-1] is not None
+        assert mock_call_next.seen[-1].base_url == "https://bugzilla.example.com"
 
     async def test_middleware_calls_next(self, middleware, mock_context, mock_call_next):
         """Test that middleware calls the next handler"""
@@ -138,6 +150,49 @@ class TestValidateHeadersMiddleware:
         mock_call_next.assert_called_once_with(mock_context)
         assert result == "success"
 
+    async def test_same_tenant_reuses_pooled_client(self, middleware, mock_context, mock_call_next):
+        """Test that consecutive messages from one tenant share a client"""
+        headers = {
+            "api_key": "test-api-key",
+            "bugzilla_url": "https://bugzilla.example.com"
+        }
+
+        with patch("bugzilla_mcp.middleware.validate_headers.get_http_headers", return_value=headers):
+            await middleware.on_message(mock_context, mock_call_next)
+            await middleware.on_message(mock_context, mock_call_next)
+
+        first = mock_call_next.seen[0]
+        assert mock_call_next.seen[-1] is first
+        assert utils.registry.stats()["hits"] == 1
+        assert utils.registry.stats()["misses"] == 1
+
+    async def test_different_api_keys_get_different_clients(self, middleware, mock_context, mock_call_next):
+        """Test that tenants with different API keys never share a client"""
+        url = "https://bugzilla.example.com"
+
+        with patch("bugzilla_mcp.middleware.validate_headers.get_http_headers", return_value={"api_key": "key-a", "bugzilla_url": url}):
+            await middleware.on_message(mock_context, mock_call_next)
+            first = mock_call_next.seen[-1]
+
+        with patch("bugzilla_mcp.middleware.validate_headers.get_http_headers", return_value={"api_key": "key-b", "bugzilla_url": url}):
+            await middleware.on_message(mock_context, mock_call_next)
+
+        assert mock_call_next.seen[-1] is not first
+        assert mock_call_next.seen[-1].api_key == "key-b"
+
+    async def test_client_is_unbound_after_message(self, middleware, mock_context, mock_call_next):
+        """Test that the client is only bound while the message is handled"""
+        headers = {
+            "api_key": "test-api-key",
+            "bugzilla_url": "https://bugzilla.example.com"
+        }
+
+        with patch("bugzilla_mcp.middleware.validate_headers.get_http_headers", return_value=headers):
+            await middleware.on_message(mock_context, mock_call_next)
+
+        assert mock_call_next.seen[-1] is not None
+        assert utils.current_bz.get() is None
+
     async def test_middleware_returns_result_from_next(self, middleware, mock_context):
         """Test that middleware returns the result from next handler"""
         headers = {
@@ -168,15 +223,11 @@ class TestValidateHeadersUrlEdgeCases:
 
     @pytest.fixture
     def mock_call_next(self):
-        async_result = AsyncMock(return_value="success")
-        return MagicMock(side_effect=lambda ctx: async_result())
+        return _recording_call_next()
 
     @pytest.fixture(autouse=True)
-    def reset_global_bz(self):
-        original_bz = utils.bz
-        utils.bz = None
+    def reset_registry(self, fresh_registry):
         yield
-        utils.bz = original_bz
 
     async def test_url_with_path(self, middleware, mock_context, mock_call_next):
         """Test URL with path is handled correctly"""
@@ -188,8 +239,8 @@ class TestValidateHeadersUrlEdgeCases:
         with patch("bugzilla_mcp.middleware.validate_headers.get_http_headers", return_value=headers):
             await middleware.on_message(mock_context, mock_call_next)
         
-        assert utils.bz.base_url == "https://bugzilla.example.com/bugzilla"
-        assert utils.bz.api_url == "https://bugzilla.example.com/bugzilla/rest"
+        assert mock_call_next.seen[-1].base_url == "https://bugzilla.example.com/bugzilla"
+        assert mock_call_next.seen[-1].api_url == "https://bugzilla.example.com/bugzilla/rest"
 
     async def test_url_with_trailing_slash_normalization_not_needed(self, middleware, mock_context, mock_call_next):
         """Test URL with trailing slash (normalization may vary)"""
@@ -202,4 +253,4 @@ class TestValidateHeadersUrlEdgeCases:
             await middleware.on_message(mock_context, mock_call_next)
         
         # Should have https:// added
-        assert utils.bz.base_url.startswith("https://")
+        assert mock_call_next.seen[-1].base_url.startswith("https://")
@@ -0,0 +1 @@
+"""Tests for the local bug mirror"""
@@ -0,0 +1,170 @@
+"""Tests for the offline quicksearch evaluator"""
+
+import random
+import pytest
+from bugzilla_mcp.mirror import MirrorStore
+from bugzilla_mcp.mirror.quicksearch import Query, Term, UnsupportedQuery, parse, to_predicate
+from bugzilla_mcp.utils import Bugzilla
+from tests.fake_bugzilla import FakeBugzilla, make_bug
+
+
+class TestParse:
+    """Tests for parse"""
+
+    def test_free_text_defaults_to_open_bugs(self):
+        fields = ("summary", "whiteboard", "alias", "product", "component")
+
+        assert parse("crash startup") == Query(
+            terms=(Term(fields, ("crash",), exact=("keywords",)), Term(fields, ("startup",), exact=("keywords",))),
+            status_filter="open",
+        )
+
+    def test_short_words_not_in_product(self):
+        assert parse("js").terms == (Term(("summary", "whiteboard", "alias"), ("js",), exact=("keywords",)),)
+
+    def test_status_words(self):
+        assert parse("ALL crash").status_filter == "all"
+        assert parse("OPEN crash").status_filter == "open"
+
+        query = parse("NEW,FIXED crash")
+        assert query.status_filter == "listed"
+        assert query.statuses == ("NEW",)
+        assert query.resolutions == ("FIXED",)
+
+    def test_fields_aliases_and_shortcuts(self):
+        assert parse("prod:Firefox,Core").terms == (Term(("product",), ("firefox", "core")),)
+        assert parse("kw:crash").terms == (Term(("keywords",), ("crash",)),)
+        assert parse(":Graphics").terms == (Term(("product", "component"), ("graphics",)),)
+        assert parse("@alice").terms == (Term(("assigned_to",), ("alice",)),)
+
+    def test_negation_and_quotes(self):
+        assert parse('-component:"Address Bar" "page load"').terms == (
+            Term(("component",), ("address bar",), negated=True),
+            Term(("summary", "whiteboard", "alias", "product", "component"), ("page load",), exact=("keywords",)),
+        )
+
+    def test_bug_ids(self):
+        assert parse("123 456,789") == Query(status_filter="all", ids=(123, 456, 789))
+
+    @pytest.mark.parametrize("query", ["", "crash OR hang", "a|b", "status:NEW", "+exact", "!crash", "flag:review?", "a,b"])
+    def test_unsupported(self, query):
+        with pytest.raises(UnsupportedQuery):
+            parse(query)
+
+
+class TestPredicate:
+    """Tests for to_predicate"""
+
+    def test_matches(self):
+        bug = make_bug(1, summary="Crash on startup", keywords=["regression"], component="Address Bar")
+
+        assert to_predicate(parse("crash"))(bug)
+        assert to_predicate(parse("CRASH kw:regr"))(bug)
+        assert not to_predicate(parse("-:address crash"))(bug)
+        assert not to_predicate(parse("FIXED crash"))(bug)
+        assert not to_predicate(parse("crash"))({**bug, "resolution": "FIXED", "status": "RESOLVED"})
+
+    def test_words_match_bugzilla_default_fields(self):
+        bug = make_bug(1, summary="Hang", product="Thunderbird", keywords=["perf"], whiteboard="[snappy]", alias=["hang-1"])
+
+        for word in ("thunder", "general", "perf", "snappy", "hang-1"):
+            assert to_predicate(parse(word))(bug), word
+        # keywords are compared whole, product names only for words of three characters or more
+        assert not to_predicate(parse("per"))(bug)
+        assert not to_predicate(parse("th"))(bug)
+        assert not to_predicate(parse("-snappy"))(bug)
+
+
+# a corpus varied enough for every supported construct to both match and miss
+PRODUCTS = ["Firefox", "Core", "Thunderbird"]
+COMPONENTS = ["General", "Address Bar", "Graphics", "Networking"]
+WORDS = ["crash", "startup", "slow", "scrolling", "memory", "leak", "page load", "tab", "video"]
+PEOPLE = ["alice@example.com", "bob@example.com", "nobody@mozilla.org"]
+KEYWORDS = ["crash", "regression", "perf", "meta"]
+WHITEBOARDS = ["", "[snappy]", "[necko-triaged]", "[qa+] perf"]
+STATES = [("NEW", ""), ("ASSIGNED", ""), ("UNCONFIRMED", ""), ("RESOLVED", "FIXED"), ("RESOLVED", "WONTFIX"), ("VERIFIED", "FIXED")]
+
+QUERIES = [
+    "crash",
+    "page load",
+    '"page load"',
+    "ALL crash",
+    "OPEN slow scrolling",
+    "FIXED memory",
+    "NEW,ASSIGNED",
+    "RESOLVED,WONTFIX tab",
+    "product:Firefox",
+    "prod:fire,thunder crash",
+    "component:\"Address Bar\"",
+    ":graphics",
+    "ALL :core -:networking",
+    "@alice",
+    "ALL -@nobody kw:regression",
+    "keywords:crash -crash",
+    "summary:leak",
+    "-slow -video",
+    "ALL assignee:bob product:Core",
+    "12 7,40",
+    "fire",
+    "general leak",
+    "perf",
+    "-meta",
+    "snappy",
+    "necko",
+    "crash-",
+    "ALL bug-1",
+    "ALL \"[qa+]\"",
+]
+
+
+def random_corpus(count: int, seed: int) -> list[dict]:
+    rng = random.Random(seed)
+    bugs = []
+
+    for bug_id in range(1, count + 1):
+        status, resolution = rng.choice(STATES)
+        bugs.append(make_bug(
+            bug_id,
+            summary=" ".join(rng.sample(WORDS, rng.randint(1, 3))).capitalize(),
+            product=rng.choice(PRODUCTS),
+            component=rng.choice(COMPONENTS),
+            assigned_to=rng.choice(PEOPLE),
+            keywords=rng.sample(KEYWORDS, rng.randint(0, 2)),
+            whiteboard=rng.choice(WHITEBOARDS),
+            # a list on Bugzilla 5.1, a string before
+            alias=rng.choice([[], [f"bug-{bug_id}"], f"crash-{bug_id}", None]),
+            status=status,
+            resolution=resolution,
+            last_change_time=f"2024-01-{rng.randint(1, 28):02d}T00:00:00Z",
+        ))
+
+    return bugs
+
+
+class TestDifferential:
+    """The mirror's SQL, the predicate and the fake Bugzilla must agree on every query"""
+
+    @pytest.fixture(params=[1, 2, 3])
+    async def harness(self, request):
+        corpus = random_corpus(120, seed=request.param)
+        fake = FakeBugzilla(bugs=corpus)
+        bz = Bugzilla(url="https://bugzilla.example.com", api_key="test-key", transport=fake.transport())
+        store = MirrorStore(":memory:")
+        store.upsert_bugs(corpus)
+
+        yield corpus, bz, store
+
+        await bz.close()
+        store.close()
+
+    @pytest.mark.parametrize("query", QUERIES)
+    async def test_equivalence(self, harness, query):
+        corpus, bz, store = harness
+
+        upstream = [b.id for b in await bz.bugs_quicksearch(query, limit=1000)]
+        mirrored = [b.id for b in store.quicksearch(query, limit=1000)]
+        predicate = to_predicate(parse(query))
+        evaluated = [b["id"] for b in corpus if predicate(b)]
+
+        assert mirrored == evaluated
+        assert sorted(upstream) == evaluated
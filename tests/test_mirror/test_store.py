@@ -0,0 +1,92 @@
+"""Unit tests for the mirror SQLite store"""
+
+import time
+import pytest
+from bugzilla_mcp.mirror import MirrorStore
+from bugzilla_mcp.mirror.store import fts_query
+from bugzilla_mcp.utils.models import Comment
+from tests.fake_bugzilla import make_bug
+
+
+@pytest.fixture
+def store():
+    store = MirrorStore(":memory:")
+    yield store
+    store.close()
+
+
+def comment(comment_id, bug_id, count, text, creation_time="2023-01-16T00:00:00Z"):
+    return Comment(comment_id, bug_id, count, creation_time=creation_time, text=text)
+
+
+class TestMirrorStore:
+    """Tests for MirrorStore"""
+
+    def test_bug_roundtrip(self, store):
+        """Test that a bug is returned as Bugzilla sent it"""
+        bug = make_bug(1, keywords=["crash"])
+        store.upsert_bugs([bug])
+
+        assert store.bug(1) == bug
+        assert store.bug(2) is None
+        assert store.has_bug(1)
+
+    def test_search_summary_and_comments(self, store):
+        """Test that words are found in summaries and in comments"""
+        store.upsert_bugs([make_bug(1, summary="Crash on startup"), make_bug(2, summary="Slow scrolling")])
+        store.upsert_comments([comment(20, 2, 0, "Happens after a crash of the GPU process")])
+
+        assert sorted(b.id for b in store.search("crash")) == [1, 2]
+        assert [b.id for b in store.search("startup crash")] == [1]
+        assert [b.id for b in store.search("gpu")] == [2]
+        assert store.search("nothing") == []
+
+    def test_search_filters_and_order(self, store):
+        """Test the product/status filters and the most recently changed first order"""
+        store.upsert_bugs([
+            make_bug(1, last_change_time="2024-01-01T00:00:00Z"),
+            make_bug(2, last_change_time="2024-03-01T00:00:00Z", status="RESOLVED"),
+            make_bug(3, last_change_time="2024-02-01T00:00:00Z", product="Thunderbird"),
+        ])
+
+        assert [b.id for b in store.search()] == [2, 3, 1]
+        assert [b.id for b in store.search(product="Firefox")] == [2, 1]
+        assert [b.id for b in store.search(status=["NEW"])] == [3, 1]
+        assert [b.id for b in store.search(limit=1, offset=1)] == [3]
+
+    def test_update_reindexes(self, store):
+        """Test that the full text index follows updated summaries"""
+        store.upsert_bugs([make_bug(1, summary="Old title")])
+        store.upsert_bugs([make_bug(1, summary="New title")])
+
+        assert store.search("old") == []
+        assert [b.id for b in store.search("new")] == [1]
+
+    def test_search_text_is_not_fts_syntax(self, store):
+        """Test that FTS5 operators in the text are searched as words"""
+        store.upsert_bugs([make_bug(1, summary='Fails with "NOT" OR crash*')])
+
+        assert [b.id for b in store.search('"NOT" crash*')] == [1]
+        assert fts_query('a "b"') == '"a" """b"""'
+
+    def test_comments_in_order_and_new_since(self, store):
+        """Test that comments come back in order, optionally only the new ones"""
+        store.upsert_comments([
+            comment(11, 1, 1, "second", "2023-01-17T00:00:00Z"),
+            comment(10, 1, 0, "first", "2023-01-16T00:00:00Z"),
+        ])
+
+        assert [c.text for c in store.comments(1)] == ["first", "second"]
+        assert [c.text for c in store.comments(1, new_since="2023-01-16T00:00:00Z")] == ["second"]
+
+    def test_is_fresh(self, store):
+        """Test that the mirror is only fresh for the API key it was synced with and within max_age"""
+        assert not store.is_fresh("https://bugzilla.example.com#key", 60)
+
+        store.set_meta("tenant", "https://bugzilla.example.com#key")
+        store.set_meta("synced_at", str(time.time() - 30))
+
+        assert store.is_fresh("https://bugzilla.example.com#key", 60)
+        assert not store.is_fresh("https://bugzilla.example.com#key", 10)
+        assert not store.is_fresh("https://bugzilla.example.com#other-key", 60)
+        assert not store.is_fresh("https://other.example.com#key", 60)
@@ -0,0 +1,151 @@
+"""Tests for the incremental mirror sync, against the fake Bugzilla"""
+
+import asyncio
+import logging
+from unittest.mock import AsyncMock
+import httpx
+import pytest
+from bugzilla_mcp.mirror import MirrorStore, MirrorSync
+from bugzilla_mcp.utils import Bugzilla
+from tests.fake_bugzilla import FakeBugzilla, make_bug
+
+
+def comment(comment_id, bug_id, count, text, creation_time, is_private=False):
+    return {
+        "id": comment_id,
+        "bug_id": bug_id,
+        "count": count,
+        "creator": "dev@example.com",
+        "creation_time": creation_time,
+        "text": text,
+        "is_private": is_private,
+    }
+
+
+@pytest.fixture
+def fake():
+    return FakeBugzilla(
+        bugs=[
+            make_bug(1, last_change_time="2024-01-01T00:00:00Z"),
+            make_bug(2, last_change_time="2024-02-01T00:00:00Z"),
+            make_bug(3, last_change_time="2024-03-01T00:00:00Z"),
+        ],
+        comments={
+            1: [comment(10, 1, 0, "first", "2023-12-01T00:00:00Z")],
+            2: [
+                comment(20, 2, 0, "public", "2024-01-15T00:00:00Z"),
+                comment(21, 2, 1, "secret", "2024-02-01T00:00:00Z", is_private=True),
+            ],
+        },
+    )
+
+
+@pytest.fixture
+async def sync(fake):
+    store = MirrorStore(":memory:")
+    bz = Bugzilla(url="https://bugzilla.example.com", api_key="test-key", transport=fake.transport())
+    yield MirrorSync(store, bz, page_size=2)
+    await bz.close()
+    store.close()
+
+
+class TestMirrorSync:
+    """Tests for MirrorSync"""
+
+    async def test_first_sync_mirrors_everything_public(self, sync):
+        """Test that the first sync pages through every bug and skips private comments"""
+        result = await sync.run_once()
+
+        assert result == {"bugs": 3, "comments": 2, "watermark": "2024-03-01T00:00:00Z"}
+        assert sync.store.bug(3)["summary"] == "Bug 3"
+        assert [c.text for c in sync.store.comments(2)] == ["public"]
+        assert sync.store.url == "https://bugzilla.example.com"
+        assert sync.store.is_fresh(sync.bz.tenant, 60)
+
+    async def test_next_sync_only_fetches_changes(self, sync, fake):
+        """Test that a later sync starts at the watermark and only asks for new comments"""
+        await sync.run_once()
+        fake.requests.clear()
+
+        fake.bugs[1] = make_bug(1, summary="Renamed", last_change_time="2024-04-01T00:00:00Z")
+        fake.comments[1].append(comment(11, 1, 1, "new", "2024-04-01T00:00:00Z"))
+
+        result = await sync.run_once()
+
+        # bug 3 sits at the watermark and comes again, bug 2 does not
+        assert result["bugs"] == 2
+        assert result["watermark"] == "2024-04-01T00:00:00Z"
+        assert sync.store.bug(1)["summary"] == "Renamed"
+        assert [c.text for c in sync.store.comments(1)] == ["first", "new"]
+        assert ("GET", "/rest/bug/2/comment") not in [r[:2] for r in fake.requests]
+
+        searches = [r[2] for r in fake.requests if r[1] == "/rest/bug"]
+        assert searches[0]["last_change_time"] == "2024-03-01T00:00:00Z"
+        comment_queries = {r[1]: r[2] for r in fake.requests if r[1].endswith("/comment")}
+        assert comment_queries["/rest/bug/1/comment"]["new_since"] == "2024-03-01T00:00:00Z"
+
+    async def test_bug_changed_during_sync_does_not_hide_another(self, sync, fake):
+        """Test that a bug moving to the end of the list while paging does not shift the next page"""
+        changed_bugs = sync.bz.changed_bugs
+
+        async def first_page_then_change(*args, **kwargs):
+            page = await changed_bugs(*args, **kwargs)
+            if 1 in fake.bugs and fake.bugs[1]["summary"] == "Bug 1":
+                fake.bugs[1] = make_bug(1, summary="Changed", last_change_time="2024-05-01T00:00:00Z")
+            return page
+
+        sync.bz.changed_bugs = first_page_then_change
+        result = await sync.run_once()
+
+        assert sync.store.bug(3) is not None
+        assert sync.store.bug(1)["summary"] == "Changed"
+        assert result["watermark"] == "2024-05-01T00:00:00Z"
+
+    async def test_many_bugs_changed_at_once(self, sync, fake):
+        """Test that more bugs than a page sharing one last_change_time are all mirrored, once"""
+        for i in range(4, 9):
+            fake.bugs[i] = make_bug(i, last_change_time="2024-03-01T00:00:00Z")
+
+        result = await sync.run_once()
+
+        assert result["bugs"] == 8
+        assert all(sync.store.has_bug(i) for i in range(1, 9))
+
+    async def test_refuses_other_bugzilla(self, sync, fake):
+        """Test that a mirror of one Bugzilla is never filled from another"""
+        await sync.run_once()
+        other = Bugzilla(url="https://other.example.com", api_key="test-key", transport=fake.transport())
+
+        with pytest.raises(ValueError):
+            MirrorSync(sync.store, other)
+
+        await other.close()
+
+    async def test_failed_sync_keeps_watermark(self, sync, fake):
+        """Test that the watermark only moves once a sync completed"""
+        await sync.run_once()
+        fake.bugs[4] = make_bug(4, last_change_time="2024-05-01T00:00:00Z")
+        sync.bz.comments = AsyncMock(side_effect=httpx.TransportError("Connection refused"))
+
+        with pytest.raises(httpx.TransportError):
+            await sync.run_once()
+
+        assert sync.store.watermark == "2024-03-01T00:00:00Z"
+        assert sync.store.bug(4) is None
+
+    async def test_run_logs_each_sync(self, sync, caplog, capsys):
+        """Test that the periodic sync reports through logging, failures included, and prints nothing"""
+        sync.run_once = AsyncMock(side_effect=[
+            {"bugs": 3, "comments": 2, "watermark": "2024-03-01T00:00:00Z"},
+            httpx.TransportError("Connection refused"),
+            asyncio.CancelledError(),
+        ])
+
+        with caplog.at_level(logging.INFO, logger="bugzilla_mcp.mirror.sync"), pytest.raises(asyncio.CancelledError):
+            await sync.run(0)
+
+        assert [r.getMessage() for r in caplog.records] == [
+            "Mirrored 3 bugs and 2 comments up to 2024-03-01T00:00:00Z",
+            "Mirror sync failed: Connection refused",
+        ]
+        assert capsys.readouterr().out == ""
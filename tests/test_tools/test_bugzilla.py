@@ -1,17 +1,29 @@
 """Unit tests for Bugzilla MCP tools"""
 
+import httpx
 import pytest
-from unittest.mock import MagicMock, AsyncMock
+from unittest.mock import AsyncMock, MagicMock
 from fastmcp.exceptions import ToolError, PromptError
 import bugzilla_mcp.utils as utils
+from tests.conftest import SAMPLE_BUG, SAMPLE_SEARCH_RESULTS
+from bugzilla_mcp.utils.budget import size
+from bugzilla_mcp.utils.models import SearchRow
 from bugzilla_mcp.tools.bugzilla import (
     bug_info,
+    bugs_info,
     bug_comments,
+    bugs_comments,
+    bug_dossier,
     add_comment,
+    add_comments_bulk,
+    CommentItem,
     bugs_quicksearch,
+    changed_bugs_since,
     learn_quicksearch_syntax,
     server_url,
     bug_url,
+    MAX_BULK_COMMENTS,
+    MAX_QUICKSEARCH_RESULTS,
 )
 
 
@@ -24,7 +36,22 @@ class TestBugInfoTool:
         
         assert result["id"] == 12345
         assert result["product"] == "Firefox"
-        set_bugzilla_client.bug_info.assert_called_once_with(12345)
+        set_bugzilla_client.bug_info.assert_called_once_with(12345, None, None)
+
+    async def test_bug_info_passes_projection(self, set_bugzilla_client):
+        """Test that include_fields and exclude_fields reach the client"""
+        await bug_info(12345, include_fields=["summary"], exclude_fields=["cc"])
+
+        set_bugzilla_client.bug_info.assert_called_once_with(12345, ["summary"], ["cc"])
+
+    async def test_bug_info_budget(self, set_bugzilla_client):
+        """Test that a budget leaves out the largest fields and lists them"""
+        set_bugzilla_client.bug_info = AsyncMock(return_value={**SAMPLE_BUG, "cc": ["a@example.com"] * 100})
+
+        result = await bug_info(12345, max_tokens=150)
+
+        assert result["omitted_fields"] == ["cc"]
+        assert result["summary"] == SAMPLE_BUG["summary"]
 
     async def test_bug_info_raises_on_missing_client(self, reset_bugzilla_client):
         """Test bug_info raises ToolError when client not initialized"""
@@ -44,6 +71,39 @@ class TestBugInfoTool:
         assert "API Error" in str(exc_info.value)
 
 
+class TestBugsInfoTool:
+    """Tests for bugs_info tool"""
+
+    async def test_bugs_info_success(self, set_bugzilla_client):
+        """Test successful bugs_info call"""
+        result = await bugs_info([12345])
+
+        assert result[12345]["product"] == "Firefox"
+        set_bugzilla_client.bugs_info.assert_called_once_with([12345], None)
+
+    async def test_bugs_info_passes_include_fields(self, set_bugzilla_client):
+        """Test that include_fields is forwarded to the client"""
+        await bugs_info([1, 2], include_fields=["summary"])
+
+        set_bugzilla_client.bugs_info.assert_called_once_with([1, 2], ["summary"])
+
+    async def test_bugs_info_raises_on_missing_client(self, reset_bugzilla_client):
+        """Test bugs_info raises ToolError when client not initialized"""
+        with pytest.raises(ToolError) as exc_info:
+            await bugs_info([12345])
+
+        assert "Bugzilla client not initialized" in str(exc_info.value)
+
+    async def test_bugs_info_raises_on_api_error(self, set_bugzilla_client):
+        """Test bugs_info raises ToolError on API error"""
+        set_bugzilla_client.bugs_info = AsyncMock(side_effect=Exception("API Error"))
+
+        with pytest.raises(ToolError) as exc_info:
+            await bugs_info([12345])
+
+        assert "Failed to fetch bugs info" in str(exc_info.value)
+
+
 class TestBugCommentsTool:
     """Tests for bug_comments tool"""
 
@@ -54,7 +114,7 @@ class TestBugCommentsTool:
         # Should only include public comments
         assert len(result) == 2
         for comment in result:
-            assert comment["is_private"] is False
+            assert comment.is_private is False
 
     async def test_bug_comments_include_private(self, set_bugzilla_client):
         """Test bug_comments includes private comments when requested"""
@@ -62,9 +122,43 @@ class TestBugCommentsTool:
         
         # Should include all comments
         assert len(result) == 3
-        private_comments = [c for c in result if c["is_private"]]
+        private_comments = [c for c in result if c.is_private]
         assert len(private_comments) == 1
 
+    async def test_bug_comments_requests_needed_fields(self, set_bugzilla_client):
+        """Test that only the needed comment fields and new comments are requested"""
+        await bug_comments(12345, new_since="2023-01-16T00:00:00Z")
+
+        set_bugzilla_client.comments.assert_called_once_with(12345, "2023-01-16T00:00:00Z")
+
+    async def test_bug_comments_limit_and_offset(self, set_bugzilla_client):
+        """Test paging through comments"""
+        result = await bug_comments(12345, include_private_comments=True, limit=1, offset=1)
+
+        assert [c.id for c in result] == [1002]
+
+    async def test_bug_comments_last(self, set_bugzilla_client):
+        """Test that last returns the most recent visible comments"""
+        result = await bug_comments(12345, last=1)
+
+        assert [c.id for c in result] == [1003]
+
+    async def test_bug_comments_last_zero(self, set_bugzilla_client):
+        """Test that last=0 returns nothing"""
+        assert await bug_comments(12345, last=0) == []
+
+    async def test_bug_comments_budget_returns_next_offset(self, set_bugzilla_client):
+        """Test that comments beyond the budget are left for the next call"""
+        first = await bug_comments(12345, include_private_comments=True, max_bytes=400)
+
+        assert [c["id"] for c in first["comments"]] == [1001, 1002]
+        assert first["next_offset"] == 2
+
+        rest = await bug_comments(12345, include_private_comments=True, offset=2, max_bytes=400)
+
+        assert [c["id"] for c in rest["comments"]] == [1003]
+        assert rest["next_offset"] is None
+
     async def test_bug_comments_raises_on_missing_client(self, reset_bugzilla_client):
         """Test bug_comments raises ToolError when client not initialized"""
         with pytest.raises(ToolError) as exc_info:
@@ -74,7 +168,7 @@ class TestBugCommentsTool:
 
     async def test_bug_comments_raises_on_api_error(self, set_bugzilla_client):
         """Test bug_comments raises ToolError on API error"""
-        set_bugzilla_client.bug_comments = AsyncMock(side_effect=Exception("API Error"))
+        set_bugzilla_client.comments = AsyncMock(side_effect=Exception("API Error"))
         
         with pytest.raises(ToolError) as exc_info:
             await bug_comments(12345)
@@ -82,6 +176,67 @@ class TestBugCommentsTool:
         assert "Failed to fetch bug comments" in str(exc_info.value)
 
 
+class TestBugsCommentsTool:
+    """Tests for bugs_comments tool"""
+
+    async def test_public_comments_by_default(self, set_bugzilla_client):
+        set_bugzilla_client.bugs_comments.return_value[2] = {"error": "Bug #2 does not exist."}
+
+        result = await bugs_comments([12345, 2], new_since="2023-01-01T00:00:00Z")
+
+        assert [c.is_private for c in result[12345]] == [False, False]
+        assert result[2] == {"error": "Bug #2 does not exist."}
+        set_bugzilla_client.bugs_comments.assert_called_once_with([12345, 2], "2023-01-01T00:00:00Z")
+
+    async def test_include_private(self, set_bugzilla_client):
+        result = await bugs_comments([12345], include_private_comments=True)
+
+        assert any(c.is_private for c in result[12345])
+
+    async def test_raises_on_api_error(self, set_bugzilla_client):
+        set_bugzilla_client.bugs_comments = AsyncMock(side_effect=Exception("API Error"))
+
+        with pytest.raises(ToolError, match="Failed to fetch bugs comments"):
+            await bugs_comments([12345])
+
+
+class TestBugDossierTool:
+    """Tests for bug_dossier tool"""
+
+    async def test_private_left_out_by_default(self, set_bugzilla_client):
+        result = await bug_dossier(12345, include_fields=["summary"])
+
+        assert result["bug"] == SAMPLE_BUG
+        assert [c.is_private for c in result["comments"]] == [False, False]
+        assert [a["id"] for a in result["attachments"]] == [1]
+        assert len(result["history"]) == 9
+        set_bugzilla_client.bug_dossier.assert_called_once_with(12345, ["summary"])
+
+    async def test_include_private(self, set_bugzilla_client):
+        result = await bug_dossier(12345, include_private_comments=True)
+
+        assert len(result["comments"]) == 3
+        assert len(result["attachments"]) == 2
+
+    async def test_budget(self, set_bugzilla_client):
+        """Test that a budget keeps the most recent history and reports what was left out"""
+        result = await bug_dossier(12345, max_bytes=1000)
+
+        assert size(result) <= 1000
+        assert "omitted_fields" in result["bug"]
+        assert [h["when"] for h in result["history"]] == ["2023-01-08T00:00:00Z", "2023-01-09T00:00:00Z"]
+        assert result["omitted_history"] == 7
+        assert result["omitted_attachments"] == 0
+        assert [c["id"] for c in result["comments"]] == [1001, 1003]
+        assert result["next_comment_offset"] is None
+
+    async def test_raises_on_api_error(self, set_bugzilla_client):
+        set_bugzilla_client.bug_dossier = AsyncMock(side_effect=Exception("API Error"))
+
+        with pytest.raises(ToolError, match="Failed to fetch bug dossier"):
+            await bug_dossier(12345)
+
+
 class TestAddCommentTool:
     """Tests for add_comment tool"""
 
@@ -124,79 +279,135 @@ class TestAddCommentTool:
         assert "Failed to create a comment" in str(exc_info.value)
 
 
+class TestAddCommentsBulkTool:
+    """Tests for add_comments_bulk tool"""
+
+    async def test_add_comments_bulk(self, set_bugzilla_client):
+        items = [CommentItem(1, "triaged"), CommentItem(2, "internal note", is_private=True)]
+
+        result = await add_comments_bulk(items, dedupe_key="triage-42")
+
+        assert result == [{"bug_id": 1, "id": 2001}, {"bug_id": 2, "id": 2001}]
+        set_bugzilla_client.add_comments.assert_called_once_with(
+            [(1, "triaged", False), (2, "internal note", True)], "triage-42"
+        )
+
+    async def test_too_many_items(self, set_bugzilla_client):
+        with pytest.raises(ToolError, match=f"At most {MAX_BULK_COMMENTS} comments"):
+            await add_comments_bulk([CommentItem(1, "triaged")] * (MAX_BULK_COMMENTS + 1))
+
+        set_bugzilla_client.add_comments.assert_not_called()
+
+    async def test_raises_on_missing_client(self, reset_bugzilla_client):
+        with pytest.raises(ToolError, match="Bugzilla client not initialized"):
+            await add_comments_bulk([CommentItem(1, "triaged")])
+
+
 class TestBugsQuicksearchTool:
     """Tests for bugs_quicksearch tool"""
 
     async def test_bugs_quicksearch_success(self, set_bugzilla_client):
         """Test successful quicksearch"""
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
-            "bugs": [
-                {
-                    "id": 12345,
-                    "product": "Firefox",
-                    "component": "General",
-                    "assigned_to": "developer@example.com",
-                    "status": "NEW",
-                    "resolution": "",
-                    "summary": "Test bug",
-                    "last_change_time": "2023-01-20T15:45:00Z",
-                },
-            ]
-        }
-        set_bugzilla_client.client.get = AsyncMock(return_value=mock_response)
+        set_bugzilla_client.bugs_quicksearch = AsyncMock(return_value=[
+            {
+                "id": 12345,
+                "product": "Firefox",
+                "component": "General",
+                "assigned_to": "developer@example.com",
+                "status": "NEW",
+                "resolution": "",
+                "summary": "Test bug",
+                "last_change_time": "2023-01-20T15:45:00Z",
+            },
+        ])
         
         result = await bugs_quicksearch("test query")
         
         assert len(result) == 1
-        assert result[0]["bug_id"] == 12345
-        assert result[0]["product"] == "Firefox"
-        assert result[0]["summary"] == "Test bug"
+        assert result[0].bug_id == 12345
+        assert result[0].product == "Firefox"
+        assert result[0].summary == "Test bug"
 
     async def test_bugs_quicksearch_extracts_essential_fields(self, set_bugzilla_client):
         """Test that quicksearch returns only essential fields"""
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
-            "bugs": [
-                {
-                    "id": 12345,
-                    "product": "Firefox",
-                    "component": "General",
-                    "assigned_to": "developer@example.com",
-                    "status": "NEW",
-                    "resolution": "",
-                    "summary": "Test bug",
-                    "last_change_time": "2023-01-20T15:45:00Z",
-                    "extra_field": "should not be included",
-                    "creation_time": "2023-01-15T10:30:00Z",
-                },
-            ]
-        }
-        set_bugzilla_client.client.get = AsyncMock(return_value=mock_response)
+        set_bugzilla_client.bugs_quicksearch = AsyncMock(return_value=[
+            {
+                "id": 12345,
+                "product": "Firefox",
+                "component": "General",
+                "assigned_to": "developer@example.com",
+                "status": "NEW",
+                "resolution": "",
+                "summary": "Test bug",
+                "last_change_time": "2023-01-20T15:45:00Z",
+                "extra_field": "should not be included",
+                "creation_time": "2023-01-15T10:30:00Z",
+            },
+        ])
         
         result = await bugs_quicksearch("test")
         
         # Verify only essential fields are included
-        expected_keys = {"bug_id", "product", "component", "assigned_to", "status", "resolution", "summary", "last_updated"}
-        assert set(result[0].keys()) == expected_keys
+        assert result[0] == SearchRow(
+            12345, "Firefox", "General", "developer@example.com", "NEW", "", "Test bug", "2023-01-20T15:45:00Z"
+        )
 
     async def test_bugs_quicksearch_with_limit_and_offset(self, set_bugzilla_client):
         """Test quicksearch with limit and offset parameters"""
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {"bugs": []}
-        set_bugzilla_client.client.get = AsyncMock(return_value=mock_response)
+        set_bugzilla_client.bugs_quicksearch = AsyncMock(return_value=[])
         
         await bugs_quicksearch("test", limit=10, offset=5)
         
         # Verify the call was made with correct parameters
-        call_args = set_bugzilla_client.client.get.call_args
-        params = call_args.kwargs["params"]
-        assert params["limit"] == 10
-        assert params["offset"] == 5
-        assert params["quicksearch"] == "test"
+        set_bugzilla_client.bugs_quicksearch.assert_called_once_with("test", 10, 5, None, None)
+
+    async def test_bugs_quicksearch_custom_fields(self, set_bugzilla_client):
+        """Test that include_fields replaces the essential fields"""
+        set_bugzilla_client.bugs_quicksearch = AsyncMock(return_value=[
+            {"id": 1, "summary": "Test bug", "priority": "P1"},
+        ])
+
+        result = await bugs_quicksearch("test", include_fields=["summary", "priority"])
+
+        assert result == [{"bug_id": 1, "summary": "Test bug", "priority": "P1"}]
+
+    async def test_bugs_quicksearch_exclude_fields(self, set_bugzilla_client):
+        """Test that exclude_fields drops fields from the essential set"""
+        set_bugzilla_client.bugs_quicksearch = AsyncMock(return_value=SAMPLE_SEARCH_RESULTS["bugs"])
+
+        result = await bugs_quicksearch("test", exclude_fields=["assigned_to", "resolution"])
+
+        assert "assigned_to" not in result[0]
+        assert "resolution" not in result[0]
+        assert result[0]["summary"] == "Test bug 1"
+
+    async def test_bugs_quicksearch_max_results_streams_pages(self, set_bugzilla_client):
+        """Test that max_results collects rows from the paginating client"""
+        async def bugs():
+            for bug in SAMPLE_SEARCH_RESULTS["bugs"]:
+                yield bug
+
+        set_bugzilla_client.iter_quicksearch = MagicMock(return_value=bugs())
+
+        result = await bugs_quicksearch("test", offset=5, max_results=100)
+
+        assert [r.bug_id for r in result] == [12345, 12346]
+        set_bugzilla_client.iter_quicksearch.assert_called_once_with(
+            "test", max_results=100, offset=5, include_fields=None, exclude_fields=None
+        )
+        set_bugzilla_client.bugs_quicksearch.assert_not_called()
+
+    async def test_bugs_quicksearch_max_results_is_capped(self, set_bugzilla_client):
+        """Test that max_results cannot exceed the server side ceiling"""
+        async def bugs():
+            return
+            yield
+
+        set_bugzilla_client.iter_quicksearch = MagicMock(return_value=bugs())
+
+        await bugs_quicksearch("test", max_results=10**9)
+
+        assert set_bugzilla_client.iter_quicksearch.call_args.kwargs["max_results"] == MAX_QUICKSEARCH_RESULTS
 
     async def test_bugs_quicksearch_raises_on_missing_client(self, reset_bugzilla_client):
         """Test bugs_quicksearch raises ToolError when client not initialized"""
@@ -207,31 +418,67 @@ class TestBugsQuicksearchTool:
 
     async def test_bugs_quicksearch_raises_on_api_error(self, set_bugzilla_client):
         """Test bugs_quicksearch raises ToolError on non-200 status"""
-        mock_response = MagicMock()
-        mock_response.status_code = 500
-        mock_response.json = MagicMock()  # Explicitly set as non-async to avoid warnings
-        set_bugzilla_client.client.get = AsyncMock(return_value=mock_response)
+        set_bugzilla_client.bugs_quicksearch = AsyncMock(
+            side_effect=httpx.TransportError("Failed to fetch API with Status code: 500")
+        )
         
         with pytest.raises(ToolError) as exc_info:
             await bugs_quicksearch("test")
         
-        assert "Search failed with status code 500" in str(exc_info.value)
+        assert "Search failed" in str(exc_info.value)
+        assert "Status code: 500" in str(exc_info.value)
+
+
+class TestChangedBugsSinceTool:
+    """Tests for changed_bugs_since tool"""
+
+    async def test_changed_bugs_since_success(self, set_bugzilla_client):
+        """Test that the feed of the client is returned"""
+        feed = {"since": "2024-01-01T00:00:00Z", "watermark": "2024-01-02T00:00:00Z", "after_id": 1, "truncated": False, "bugs": []}
+        set_bugzilla_client.changed_bugs_since = AsyncMock(return_value=feed)
+
+        result = await changed_bugs_since("2024-01-01T00:00:00Z", product="Firefox")
+
+        assert result == feed
+        set_bugzilla_client.changed_bugs_since.assert_called_once_with("2024-01-01T00:00:00Z", "Firefox", 100, None)
+
+    async def test_changed_bugs_since_raises_on_missing_client(self, reset_bugzilla_client):
+        """Test changed_bugs_since raises ToolError when client not initialized"""
+        with pytest.raises(ToolError) as exc_info:
+            await changed_bugs_since("2024-01-01T00:00:00Z")
+
+        assert "Bugzilla client not initialized" in str(exc_info.value)
+
+    async def test_changed_bugs_since_raises_on_api_error(self, set_bugzilla_client):
+        """Test changed_bugs_since raises ToolError on API error"""
+        set_bugzilla_client.changed_bugs_since = AsyncMock(side_effect=Exception("API Error"))
+
+        with pytest.raises(ToolError) as exc_info:
+            await changed_bugs_since("2024-01-01T00:00:00Z")
+
+        assert "Failed to fetch changed bugs" in str(exc_info.value)
 
 
 class TestLearnQuicksearchSyntaxTool:
     """Tests for learn_quicksearch_syntax tool"""
 
-    async def test_learn_quicksearch_syntax_success(self, set_bugzilla_client, httpx_mock):
+    async def test_learn_quicksearch_syntax_success(self, set_bugzilla_client):
         """Test successful quicksearch syntax retrieval"""
         html_content = "<html><body>Quicksearch documentation</body></html>"
-        httpx_mock.add_response(
-            url="https://bugzilla.mozilla.org/page.cgi?id=quicksearch.html",
-            text=html_content,
-        )
+        set_bugzilla_client.quicksearch_syntax = AsyncMock(return_value=html_content)
         
         result = await learn_quicksearch_syntax()
         
         assert result == html_content
+        set_bugzilla_client.quicksearch_syntax.assert_called_once_with(False)
+
+    async def test_learn_quicksearch_syntax_compact(self, set_bugzilla_client):
+        """Test that compact is forwarded to the client"""
+        set_bugzilla_client.quicksearch_syntax = AsyncMock(return_value="Quicksearch documentation")
+
+        await learn_quicksearch_syntax(compact=True)
+
+        set_bugzilla_client.quicksearch_syntax.assert_called_once_with(True)
 
     async def test_learn_quicksearch_syntax_raises_on_missing_client(self, reset_bugzilla_client):
         """Test learn_quicksearch_syntax raises ToolError when client not initialized"""
@@ -240,17 +487,16 @@ class TestLearnQuicksearchSyntaxTool:
         
         assert "Bugzilla client not initialized" in str(exc_info.value)
 
-    async def test_learn_quicksearch_syntax_raises_on_api_error(self, set_bugzilla_client, httpx_mock):
+    async def test_learn_quicksearch_syntax_raises_on_api_error(self, set_bugzilla_client):
         """Test learn_quicksearch_syntax raises PromptError on non-200 status"""
-        httpx_mock.add_response(
-            url="https://bugzilla.mozilla.org/page.cgi?id=quicksearch.html",
-            status_code=404,
+        set_bugzilla_client.quicksearch_syntax = AsyncMock(
+            side_effect=httpx.TransportError("Failed to fetch quicksearch documentation with Status code: 404")
         )
         
         with pytest.raises(PromptError) as exc_info:
             await learn_quicksearch_syntax()
         
-        assert "status code 404" in str(exc_info.value)
+        assert "Status code: 404" in str(exc_info.value)
 
 
 class TestServerUrlTool:
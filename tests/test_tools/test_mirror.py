@@ -0,0 +1,149 @@
+"""Unit tests for the tools answering from the local mirror"""
+
+import time
+import pytest
+from fastmcp.exceptions import ToolError
+from bugzilla_mcp.mirror import MirrorStore
+from bugzilla_mcp.tools import mirror
+from bugzilla_mcp.tools.mirror import mirror_search, mirror_quicksearch, mirror_bug_info, mirror_bug_comments
+from bugzilla_mcp.utils.models import Comment
+from tests.conftest import SAMPLE_BUG
+from tests.fake_bugzilla import make_bug
+
+
+@pytest.fixture
+def store(monkeypatch):
+    """A mirror of the mock client's Bugzilla, synced a minute ago"""
+    store = MirrorStore(":memory:")
+    store.upsert_bugs([make_bug(1, summary="Crash on startup"), make_bug(2, summary="Slow scrolling")])
+    store.upsert_comments([
+        Comment(20, 2, 0, creation_time="2023-01-16T00:00:00Z", text="mirrored")
+    ])
+    store.set_meta("url", "https://bugzilla.mozilla.org")
+    store.set_meta("tenant", "https://bugzilla.mozilla.org#test-tenant")
+    store.set_meta("synced_at", str(time.time() - 60))
+
+    monkeypatch.setattr(mirror, "store", store)
+    monkeypatch.setattr(mirror, "max_age", 900.0)
+    yield store
+    store.close()
+
+
+class TestMirrorSearchTool:
+    """Tests for mirror_search tool"""
+
+    async def test_answers_from_fresh_mirror(self, store, set_bugzilla_client):
+        """Test that a fresh mirror answers without calling Bugzilla"""
+        result = await mirror_search("crash")
+
+        assert [bug.bug_id for bug in result] == [1]
+        assert result[0].summary == "Crash on startup"
+        assert result[0].last_updated == "2023-01-20T15:45:00Z"
+        set_bugzilla_client.bugs_quicksearch.assert_not_called()
+
+    async def test_falls_back_when_stale(self, store, set_bugzilla_client, monkeypatch):
+        """Test that a stale mirror is ignored in favour of a quicksearch"""
+        monkeypatch.setattr(mirror, "max_age", 10.0)
+
+        result = await mirror_search("crash", product="Core Graphics", status=["NEW", "ASSIGNED"])
+
+        assert result[0].bug_id == 12345
+        set_bugzilla_client.bugs_quicksearch.assert_called_once_with(
+            'ALL crash product:"Core Graphics" status:NEW,ASSIGNED', 50, 0
+        )
+
+    async def test_falls_back_without_mirror(self, set_bugzilla_client, monkeypatch):
+        """Test that the tool works when no mirror is configured"""
+        monkeypatch.setattr(mirror, "store", None)
+
+        await mirror_search("crash")
+
+        # every status, as the mirror answers
+        set_bugzilla_client.bugs_quicksearch.assert_called_once_with("ALL crash", 50, 0)
+
+    async def test_falls_back_for_other_bugzilla(self, store, set_bugzilla_client):
+        """Test that the mirror of one Bugzilla never answers for another"""
+        set_bugzilla_client.base_url = "https://bugzilla.example.com"
+        set_bugzilla_client.tenant = "https://bugzilla.example.com#test-tenant"
+
+        await mirror_search("crash")
+
+        set_bugzilla_client.bugs_quicksearch.assert_called_once()
+
+    async def test_falls_back_for_other_api_key(self, store, set_bugzilla_client):
+        """Test that another API key of the mirrored Bugzilla never reads the mirror, it may see fewer bugs"""
+        set_bugzilla_client.tenant = "https://bugzilla.mozilla.org#other-tenant"
+
+        await mirror_search("crash")
+        await mirror_bug_info(1)
+
+        set_bugzilla_client.bugs_quicksearch.assert_called_once()
+        set_bugzilla_client.bug_info.assert_called_once_with(1)
+
+    async def test_raises_on_missing_client(self, store, reset_bugzilla_client):
+        """Test mirror_search raises ToolError when client not initialized"""
+        with pytest.raises(ToolError) as exc_info:
+            await mirror_search("crash")
+
+        assert "Bugzilla client not initialized" in str(exc_info.value)
+
+
+class TestMirrorQuicksearchTool:
+    """Tests for mirror_quicksearch tool"""
+
+    async def test_supported_query_answered_by_mirror(self, store, set_bugzilla_client):
+        """Test that the supported syntax is evaluated on the mirror"""
+        result = await mirror_quicksearch("product:firefox -crash")
+
+        assert [bug.bug_id for bug in result] == [2]
+        set_bugzilla_client.bugs_quicksearch.assert_not_called()
+
+    async def test_unsupported_query_sent_to_bugzilla(self, store, set_bugzilla_client):
+        """Test that syntax outside the supported subset falls back to Bugzilla"""
+        result = await mirror_quicksearch("crash OR hang", limit=10)
+
+        assert result[0].bug_id == 12345
+        set_bugzilla_client.bugs_quicksearch.assert_called_once_with("crash OR hang", 10, 0)
+
+    async def test_stale_mirror_sends_to_bugzilla(self, store, set_bugzilla_client, monkeypatch):
+        """Test that a stale mirror is not used"""
+        monkeypatch.setattr(mirror, "max_age", 10.0)
+
+        await mirror_quicksearch("crash")
+
+        set_bugzilla_client.bugs_quicksearch.assert_called_once_with("crash", 50, 0)
+
+
+class TestMirrorBugInfoTool:
+    """Tests for mirror_bug_info tool"""
+
+    async def test_mirrored_bug(self, store, set_bugzilla_client):
+        """Test that a mirrored bug is served locally"""
+        result = await mirror_bug_info(2)
+
+        assert result["summary"] == "Slow scrolling"
+        set_bugzilla_client.bug_info.assert_not_called()
+
+    async def test_unknown_bug_falls_back(self, store, set_bugzilla_client):
+        """Test that a bug missing from the mirror is fetched from Bugzilla"""
+        result = await mirror_bug_info(12345)
+
+        assert result == SAMPLE_BUG
+        set_bugzilla_client.bug_info.assert_called_once_with(12345)
+
+
+class TestMirrorBugCommentsTool:
+    """Tests for mirror_bug_comments tool"""
+
+    async def test_mirrored_comments(self, store, set_bugzilla_client):
+        """Test that comments of a mirrored bug are served locally"""
+        result = await mirror_bug_comments(2)
+
+        assert [c.text for c in result] == ["mirrored"]
+        set_bugzilla_client.comments.assert_not_called()
+
+    async def test_fallback_drops_private_comments(self, store, set_bugzilla_client):
+        """Test that the live fallback only returns public comments, like the mirror"""
+        result = await mirror_bug_comments(12345)
+
+        assert [c.id for c in result] == [1001, 1003]
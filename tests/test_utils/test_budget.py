@@ -0,0 +1,77 @@
+"""Unit tests for the response size budget"""
+
+from bugzilla_mcp.utils import jsonlib
+from bugzilla_mcp.utils.budget import MIN_TEXT_CHARS, byte_budget, cut, fit_bug, fit_comments, fit_latest, size
+from bugzilla_mcp.utils.models import Comment
+from tests.conftest import SAMPLE_BUG
+
+
+def comments(*texts):
+    return [Comment(i, 1, i, "dev@example.com", "2024-01-15T10:30:00Z", text) for i, text in enumerate(texts)]
+
+
+class TestBudget:
+    """Tests for the budget helpers"""
+
+    def test_byte_budget(self):
+        assert byte_budget() is None
+        assert byte_budget(max_tokens=100) == 400
+        assert byte_budget(max_bytes=1000) == 1000
+        assert byte_budget(max_tokens=100, max_bytes=300) == 300
+
+    def test_cut(self):
+        assert cut("short", 10) == "short"
+        assert cut("a" * 30, 10).startswith("a" * 10 + "\n[20 more characters")
+
+    def test_fit_bug_drops_empty_fields(self):
+        bug = {**SAMPLE_BUG, "cc": [], "whiteboard": "", "qa_contact": None, "is_open": False}
+        result = fit_bug(bug, 10_000)
+
+        # an open bug has an empty resolution
+        assert result == {**{k: v for k, v in SAMPLE_BUG.items() if k != "resolution"}, "is_open": False}
+        assert "omitted_fields" not in result
+
+    def test_fit_bug_omits_largest_fields(self):
+        bug = {**SAMPLE_BUG, "cc": [f"user{i}@example.com" for i in range(200)], "see_also": ["https://example.com"]}
+        result = fit_bug(bug, size(SAMPLE_BUG) + 100)
+
+        assert result["omitted_fields"] == ["cc"]
+        assert result["see_also"] == ["https://example.com"]
+        assert size(result) <= size(SAMPLE_BUG) + 100
+
+    def test_fit_bug_keeps_essential_fields(self):
+        result = fit_bug(SAMPLE_BUG, 10)
+
+        assert result["summary"] == SAMPLE_BUG["summary"]
+        assert "priority" in result["omitted_fields"]
+
+    def test_fit_comments_stops_at_budget(self):
+        result = fit_comments(comments("a" * 300, "b" * 300, "c" * 300), 900)
+
+        assert [c["id"] for c in result] == [0, 1]
+        assert size(result) <= 900
+
+    def test_fit_comments_cuts_long_texts(self):
+        result = fit_comments(comments("x" * 10_000, "short"), 4000)
+
+        assert [c["id"] for c in result] == [0, 1]
+        assert result[0]["text"].startswith("x" * 1000 + "\n[9000 more characters")
+
+    def test_fit_comments_always_returns_one(self):
+        result = fit_comments(comments("x" * 10_000), 100)
+
+        assert len(result) == 1
+        assert result[0]["text"].startswith("x" * MIN_TEXT_CHARS + "\n[")
+
+    def test_fit_comments_drops_empty_fields(self):
+        result = fit_comments([Comment(1, 2, text="hi")], 1000)
+
+        assert jsonlib.dumps(result) == '[{"id":1,"bug_id":2,"text":"hi","is_private":false}]'
+
+    def test_fit_latest_keeps_most_recent(self):
+        history = [{"when": f"2024-01-0{i}T00:00:00Z", "who": "dev@example.com", "note": None} for i in range(1, 6)]
+        latest = [{"when": "2024-01-05T00:00:00Z", "who": "dev@example.com"}]
+
+        assert fit_latest(history, size(latest) + 1) == latest
+        assert fit_latest(history, 10_000) == [{"when": h["when"], "who": h["who"]} for h in history]
+        assert fit_latest(history, 10) == []
@@ -1,9 +1,16 @@
 """Unit tests for the Bugzilla API client"""
 
+import asyncio
 import json
 import pytest
 import httpx
-from bugzilla_mcp.utils import Bugzilla
+from bugzilla_mcp.utils import Bugzilla, ResponseCache
+from bugzilla_mcp.utils.bugzilla import UnknownOutcomeError, batch_ids, projection
+from bugzilla_mcp.utils.disk_cache import SQLiteBackend
+from bugzilla_mcp.utils.metrics import Metrics
+from bugzilla_mcp.utils.models import COMMENT_FIELDS, Bug, Comment
+from tests.fake_bugzilla import FakeBugzilla, make_bug
+from bugzilla_mcp.utils.resilience import CircuitBreaker, CircuitOpenError, Retry, TokenBucket
 
 
 class TestBugzillaInit:
@@ -117,13 +124,192 @@ class TestBugzillaBugInfo:
         await bz.close()
 
 
-class TestBugzillaBugComments:
-    """Tests for bug_comments method"""
+class TestBugzillaProjection:
+    """Tests for server-side field projection"""
 
-    async def test_bug_comments_success(self, httpx_mock):
-        """Test successful bug_comments call"""
+    async def test_bug_info_include_fields(self, httpx_mock):
+        """Test that bug_info asks Bugzilla for the requested fields only"""
+        httpx_mock.add_response(
+            url="https://bugzilla.mozilla.org/rest/bug/12345?api_key=test-key&include_fields=summary%2Cstatus&exclude_fields=cc",
+            json={"bugs": [{"summary": "Test bug", "status": "NEW"}]},
+        )
+
+        bz = Bugzilla(url="https://bugzilla.mozilla.org", api_key="test-key")
+        result = await bz.bug_info(12345, include_fields=["summary", "status"], exclude_fields=["cc"])
+
+        assert result == {"summary": "Test bug", "status": "NEW"}
+
+        await bz.close()
+
+    async def test_quicksearch_requests_essential_fields(self, httpx_mock):
+        """Test that quicksearch only asks for the essential fields by default"""
+        httpx_mock.add_response(json={"bugs": []})
+
+        bz = Bugzilla(url="https://bugzilla.mozilla.org", api_key="test-key")
+        await bz.bugs_quicksearch("product:Firefox", limit=10, offset=20)
+
+        params = httpx_mock.get_request().url.params
+        assert params["quicksearch"] == "product:Firefox"
+        assert params["limit"] == "10"
+        assert params["offset"] == "20"
+        assert params["include_fields"] == "id,product,component,assigned_to,status,resolution,summary,last_change_time"
+        assert "exclude_fields" not in params
+
+        await bz.close()
+
+    async def test_quicksearch_custom_fields(self, httpx_mock):
+        """Test that quicksearch forwards custom include/exclude fields"""
+        httpx_mock.add_response(json={"bugs": [{"id": 1, "priority": "P1"}]})
+
+        bz = Bugzilla(url="https://bugzilla.mozilla.org", api_key="test-key")
+        result = await bz.bugs_quicksearch("test", include_fields=["priority"], exclude_fields=["summary"])
+
+        params = httpx_mock.get_request().url.params
+        assert params["include_fields"] == "id,priority"
+        assert params["exclude_fields"] == "summary"
+        assert result == [{"id": 1, "priority": "P1"}]
+
+        await bz.close()
+
+    async def test_quicksearch_drops_unrequested_fields(self, httpx_mock):
+        """Test that fields a Bugzilla sends despite include_fields are not returned"""
+        pytest.importorskip("msgspec")
+        httpx_mock.add_response(json={"bugs": [{"id": 1, "priority": "P1", "description": "x" * 1000}]})
+
+        bz = Bugzilla(url="https://bugzilla.mozilla.org", api_key="test-key")
+        result = await bz.bugs_quicksearch("test", include_fields=["priority"])
+
+        assert result == [{"id": 1, "priority": "P1"}]
+
+        await bz.close()
+
+    def test_projection_empty(self):
+        """Test that no projection sends no params"""
+        assert projection() == {}
+
+
+class TestBatchIds:
+    """Tests for the id batching helper"""
+
+    def test_batches_by_count(self):
+        """Test that batches never exceed max_ids"""
+        batches = list(batch_ids(list(range(250)), max_ids=100))
+
+        assert [len(b) for b in batches] == [100, 100, 50]
+
+    def test_batches_by_url_length(self):
+        """Test that the comma separated ids stay below max_chars"""
+        ids = list(range(100000, 100100))
+        batches = list(batch_ids(ids, max_ids=1000, max_chars=70))
+
+        for batch in batches:
+            assert len(",".join(map(str, batch))) <= 70
+        assert sum(batches, []) == ids
+
+    def test_empty(self):
+        """Test that no ids means no batch"""
+        assert list(batch_ids([])) == []
+
+
+class TestBugzillaBugsInfo:
+    """Tests for bugs_info method"""
+
+    async def test_bugs_info_single_request(self, httpx_mock):
+        """Test that several bugs are fetched in one request"""
+        httpx_mock.add_response(
+            url="https://bugzilla.mozilla.org/rest/bug?api_key=test-key&permissive=1&id=1%2C2%2C3",
+            json={"bugs": [{"id": 1}, {"id": 2}, {"id": 3}]},
+        )
+
+        bz = Bugzilla(url="https://bugzilla.mozilla.org", api_key="test-key")
+        result = await bz.bugs_info([1, 2, 3])
+
+        assert result == {1: {"id": 1}, 2: {"id": 2}, 3: {"id": 3}}
+        assert len(httpx_mock.get_requests()) == 1
+
+        await bz.close()
+
+    async def test_bugs_info_per_id_errors(self, httpx_mock):
+        """Test that faults and missing bugs become per-id errors"""
         httpx_mock.add_response(
-            url="https://bugzilla.mozilla.org/rest/bug/12345/comment?api_key=test-key",
+            json={
+                "bugs": [{"id": 1}],
+                "faults": [{"id": 2, "faultString": "You are not authorized to access bug #2."}],
+            },
+        )
+
+        bz = Bugzilla(url="https://bugzilla.mozilla.org", api_key="test-key")
+        result = await bz.bugs_info([1, 2, 3])
+
+        assert result[1] == {"id": 1}
+        assert "not authorized" in result[2]["error"]
+        assert "not returned" in result[3]["error"]
+
+        await bz.close()
+
+    async def test_bugs_info_failed_batch(self, httpx_mock):
+        """Test that a failed batch reports an error for each of its ids"""
+        httpx_mock.add_response(status_code=500)
+
+        bz = Bugzilla(url="https://bugzilla.mozilla.org", api_key="test-key", retry=Retry(attempts=1))
+        result = await bz.bugs_info([1, 2])
+
+        assert "Status code: 500" in result[1]["error"]
+        assert "Status code: 500" in result[2]["error"]
+
+        await bz.close()
+
+    async def test_bugs_info_include_fields(self, httpx_mock):
+        """Test that include_fields is sent and always contains the id"""
+        httpx_mock.add_response(json={"bugs": [{"id": 1, "summary": "s"}]})
+
+        bz = Bugzilla(url="https://bugzilla.mozilla.org", api_key="test-key")
+        await bz.bugs_info([1], include_fields=["summary"])
+
+        request = httpx_mock.get_request()
+        assert request.url.params["include_fields"] == "id,summary"
+
+        await bz.close()
+
+    async def test_bugs_info_batches_run_concurrently(self, httpx_mock):
+        """Test that large id lists are split and batches overlap, bounded by the semaphore"""
+        in_flight = 0
+        max_in_flight = 0
+
+        async def respond(request: httpx.Request):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            ids = [int(i) for i in request.url.params["id"].split(",")]
+            return httpx.Response(200, json={"bugs": [{"id": i} for i in ids]})
+
+        httpx_mock.add_callback(respond, is_reusable=True)
+
+        bz = Bugzilla(url="https://bugzilla.mozilla.org", api_key="test-key")
+        bz.max_concurrent_batches = 3
+        ids = list(range(1, 1001))
+        result = await bz.bugs_info(ids + [1, 2])
+
+        assert list(result) == ids
+        assert len(httpx_mock.get_requests()) == 10
+        assert max_in_flight == 3
+
+        await bz.close()
+
+
+class TestBugzillaComments:
+    """Tests for comments method"""
+
+    COMMENTS_URL = str(httpx.URL(
+        "https://bugzilla.mozilla.org/rest/bug/12345/comment", params={"api_key": "test-key", **projection(COMMENT_FIELDS)}
+    ))
+
+    async def test_comments_success(self, httpx_mock):
+        """Test successful comments call"""
+        httpx_mock.add_response(
+            url=self.COMMENTS_URL,
             json={
                 "bugs": {
                     "12345": {
@@ -137,49 +323,49 @@ class TestBugzillaBugComments:
         )
 
         bz = Bugzilla(url="https://bugzilla.mozilla.org", api_key="test-key")
-        result = await bz.bug_comments(12345)
+        result = await bz.comments(12345)
 
         assert len(result) == 2
-        assert result[0]["id"] == 1
-        assert result[0]["text"] == "First comment"
-        assert result[1]["is_private"] is True
-        
+        assert result[0].id == 1
+        assert result[0].text == "First comment"
+        assert result[1].is_private is True
+
         await bz.close()
 
-    async def test_bug_comments_failure_status_code(self, httpx_mock):
-        """Test bug_comments raises exception on non-200 status"""
-        httpx_mock.add_response(
-            url="https://bugzilla.mozilla.org/rest/bug/99999/comment?api_key=test-key",
-            status_code=404,
-        )
+    async def test_comments_failure_status_code(self, httpx_mock):
+        """Test comments raises exception on non-200 status"""
+        httpx_mock.add_response(status_code=404)
 
         bz = Bugzilla(url="https://bugzilla.mozilla.org", api_key="test-key")
-        
+
         with pytest.raises(httpx.TransportError) as exc_info:
-            await bz.bug_comments(99999)
-        
+            await bz.comments(99999)
+
         assert "Status code: 404" in str(exc_info.value)
-        
+
         await bz.close()
 
-    async def test_bug_comments_empty(self, httpx_mock):
-        """Test bug_comments with no comments"""
-        httpx_mock.add_response(
-            url="https://bugzilla.mozilla.org/rest/bug/12345/comment?api_key=test-key",
-            json={
-                "bugs": {
-                    "12345": {
-                        "comments": []
-                    }
-                }
-            },
-        )
+    async def test_comments_empty(self, httpx_mock):
+        """Test comments with no comments"""
+        httpx_mock.add_response(url=self.COMMENTS_URL, json={"bugs": {"12345": {"comments": []}}})
 
         bz = Bugzilla(url="https://bugzilla.mozilla.org", api_key="test-key")
-        result = await bz.bug_comments(12345)
+        result = await bz.comments(12345)
 
         assert result == []
-        
+
+        await bz.close()
+
+    async def test_comments_new_since(self, httpx_mock):
+        """Test that new_since is sent to Bugzilla"""
+        httpx_mock.add_response(json={"bugs": {"12345": {"comments": [{"id": 3, "text": "New"}]}}})
+
+        bz = Bugzilla(url="https://bugzilla.mozilla.org", api_key="test-key")
+        result = await bz.comments(12345, new_since="2023-01-16T00:00:00Z")
+
+        assert httpx_mock.get_request().url.params["new_since"] == "2023-01-16T00:00:00Z"
+        assert result == [Comment(id=3, text="New")]
+
         await bz.close()
 
 
@@ -256,6 +442,994 @@ class TestBugzillaAddComment:
         await bz.close()
 
 
+class TestBugzillaAddComments:
+    """Tests for posting many comments and deduplicated writes"""
+
+    @pytest.fixture
+    def fake(self):
+        return FakeBugzilla(bugs=[make_bug(i) for i in range(1, 21)], max_latency=0.005)
+
+    def posts(self, fake):
+        return [r[1] for r in fake.requests if r[0] == "POST"]
+
+    async def test_results_per_item_in_order(self, fake):
+        bz = Bugzilla(url="https://bugzilla.example.com", api_key="test-key", transport=fake.transport())
+
+        results = await bz.add_comments([(2, "triaged", False), (9999, "triaged", False), (1, "secret", True)])
+
+        assert results == [
+            {"bug_id": 2, "id": 2000},
+            {"bug_id": 9999, "error": "Failed to fetch API with Status code: 404"},
+            {"bug_id": 1, "id": 1000},
+        ]
+        assert fake.comments[1][0]["is_private"] is True
+
+        await bz.close()
+
+    async def test_bounded_concurrency(self, fake):
+        """Test that posts run concurrently, at most max_concurrent_batches at a time"""
+        bz = Bugzilla(url="https://bugzilla.example.com", api_key="test-key", transport=fake.transport())
+        in_flight = peak = 0
+        send = bz._send
+
+        async def counting_send(*args, **kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            try:
+                return await send(*args, **kwargs)
+            finally:
+                in_flight -= 1
+
+        bz._send = counting_send
+        results = await bz.add_comments([(i, "triaged", False) for i in range(1, 21)])
+
+        assert all("id" in r for r in results)
+        assert peak == bz.max_concurrent_batches
+        assert len(self.posts(fake)) == 20
+
+        await bz.close()
+
+    async def test_retry_with_dedupe_key_only_posts_missing(self, fake):
+        bz = Bugzilla(
+            url="https://bugzilla.example.com", api_key="test-key", transport=fake.transport(), cache=ResponseCache()
+        )
+        items = [(1, "triaged", False), (2, "triaged", False), (21, "triaged", False)]
+
+        first = await bz.add_comments(items, dedupe_key="triage-42")
+        fake.bugs[21] = make_bug(21)
+        retry = await bz.add_comments(items, dedupe_key="triage-42")
+
+        assert "error" in first[2]
+        assert retry == [
+            {"bug_id": 1, "id": 1000, "replayed": True},
+            {"bug_id": 2, "id": 2000, "replayed": True},
+            {"bug_id": 21, "id": 21000},
+        ]
+        assert self.posts(fake) == ["/rest/bug/1/comment", "/rest/bug/2/comment", "/rest/bug/21/comment", "/rest/bug/21/comment"]
+        # another comment to the same bug is not a duplicate
+        await bz.add_comments([(1, "fixed", False)], dedupe_key="triage-42")
+        assert len(fake.comments[1]) == 2
+
+        await bz.close()
+
+    async def test_concurrent_calls_with_same_key_post_once(self, fake):
+        bz = Bugzilla(
+            url="https://bugzilla.example.com", api_key="test-key", transport=fake.transport(), cache=ResponseCache()
+        )
+
+        results = await asyncio.gather(*(bz.add_comment(1, "triaged", False, dedupe_key="k") for _ in range(3)))
+
+        assert [r["id"] for r in results] == [1000] * 3
+        assert len(self.posts(fake)) == 1
+
+        await bz.close()
+
+    async def test_dedupe_keys_outlive_evictions_and_revoked_keys(self, fake):
+        """Test that a key is remembered when responses are evicted, or dropped after a 401"""
+        cache = ResponseCache(max_bytes=200)
+        bz = Bugzilla(url="https://bugzilla.example.com", api_key="test-key", transport=fake.transport(), cache=cache)
+
+        await bz.add_comment(1, "triaged", False, dedupe_key="k")
+        for i in range(20):
+            await cache.set(f"{bz.tenant}|bug|{i}", "bug", i, size=100)
+        await cache.clear(bz.tenant)
+        result = await bz.add_comment(1, "triaged", False, dedupe_key="k")
+
+        assert result == {"id": 1000, "replayed": True}
+        assert len(self.posts(fake)) == 1
+
+        await bz.close()
+
+    async def test_workers_sharing_a_cache_post_once(self, fake, tmp_path):
+        """Test that clients of several workers, sharing only the cache, post a key once"""
+        backend = SQLiteBackend(str(tmp_path / "cache.db"))
+        workers = [
+            Bugzilla(
+                url="https://bugzilla.example.com", api_key="test-key", transport=fake.transport(),
+                cache=ResponseCache(backend=backend),
+            )
+            for _ in range(3)
+        ]
+
+        results = await asyncio.gather(
+            *(bz.add_comment(1, "triaged", False, dedupe_key="k") for bz in workers), return_exceptions=True
+        )
+
+        assert len(self.posts(fake)) == 1
+        # the others found the key, answered or not yet
+        assert all(isinstance(r, UnknownOutcomeError) or r["id"] == 1000 for r in results)
+
+        for bz in workers:
+            await bz.close()
+        await backend.close()
+
+    async def test_lost_answer_is_not_posted_again(self):
+        """Test that a write which may have succeeded is reported, never repeated"""
+        posts = 0
+
+        def handler(request):
+            nonlocal posts
+            posts += 1
+            raise httpx.ReadTimeout("timed out", request=request)
+
+        bz = Bugzilla(
+            url="https://bugzilla.example.com", api_key="test-key",
+            transport=httpx.MockTransport(handler), cache=ResponseCache(),
+        )
+
+        with pytest.raises(httpx.ReadTimeout):
+            await bz.add_comment(1, "triaged", False, dedupe_key="k")
+        with pytest.raises(UnknownOutcomeError, match="may have been posted"):
+            await bz.add_comment(1, "triaged", False, dedupe_key="k")
+
+        assert posts == 1
+
+        await bz.close()
+
+
+    async def test_unsent_write_can_be_retried(self):
+        """Test that a key is released when the connection failed before the comment was sent"""
+        posts = 0
+
+        def handler(request):
+            nonlocal posts
+            posts += 1
+            if posts == 1:
+                raise httpx.ConnectError("connection refused", request=request)
+            return httpx.Response(201, json={"id": 1000})
+
+        bz = Bugzilla(
+            url="https://bugzilla.example.com", api_key="test-key",
+            transport=httpx.MockTransport(handler), cache=ResponseCache(),
+        )
+
+        results = await bz.add_comments([(1, "triaged", False)], dedupe_key="k")
+        retry = await bz.add_comments([(1, "triaged", False)], dedupe_key="k")
+
+        assert results == [{"bug_id": 1, "error": "connection refused"}]
+        assert retry == [{"bug_id": 1, "id": 1000}]
+        assert posts == 2
+
+        await bz.close()
+
+
+class TestBugzillaCache:
+    """Tests for cached read-only calls"""
+
+    BUG_URL = "https://bugzilla.mozilla.org/rest/bug/12345?api_key=test-key"
+
+    async def test_repeated_bug_info_is_cached(self, httpx_mock):
+        """Test that a fresh cached bug is served without a request"""
+        httpx_mock.add_response(url=self.BUG_URL, json={"bugs": [{"id": 12345}]})
+
+        bz = Bugzilla(url="https://bugzilla.mozilla.org", api_key="test-key", cache=ResponseCache())
+        first = await bz.bug_info(12345)
+        second = await bz.bug_info(12345)
+
+        assert first == second == {"id": 12345}
+        assert len(httpx_mock.get_requests()) == 1
+
+        await bz.close()
+
+    async def test_tenants_do_not_share_entries(self, httpx_mock):
+        """Test that the same request by another API key is not served from cache"""
+        httpx_mock.add_response(json={"bugs": [{"id": 12345}]}, is_reusable=True)
+        cache = ResponseCache()
+
+        a = Bugzilla(url="https://bugzilla.mozilla.org", api_key="key-a", cache=cache)
+        b = Bugzilla(url="https://bugzilla.mozilla.org", api_key="key-b", cache=cache)
+        await a.bug_info(12345)
+        await b.bug_info(12345)
+
+        assert len(httpx_mock.get_requests()) == 2
+
+        await a.close()
+        await b.close()
+
+    async def test_stale_entry_revalidated_with_etag(self, httpx_mock):
+        """Test that a stale entry with an ETag is revalidated by a conditional request"""
+        httpx_mock.add_response(url=self.BUG_URL, json={"bugs": [{"id": 12345}]}, headers={"ETag": '"v1"'})
+        httpx_mock.add_response(url=self.BUG_URL, status_code=304)
+
+        cache = ResponseCache(ttls={"bug": 0})
+        bz = Bugzilla(url="https://bugzilla.mozilla.org", api_key="test-key", cache=cache)
+        await bz.bug_info(12345)
+        result = await bz.bug_info(12345)
+
+        assert result == {"id": 12345}
+        assert httpx_mock.get_requests()[1].headers["If-None-Match"] == '"v1"'
+        assert cache.revalidations == 1
+
+        await bz.close()
+
+    async def test_stale_bug_revalidated_with_last_change_time(self, httpx_mock):
+        """Test that without ETag a stale bug is revalidated by probing last_change_time"""
+        bug = {"id": 12345, "summary": "Test bug", "last_change_time": "2023-01-20T15:45:00Z"}
+        httpx_mock.add_response(url=self.BUG_URL, json={"bugs": [bug]})
+        httpx_mock.add_response(
+            url=self.BUG_URL + "&include_fields=last_change_time",
+            json={"bugs": [{"last_change_time": "2023-01-20T15:45:00Z"}]},
+        )
+
+        cache = ResponseCache(ttls={"bug": 0})
+        bz = Bugzilla(url="https://bugzilla.mozilla.org", api_key="test-key", cache=cache)
+        await bz.bug_info(12345)
+        result = await bz.bug_info(12345)
+
+        assert result == bug
+        assert len(httpx_mock.get_requests()) == 2
+        assert cache.revalidations == 1
+
+        await bz.close()
+
+    async def test_changed_bug_is_downloaded_again(self, httpx_mock):
+        """Test that a changed last_change_time triggers a full download"""
+        httpx_mock.add_response(url=self.BUG_URL, json={"bugs": [{"id": 12345, "last_change_time": "1"}]})
+        httpx_mock.add_response(url=self.BUG_URL + "&include_fields=last_change_time", json={"bugs": [{"last_change_time": "2"}]})
+        httpx_mock.add_response(url=self.BUG_URL, json={"bugs": [{"id": 12345, "last_change_time": "2"}]})
+
+        bz = Bugzilla(url="https://bugzilla.mozilla.org", api_key="test-key", cache=ResponseCache(ttls={"bug": 0}))
+        await bz.bug_info(12345)
+        result = await bz.bug_info(12345)
+
+        assert result["last_change_time"] == "2"
+
+        await bz.close()
+
+    async def test_add_comment_invalidates_bug(self, httpx_mock):
+        """Test that writing a comment drops the cached comments of the bug"""
+        comments_url = TestBugzillaComments.COMMENTS_URL
+        httpx_mock.add_response(url=comments_url, json={"bugs": {"12345": {"comments": []}}})
+        httpx_mock.add_response(
+            url="https://bugzilla.mozilla.org/rest/bug/12345/comment?api_key=test-key",
+            method="POST", status_code=201, json={"id": 1},
+        )
+        httpx_mock.add_response(url=comments_url, json={"bugs": {"12345": {"comments": [{"id": 1}]}}})
+
+        bz = Bugzilla(url="https://bugzilla.mozilla.org", api_key="test-key", cache=ResponseCache())
+        assert await bz.comments(12345) == []
+        await bz.add_comment(12345, "Test comment", is_private=False)
+
+        assert await bz.comments(12345) == [Comment(id=1)]
+
+        await bz.close()
+
+    async def test_revoked_key_drops_its_entries(self, httpx_mock):
+        """Test that a 401 drops what the tenant cached, leaving other tenants"""
+        comments_url = TestBugzillaComments.COMMENTS_URL
+        httpx_mock.add_response(url=self.BUG_URL, json={"bugs": [{"id": 12345}]})
+        httpx_mock.add_response(url=comments_url, json={"bugs": {"12345": {"comments": []}}})
+        httpx_mock.add_response(url=self.BUG_URL, status_code=401)
+        httpx_mock.add_response(url=self.BUG_URL.replace("test-key", "other-key"), json={"bugs": [{"id": 12345}]})
+
+        cache = ResponseCache(ttls={"bug": 0, "comments": 60})
+        bz = Bugzilla(url="https://bugzilla.mozilla.org", api_key="test-key", cache=cache)
+        other = Bugzilla(url="https://bugzilla.mozilla.org", api_key="other-key", cache=cache)
+        await bz.bug_info(12345)
+        await bz.comments(12345)
+        await other.bug_info(12345)
+
+        with pytest.raises(httpx.TransportError):
+            await bz.bug_info(12345)
+
+        assert len(cache) == 1
+
+        await bz.close()
+        await other.close()
+
+
+class TestBugzillaCoalescing:
+    """Tests for de-duplication of identical concurrent calls"""
+
+    async def test_concurrent_bug_info_shares_one_request(self, httpx_mock):
+        """Test that concurrent identical calls issue a single upstream GET"""
+        async def respond(request: httpx.Request):
+            await asyncio.sleep(0.01)
+            return httpx.Response(200, json={"bugs": [{"id": 12345}]})
+
+        httpx_mock.add_callback(respond, url="https://bugzilla.mozilla.org/rest/bug/12345?api_key=test-key")
+
+        bz = Bugzilla(url="https://bugzilla.mozilla.org", api_key="test-key")
+        results = await asyncio.gather(*(bz.bug_info(12345) for _ in range(5)))
+
+        assert all(r == {"id": 12345} for r in results)
+        assert len(httpx_mock.get_requests()) == 1
+        assert bz.inflight.coalesced == 4
+
+        await bz.close()
+
+    async def test_different_params_are_not_coalesced(self, httpx_mock):
+        """Test that calls differing by params are sent separately"""
+        httpx_mock.add_response(json={"bugs": [{"id": 12345}]}, is_reusable=True)
+
+        bz = Bugzilla(url="https://bugzilla.mozilla.org", api_key="test-key")
+        await asyncio.gather(bz.bug_info(12345), bz.bug_info(12345, include_fields=["summary"]))
+
+        assert len(httpx_mock.get_requests()) == 2
+
+        await bz.close()
+
+
+class TestBugzillaIterQuicksearch:
+    """Tests for the auto-paginating quicksearch"""
+
+    @pytest.fixture
+    def fake(self):
+        return FakeBugzilla(bugs=[make_bug(i) for i in range(1, 451)])
+
+    async def test_walks_every_page(self, fake):
+        """Test that all matching bugs are yielded across pages"""
+        bz = Bugzilla(url="https://bugzilla.example.com", api_key="test-key", transport=fake.transport())
+
+        ids = [bug.id async for bug in bz.iter_quicksearch("ALL", page_size=200)]
+
+        assert ids == list(range(1, 451))
+        assert [r[2]["offset"] for r in fake.requests] == ["0", "200", "400"]
+
+        await bz.close()
+
+    async def test_max_results_bounds_the_last_page(self, fake):
+        """Test that no more than max_results bugs are requested"""
+        bz = Bugzilla(url="https://bugzilla.example.com", api_key="test-key", transport=fake.transport())
+
+        bugs = [bug async for bug in bz.iter_quicksearch("ALL", page_size=200, max_results=250, offset=10)]
+
+        assert len(bugs) == 250
+        assert bugs[0].id == 11
+        assert [(r[2]["offset"], r[2]["limit"]) for r in fake.requests] == [("10", "200"), ("210", "50")]
+
+        await bz.close()
+
+    async def test_next_page_is_prefetched(self, fake):
+        """Test that the next page is requested while the current one is consumed"""
+        bz = Bugzilla(url="https://bugzilla.example.com", api_key="test-key", transport=fake.transport())
+
+        bugs = bz.iter_quicksearch("ALL", page_size=200)
+        await bugs.__anext__()
+        await asyncio.sleep(0.01)
+
+        assert len(fake.requests) == 2
+
+        await bugs.aclose()
+        await bz.close()
+
+    async def test_essential_fields_requested(self, fake):
+        """Test that pages are projected like bugs_quicksearch"""
+        bz = Bugzilla(url="https://bugzilla.example.com", api_key="test-key", transport=fake.transport())
+
+        bug = await bz.iter_quicksearch("ALL", max_results=1).__anext__()
+
+        assert isinstance(bug, Bug)
+        assert bug.summary == "Bug 1"
+
+        await bz.close()
+
+
+class TestBugzillaChangedBugsSince:
+    """Tests for the incremental change feed"""
+
+    @pytest.fixture
+    def fake(self):
+        def change(when, field, removed, added):
+            return {"when": when, "who": "dev@example.com", "changes": [{"field_name": field, "removed": removed, "added": added}]}
+
+        return FakeBugzilla(
+            bugs=[
+                make_bug(1, last_change_time="2024-01-01T00:00:00Z"),
+                make_bug(2, last_change_time="2024-02-01T00:00:00Z"),
+                make_bug(3, last_change_time="2024-03-01T00:00:00Z", product="Thunderbird"),
+            ],
+            history={
+                2: [change("2023-12-01T00:00:00Z", "priority", "P3", "P2"), change("2024-02-01T00:00:00Z", "status", "NEW", "ASSIGNED")],
+                3: [change("2024-03-01T00:00:00Z", "resolution", "", "FIXED")],
+            },
+        )
+
+    async def test_only_changed_bugs_and_new_changes(self, fake):
+        """Test that only bugs and history entries after the watermark are returned"""
+        bz = Bugzilla(url="https://bugzilla.example.com", api_key="test-key", transport=fake.transport())
+
+        feed = await bz.changed_bugs_since("2024-01-15T00:00:00Z")
+
+        assert [b["bug_id"] for b in feed["bugs"]] == [2, 3]
+        assert feed["bugs"][0]["changes"] == [
+            {"when": "2024-02-01T00:00:00Z", "who": "dev@example.com", "field": "status", "removed": "NEW", "added": "ASSIGNED"}
+        ]
+        assert feed["watermark"] == "2024-03-01T00:00:00Z"
+        assert feed["truncated"] is False
+        # one search plus one history request per changed bug, none for bug 1
+        assert [r[1] for r in fake.requests] == ["/rest/bug", "/rest/bug/2/history", "/rest/bug/3/history"]
+
+        await bz.close()
+
+    async def test_product_filter(self, fake):
+        """Test that the product is sent to the search"""
+        bz = Bugzilla(url="https://bugzilla.example.com", api_key="test-key", transport=fake.transport())
+
+        feed = await bz.changed_bugs_since("2024-01-15T00:00:00Z", product="Thunderbird")
+
+        assert [b["bug_id"] for b in feed["bugs"]] == [3]
+
+        await bz.close()
+
+    async def test_no_changes_keeps_watermark(self, fake):
+        """Test that the watermark does not move when nothing changed"""
+        bz = Bugzilla(url="https://bugzilla.example.com", api_key="test-key", transport=fake.transport())
+
+        feed = await bz.changed_bugs_since("2025-01-01T00:00:00Z")
+
+        assert feed["bugs"] == []
+        assert feed["watermark"] == "2025-01-01T00:00:00Z"
+
+        await bz.close()
+
+    async def test_truncated(self, fake):
+        """Test that hitting the limit is reported"""
+        bz = Bugzilla(url="https://bugzilla.example.com", api_key="test-key", transport=fake.transport())
+
+        feed = await bz.changed_bugs_since("2023-01-01T00:00:00Z", limit=2)
+
+        assert len(feed["bugs"]) == 2
+        assert feed["truncated"] is True
+
+        await bz.close()
+
+    async def test_bugs_at_the_watermark_not_repeated(self, fake):
+        """Test that polling from the watermark does not report its bugs again"""
+        bz = Bugzilla(url="https://bugzilla.example.com", api_key="test-key", transport=fake.transport())
+
+        feed = await bz.changed_bugs_since("2024-01-15T00:00:00Z")
+        feed = await bz.changed_bugs_since(feed["watermark"], after_id=feed["after_id"])
+
+        assert feed["bugs"] == []
+        assert feed["watermark"] == "2024-03-01T00:00:00Z"
+        assert feed["after_id"] == 3
+
+        await bz.close()
+
+    async def test_many_bugs_changed_at_once(self):
+        """Test that more bugs than the limit changed at the same time are paged through"""
+        fake = FakeBugzilla(
+            bugs=[make_bug(i, last_change_time="2024-01-01T00:00:00Z") for i in range(1, 6)]
+            + [make_bug(6, last_change_time="2024-02-01T00:00:00Z")],
+            history={4: [{"when": "2024-01-01T00:00:00Z", "who": "dev@example.com", "changes": [{"field_name": "status", "removed": "NEW", "added": "ASSIGNED"}]}]},
+        )
+        bz = Bugzilla(url="https://bugzilla.example.com", api_key="test-key", transport=fake.transport())
+
+        seen = []
+        feed = await bz.changed_bugs_since("2023-12-01T00:00:00Z", limit=2)
+        seen += feed["bugs"]
+        while feed["truncated"]:
+            feed = await bz.changed_bugs_since(feed["watermark"], limit=2, after_id=feed["after_id"])
+            seen += feed["bugs"]
+
+        assert [b["bug_id"] for b in seen] == [1, 2, 3, 4, 5, 6]
+        # bug 4 was changed at the watermark of the call that listed it
+        assert [c["field"] for c in seen[3]["changes"]] == ["status"]
+        assert feed["watermark"] == "2024-02-01T00:00:00Z"
+
+        await bz.close()
+
+
+class TestBugzillaBugsComments:
+    """Tests for the comments of many bugs at once"""
+
+    @pytest.fixture
+    def fake(self):
+        def comment(bug_id, count, when, private=False):
+            return {"id": bug_id * 100 + count, "bug_id": bug_id, "count": count, "creator": "dev@example.com",
+                    "creation_time": when, "text": f"comment {count}", "is_private": private, "time": when}
+
+        return FakeBugzilla(
+            bugs=[make_bug(i) for i in range(1, 251)],
+            comments={
+                1: [comment(1, 0, "2024-01-01T00:00:00Z"), comment(1, 1, "2024-02-01T00:00:00Z", private=True)],
+                2: [comment(2, 0, "2024-01-01T00:00:00Z")],
+            },
+            max_latency=0.005,
+        )
+
+    async def test_keyed_by_bug_in_requested_order(self, fake):
+        bz = Bugzilla(url="https://bugzilla.example.com", api_key="test-key", transport=fake.transport())
+
+        results = await bz.bugs_comments([3, 1, 2, 1])
+
+        assert list(results) == [3, 1, 2]
+        assert results[3] == []
+        assert [c.id for c in results[1]] == [100, 101]
+        assert isinstance(results[2][0], Comment)
+        assert [(r[1], r[2]["ids"]) for r in fake.requests] == [("/rest/bug/comment", "3,1,2")]
+        assert "text" in fake.requests[0][2]["include_fields"]
+
+        await bz.close()
+
+    async def test_batches_run_concurrently_within_bound(self, fake):
+        """Test that ids are split into URL-safe batches, at most max_concurrent_batches in flight"""
+        bz = Bugzilla(url="https://bugzilla.example.com", api_key="test-key", transport=fake.transport())
+        bz.max_concurrent_batches = 2
+        in_flight = peak = 0
+        send = bz._send
+
+        async def counting_send(*args, **kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            try:
+                return await send(*args, **kwargs)
+            finally:
+                in_flight -= 1
+
+        bz._send = counting_send
+        results = await bz.bugs_comments(list(range(1, 251)))
+
+        assert len(results) == 250
+        assert len(fake.requests) == 3
+        assert peak == 2
+
+        await bz.close()
+
+    async def test_failed_batch_fetched_bug_by_bug(self, fake):
+        """Test that one missing bug does not fail the comments of the others"""
+        bz = Bugzilla(url="https://bugzilla.example.com", api_key="test-key", transport=fake.transport())
+
+        results = await bz.bugs_comments([1, 9999, 2])
+
+        assert [c.id for c in results[1]] == [100, 101]
+        assert [c.id for c in results[2]] == [200]
+        assert "error" in results[9999]
+        assert [r[1] for r in fake.requests] == [
+            "/rest/bug/comment", "/rest/bug/1/comment", "/rest/bug/9999/comment", "/rest/bug/2/comment"
+        ]
+
+        await bz.close()
+
+    async def test_failing_bugzilla_not_asked_bug_by_bug(self, fake):
+        """Test that a batch failing for another reason than its ids is reported without more requests"""
+        fake.error_rate = 1.0
+        bz = Bugzilla(
+            url="https://bugzilla.example.com", api_key="test-key", transport=fake.transport(), retry=Retry(attempts=1)
+        )
+
+        results = await bz.bugs_comments([1, 9999, 2])
+
+        assert results == {bug_id: {"error": "Failed to fetch API with Status code: 503"} for bug_id in (1, 9999, 2)}
+        assert [r[1] for r in fake.requests] == ["/rest/bug/comment"]
+
+        await bz.close()
+
+    async def test_new_since(self, fake):
+        bz = Bugzilla(url="https://bugzilla.example.com", api_key="test-key", transport=fake.transport())
+
+        results = await bz.bugs_comments([1, 2], new_since="2024-01-15T00:00:00Z")
+
+        assert [c.id for c in results[1]] == [101]
+        assert results[2] == []
+
+        await bz.close()
+
+    async def test_cached_and_invalidated_by_new_comment(self, fake):
+        bz = Bugzilla(
+            url="https://bugzilla.example.com", api_key="test-key", transport=fake.transport(), cache=ResponseCache()
+        )
+
+        await bz.bugs_comments([1, 2])
+        await bz.bugs_comments([1, 2])
+        assert len(fake.requests) == 1
+
+        await bz.add_comment(2, "new", is_private=False)
+        results = await bz.bugs_comments([1, 2])
+
+        assert [c.text for c in results[2]] == ["comment 0", "new"]
+
+        await bz.close()
+
+
+class TestBugzillaBugDossier:
+    """Tests for a bug with its comments, history and attachments"""
+
+    @pytest.fixture
+    def fake(self):
+        return FakeBugzilla(
+            bugs=[make_bug(1)],
+            comments={1: [{"id": 100, "bug_id": 1, "count": 0, "creator": "dev@example.com",
+                           "creation_time": "2024-01-01T00:00:00Z", "text": "crash", "is_private": False}]},
+            history={1: [{"when": "2024-01-02T00:00:00Z", "who": "dev@example.com",
+                          "changes": [{"field_name": "status", "removed": "NEW", "added": "ASSIGNED"}]}]},
+            attachments={1: [{"id": 7, "bug_id": 1, "file_name": "log.txt", "size": 4, "is_private": False,
+                              "data": "bG9nCg=="}]},
+            max_latency=0.01,
+        )
+
+    async def test_requests_run_concurrently(self, fake):
+        bz = Bugzilla(url="https://bugzilla.example.com", api_key="test-key", transport=fake.transport())
+        in_flight = peak = 0
+        send = bz._send
+
+        async def counting_send(*args, **kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            try:
+                return await send(*args, **kwargs)
+            finally:
+                in_flight -= 1
+
+        bz._send = counting_send
+        dossier = await bz.bug_dossier(1, include_fields=["summary"])
+
+        assert dossier["bug"]["summary"] == "Bug 1"
+        assert [c.text for c in dossier["comments"]] == ["crash"]
+        assert dossier["history"][0]["changes"][0]["added"] == "ASSIGNED"
+        assert dossier["attachments"] == [{"id": 7, "file_name": "log.txt", "size": 4, "is_private": False}]
+        assert sorted(r[1] for r in fake.requests) == [
+            "/rest/bug/1", "/rest/bug/1/attachment", "/rest/bug/1/comment", "/rest/bug/1/history"
+        ]
+        assert peak == 4
+
+        await bz.close()
+
+    async def test_missing_bug(self, fake):
+        bz = Bugzilla(url="https://bugzilla.example.com", api_key="test-key", transport=fake.transport())
+
+        with pytest.raises(httpx.TransportError):
+            await bz.bug_dossier(9999)
+
+        await bz.close()
+
+
+class TestBugzillaMetrics:
+    """Tests for the metrics recorded by the client"""
+
+    BUG_URL = "https://bugzilla.mozilla.org/rest/bug/12345?api_key=secret-key"
+
+    async def test_upstream_request_recorded(self, httpx_mock):
+        """Test that duration, status and bytes are recorded per host and endpoint"""
+        httpx_mock.add_response(url=self.BUG_URL, json={"bugs": [{"id": 12345}]})
+        metrics = Metrics()
+        bz = Bugzilla(url="https://bugzilla.mozilla.org", api_key="secret-key", metrics=metrics)
+
+        await bz.bug_info(12345)
+
+        labels = ("bugzilla.mozilla.org", "GET", "/rest/bug/{id}")
+        assert metrics.upstream_responses.values == {(*labels, "200"): 1}
+        assert sum(metrics.upstream_duration.series[labels][:-1]) == 1
+        assert metrics.upstream_received_bytes.values == {
+            ("bugzilla.mozilla.org", "/rest/bug/{id}"): len(json.dumps({"bugs": [{"id": 12345}]}, separators=(",", ":")))
+        }
+        assert "secret-key" not in metrics.render()
+
+        await bz.close()
+
+    async def test_retries_and_transport_errors_recorded(self, httpx_mock):
+        """Test that every attempt is recorded, failed ones with the `error` status"""
+        httpx_mock.add_exception(httpx.ConnectError("Connection refused"), url=self.BUG_URL)
+        httpx_mock.add_response(url=self.BUG_URL, json={"bugs": [{"id": 12345}]})
+        metrics = Metrics()
+        bz = Bugzilla(
+            url="https://bugzilla.mozilla.org", api_key="secret-key", retry=Retry(backoff=0), metrics=metrics
+        )
+
+        await bz.bug_info(12345)
+
+        labels = ("bugzilla.mozilla.org", "GET", "/rest/bug/{id}")
+        assert metrics.upstream_responses.values == {(*labels, "error"): 1, (*labels, "200"): 1}
+        assert metrics.upstream_retries.values == {("bugzilla.mozilla.org",): 1}
+
+        await bz.close()
+
+    async def test_rejected_requests_recorded(self):
+        """Test that requests refused by an open circuit are counted"""
+        metrics = Metrics()
+        breaker = CircuitBreaker(failure_threshold=1)
+        breaker.record_failure()
+        bz = Bugzilla(url="https://bugzilla.mozilla.org", api_key="secret-key", breaker=breaker, metrics=metrics)
+
+        with pytest.raises(CircuitOpenError):
+            await bz.bug_info(12345)
+
+        assert metrics.upstream_rejected.values == {("bugzilla.mozilla.org",): 1}
+
+        await bz.close()
+
+    async def test_cache_lookups_recorded(self, httpx_mock):
+        """Test that cache misses and hits are counted per endpoint"""
+        httpx_mock.add_response(url=self.BUG_URL, json={"bugs": [{"id": 12345}]})
+        metrics = Metrics()
+        bz = Bugzilla(url="https://bugzilla.mozilla.org", api_key="secret-key", cache=ResponseCache(), metrics=metrics)
+
+        await bz.bug_info(12345)
+        await bz.bug_info(12345)
+
+        assert metrics.cache_lookups.values == {
+            ("bugzilla.mozilla.org", "bug", "miss"): 1,
+            ("bugzilla.mozilla.org", "bug", "hit"): 1,
+        }
+
+        await bz.close()
+
+
+class TestBugzillaResilience:
+    """Tests for timeouts, retries and the circuit breaker"""
+
+    BUG_URL = "https://bugzilla.mozilla.org/rest/bug/12345?api_key=test-key"
+
+    def test_default_timeouts(self):
+        """Test that the client never waits forever on the upstream"""
+        bz = Bugzilla(url="https://bugzilla.mozilla.org", api_key="test-key")
+
+        assert bz.client.timeout.connect == 5.0
+        assert bz.client.timeout.read == 30.0
+        assert bz.client.timeout.pool == 10.0
+
+    def test_custom_timeouts(self):
+        """Test that timeouts are configurable"""
+        bz = Bugzilla(url="https://bugzilla.mozilla.org", api_key="test-key", timeout=httpx.Timeout(1.0))
+
+        assert bz.client.timeout.read == 1.0
+
+    async def test_get_retried_on_server_error(self, httpx_mock):
+        """Test that a GET is retried after a 503"""
+        httpx_mock.add_response(url=self.BUG_URL, status_code=503)
+        httpx_mock.add_response(url=self.BUG_URL, json={"bugs": [{"id": 12345}]})
+
+        bz = Bugzilla(url="https://bugzilla.mozilla.org", api_key="test-key", retry=Retry(backoff=0))
+
+        assert await bz.bug_info(12345) == {"id": 12345}
+        assert bz.retry.retries == 1
+
+        await bz.close()
+
+    async def test_get_retried_on_connection_error(self, httpx_mock):
+        """Test that a GET is retried after a connection error"""
+        httpx_mock.add_exception(httpx.ConnectError("refused"), url=self.BUG_URL)
+        httpx_mock.add_response(url=self.BUG_URL, json={"bugs": [{"id": 12345}]})
+
+        bz = Bugzilla(url="https://bugzilla.mozilla.org", api_key="test-key", retry=Retry(backoff=0))
+
+        assert await bz.bug_info(12345) == {"id": 12345}
+
+        await bz.close()
+
+    async def test_retry_after_is_honoured(self, httpx_mock):
+        """Test that the delay asked by a 429 Retry-After is used"""
+        httpx_mock.add_response(url=self.BUG_URL, status_code=429, headers={"Retry-After": "0"})
+        httpx_mock.add_response(url=self.BUG_URL, json={"bugs": [{"id": 12345}]})
+
+        # a huge backoff would hang the test if Retry-After was ignored
+        bz = Bugzilla(url="https://bugzilla.mozilla.org", api_key="test-key", retry=Retry(backoff=1000, max_backoff=1000))
+
+        assert await bz.bug_info(12345) == {"id": 12345}
+
+        await bz.close()
+
+    async def test_retries_are_bounded(self, httpx_mock):
+        """Test that the last failing response is reported once attempts run out"""
+        httpx_mock.add_response(url=self.BUG_URL, status_code=502, is_reusable=True)
+
+        bz = Bugzilla(url="https://bugzilla.mozilla.org", api_key="test-key", retry=Retry(attempts=3, backoff=0))
+
+        with pytest.raises(httpx.TransportError) as exc_info:
+            await bz.bug_info(12345)
+
+        assert "Status code: 502" in str(exc_info.value)
+        assert len(httpx_mock.get_requests()) == 3
+        assert bz.retry.stats() == {"retries": 2, "exhausted": 1}
+
+        await bz.close()
+
+    async def test_post_is_not_retried(self, httpx_mock):
+        """Test that add_comment is never sent twice"""
+        httpx_mock.add_response(
+            url="https://bugzilla.mozilla.org/rest/bug/12345/comment?api_key=test-key",
+            method="POST",
+            status_code=503,
+        )
+
+        bz = Bugzilla(url="https://bugzilla.mozilla.org", api_key="test-key", retry=Retry(backoff=0))
+
+        with pytest.raises(httpx.TransportError):
+            await bz.add_comment(12345, "Test comment", is_private=False)
+
+        assert len(httpx_mock.get_requests()) == 1
+
+        await bz.close()
+
+    async def test_open_circuit_fails_fast(self, httpx_mock):
+        """Test that requests are rejected without being sent while the circuit is open"""
+        httpx_mock.add_response(url=self.BUG_URL, status_code=500, is_reusable=True)
+
+        bz = Bugzilla(
+            url="https://bugzilla.mozilla.org",
+            api_key="test-key",
+            retry=Retry(attempts=1),
+            breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60),
+        )
+
+        for _ in range(2):
+            with pytest.raises(httpx.TransportError):
+                await bz.bug_info(12345)
+
+        with pytest.raises(CircuitOpenError):
+            await bz.bug_info(12345)
+
+        assert len(httpx_mock.get_requests()) == 2
+        assert bz.breaker.stats() == {"state": "open", "failures": 2, "opened": 1, "rejected": 1}
+
+        await bz.close()
+
+    async def test_cancelled_probe_does_not_block_the_circuit(self):
+        """Test that a probe cancelled before its answer lets the next request probe again"""
+        delay = 1.0
+
+        async def handler(request):
+            await asyncio.sleep(delay)
+            return httpx.Response(200, json={"bugs": [{"id": 1}]})
+
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        bz = Bugzilla(url="https://bugzilla.example.com", api_key="key", transport=httpx.MockTransport(handler), breaker=breaker)
+
+        probe = asyncio.create_task(bz.bug_info(1))
+        await asyncio.sleep(0.01)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        # the shared request is cancelled once no caller waits for it
+        await asyncio.sleep(0.01)
+
+        assert breaker.state == CircuitBreaker.OPEN
+
+        delay = 0
+        assert (await bz.bug_info(1))["id"] == 1
+        assert breaker.state == CircuitBreaker.CLOSED
+
+        await bz.close()
+
+
+class TestBugzillaLimits:
+    """Tests for the per tenant concurrency bound and the per instance rate limit"""
+
+    @staticmethod
+    def slow_transport(delay=0.02):
+        state = {"in_flight": 0, "peak": 0}
+
+        async def handler(request):
+            state["in_flight"] += 1
+            state["peak"] = max(state["peak"], state["in_flight"])
+            await asyncio.sleep(delay)
+            state["in_flight"] -= 1
+            bug_id = int(request.url.path.rsplit("/", 1)[1])
+            return httpx.Response(200, json={"bugs": [{"id": bug_id}]})
+
+        return httpx.MockTransport(handler), state
+
+    async def test_requests_wait_for_a_slot(self):
+        """Test that a tenant never has more than max_concurrent_requests in flight, the others queue"""
+        transport, state = self.slow_transport()
+        metrics = Metrics()
+        bz = Bugzilla(
+            url="https://bugzilla.example.com", api_key="key", transport=transport,
+            metrics=metrics, max_concurrent_requests=2,
+        )
+
+        bugs = await asyncio.gather(*(bz.bug_info(i) for i in range(6)))
+
+        assert [bug["id"] for bug in bugs] == list(range(6))
+        assert state["peak"] == 2
+        waits = metrics.upstream_queue_wait.series[("bugzilla.example.com", "tenant")]
+        assert sum(waits[:-1]) == 6
+        assert waits[-1] >= 0.02 * 2 + 0.04 * 2
+
+        await bz.close()
+
+    async def test_rate_limit_delays_requests(self):
+        """Test that requests over the rate limit are sent later rather than failing"""
+        transport, _ = self.slow_transport(delay=0)
+        metrics = Metrics()
+        bz = Bugzilla(
+            url="https://bugzilla.example.com", api_key="key", transport=transport,
+            metrics=metrics, rate_limiter=TokenBucket(rate=50, burst=1),
+        )
+
+        started = asyncio.get_running_loop().time()
+        await asyncio.gather(*(bz.bug_info(i) for i in range(4)))
+
+        assert asyncio.get_running_loop().time() - started >= 0.05
+        assert bz.rate_limiter.delayed == 3
+        assert sum(metrics.upstream_queue_wait.series[("bugzilla.example.com", "rate_limit")][:-1]) == 4
+
+        await bz.close()
+
+
+class TestBugzillaQuicksearchSyntax:
+    """Tests for quicksearch_syntax method"""
+
+    DOCS_URL = "https://bugzilla.mozilla.org/page.cgi?id=quicksearch.html"
+    DOCS_HTML = (
+        "<html><head><title>Quicksearch</title><script>var x = 1;</script></head>"
+        "<body><h1>Quicksearch</h1><p>Search   bugs &amp; more</p>"
+        "<table><tr><td>product</td><td>Product name</td></tr></table></body></html>"
+    )
+
+    async def test_quicksearch_syntax_html(self, httpx_mock):
+        """Test that the documentation page is returned as is"""
+        httpx_mock.add_response(url=self.DOCS_URL, text=self.DOCS_HTML)
+
+        bz = Bugzilla(url="https://bugzilla.mozilla.org", api_key="test-key")
+
+        assert await bz.quicksearch_syntax() == self.DOCS_HTML
+
+        await bz.close()
+
+    async def test_quicksearch_syntax_compact(self, httpx_mock):
+        """Test that compact mode strips markup and scripts"""
+        httpx_mock.add_response(url=self.DOCS_URL, text=self.DOCS_HTML)
+
+        bz = Bugzilla(url="https://bugzilla.mozilla.org", api_key="test-key")
+        result = await bz.quicksearch_syntax(compact=True)
+
+        assert result == "Quicksearch\nSearch bugs & more\nproduct | Product name"
+
+        await bz.close()
+
+    async def test_quicksearch_syntax_failure(self, httpx_mock):
+        """Test that a non-200 status raises"""
+        httpx_mock.add_response(url=self.DOCS_URL, status_code=404)
+
+        bz = Bugzilla(url="https://bugzilla.mozilla.org", api_key="test-key")
+
+        with pytest.raises(httpx.TransportError) as exc_info:
+            await bz.quicksearch_syntax()
+
+        assert "Status code: 404" in str(exc_info.value)
+
+        await bz.close()
+
+    async def test_quicksearch_syntax_cached_per_instance(self, httpx_mock):
+        """Test that tenants of one Bugzilla share a single concurrent download"""
+        async def respond(request: httpx.Request):
+            await asyncio.sleep(0.01)
+            return httpx.Response(200, text=self.DOCS_HTML)
+
+        httpx_mock.add_callback(respond, url=self.DOCS_URL)
+        cache = ResponseCache()
+
+        a = Bugzilla(url="https://bugzilla.mozilla.org", api_key="key-a", cache=cache)
+        b = Bugzilla(url="https://bugzilla.mozilla.org", api_key="key-b", cache=cache)
+        results = await asyncio.gather(
+            a.quicksearch_syntax(), b.quicksearch_syntax(), a.quicksearch_syntax(compact=True)
+        )
+        again = await b.quicksearch_syntax(compact=True)
+
+        assert results[0] == results[1] == self.DOCS_HTML
+        assert again == results[2]
+        assert len(httpx_mock.get_requests()) == 1
+
+        await a.close()
+        await b.close()
+
+
 class TestBugzillaClose:
     """Tests for close method"""
 
@@ -0,0 +1,252 @@
+"""Unit tests for the response cache"""
+
+import asyncio
+from unittest.mock import patch
+import pytest
+from bugzilla_mcp.utils import ResponseCache
+from bugzilla_mcp.utils.cache import MemoryBackend, backend_from_url
+from bugzilla_mcp.utils.cache_server import CacheServer
+from bugzilla_mcp.utils.disk_cache import SQLiteBackend
+from bugzilla_mcp.utils.models import Bug
+from bugzilla_mcp.utils.resp import RespBackend
+
+
+class TestResponseCache:
+    """Tests for ResponseCache"""
+
+    async def test_set_and_get(self):
+        """Test that a stored response is returned while fresh"""
+        cache = ResponseCache()
+        await cache.set("k", "bug", {"id": 1}, size=10)
+
+        entry = await cache.get("k")
+
+        assert entry.value == {"id": 1}
+        assert entry.is_fresh()
+        assert cache.hits == 1
+
+    async def test_missing_key(self):
+        """Test that unknown keys are a miss"""
+        cache = ResponseCache()
+
+        assert await cache.get("k") is None
+        assert cache.misses == 1
+
+    async def test_entries_expire_after_ttl(self):
+        """Test that entries become stale after the endpoint TTL"""
+        cache = ResponseCache(ttls={"bug": 10})
+
+        with patch("bugzilla_mcp.utils.cache.time.monotonic", return_value=100.0):
+            await cache.set("k", "bug", {"id": 1}, size=10)
+
+        with patch("bugzilla_mcp.utils.cache.time.monotonic", return_value=111.0):
+            entry = await cache.get("k")
+            assert entry is not None
+            assert not entry.is_fresh()
+
+            await cache.refresh("k", "bug")
+            assert entry.is_fresh()
+
+        assert cache.revalidations == 1
+
+    async def test_lru_eviction_by_bytes(self):
+        """Test that the least recently used entries are evicted past max_bytes"""
+        cache = ResponseCache(max_bytes=100)
+        await cache.set("a", "bug", "a", size=40)
+        await cache.set("b", "bug", "b", size=40)
+        # touch a so that b is the least recently used
+        await cache.get("a")
+        await cache.set("c", "bug", "c", size=40)
+
+        assert await cache.get("b") is None
+        assert await cache.get("a") is not None
+        assert cache.bytes == 80
+        assert cache.evictions == 1
+
+    async def test_oversized_entries_are_not_stored(self):
+        """Test that a response larger than the cache is skipped"""
+        cache = ResponseCache(max_bytes=10)
+        await cache.set("k", "bug", "v", size=11)
+
+        assert len(cache) == 0
+
+    async def test_invalidate_tag(self):
+        """Test that invalidating a tag drops every entry carrying it"""
+        cache = ResponseCache()
+        await cache.set("info", "bug", 1, size=1, tags=("bug:1",))
+        await cache.set("comments", "comments", 2, size=1, tags=("bug:1",))
+        await cache.set("other", "bug", 3, size=1, tags=("bug:2",))
+
+        await cache.invalidate("bug:1")
+
+        assert await cache.get("info") is None
+        assert await cache.get("comments") is None
+        assert await cache.get("other") is not None
+        assert cache.bytes == 1
+
+    def test_key_isolates_tenants(self):
+        """Test that keys differ between tenants and ignore param order"""
+        a = ResponseCache.key("tenant-a", "bug", "/bug/1", {"x": 1, "y": 2})
+
+        assert a == ResponseCache.key("tenant-a", "bug", "/bug/1", {"y": 2, "x": 1})
+        assert a != ResponseCache.key("tenant-b", "bug", "/bug/1", {"x": 1, "y": 2})
+
+    async def test_get_or_load_single_flight(self):
+        """Test that concurrent misses share one load"""
+        cache = ResponseCache()
+        calls = 0
+
+        async def load():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "value", 5
+
+        results = await asyncio.gather(*(cache.get_or_load("k", "docs", load) for _ in range(5)))
+
+        assert results == ["value"] * 5
+        assert calls == 1
+        assert await cache.get_or_load("k", "docs", load) == "value"
+        assert calls == 1
+
+    async def test_get_or_load_error_is_shared_and_not_cached(self):
+        """Test that a failed load raises for every waiter and is retried later"""
+        cache = ResponseCache()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+
+        results = await asyncio.gather(
+            cache.get_or_load("k", "docs", fail), cache.get_or_load("k", "docs", fail), return_exceptions=True
+        )
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+        async def load():
+            return "value", 5
+
+        assert await cache.get_or_load("k", "docs", load) == "value"
+
+    async def test_clear_namespace(self):
+        """Test that clearing a tenant leaves the entries of the others"""
+        cache = ResponseCache()
+        await cache.set(ResponseCache.key("a", "bug", "/bug/1", {}), "bug", 1, size=1)
+        await cache.set(ResponseCache.key("b", "bug", "/bug/1", {}), "bug", 2, size=1)
+
+        await cache.clear("a")
+
+        assert await cache.get(ResponseCache.key("a", "bug", "/bug/1", {})) is None
+        assert (await cache.get(ResponseCache.key("b", "bug", "/bug/1", {}))).value == 2
+
+
+@pytest.fixture(params=["memory", "sqlite", "resp"])
+async def backend(request, tmp_path):
+    """Each cache backend, the RESP one against the bundled cache server"""
+
+    if request.param == "memory":
+        yield MemoryBackend()
+    elif request.param == "sqlite":
+        backend = SQLiteBackend(str(tmp_path / "cache.db"))
+        yield backend
+        await backend.close()
+    else:
+        server = await CacheServer().serve_unix(str(tmp_path / "cache.sock"))
+        backend = RespBackend(f"unix://{tmp_path / 'cache.sock'}")
+        yield backend
+        await backend.close()
+        server.close()
+        await server.wait_closed()
+
+
+class TestBackends:
+    """Tests run against every backend through ResponseCache"""
+
+    async def test_set_and_get(self, backend):
+        cache = ResponseCache(backend=backend)
+        value = {"bugs": [Bug(id=1, summary="crash")], "faults": []}
+
+        await cache.set("t|bug|/bug/1?", "bug", value, size=100, etag='"v1"', last_change_time="2024-01-01T00:00:00Z")
+        entry = await cache.get("t|bug|/bug/1?")
+
+        assert entry.value == value
+        assert entry.etag == '"v1"'
+        assert entry.last_change_time == "2024-01-01T00:00:00Z"
+        assert entry.is_fresh()
+        assert await cache.get("t|bug|/bug/2?") is None
+
+    async def test_stale_and_refresh(self, backend):
+        cache = ResponseCache(ttls={"bug": 0}, backend=backend)
+        await cache.set("t|bug|k", "bug", "v", size=1)
+
+        assert not (await cache.get("t|bug|k")).is_fresh()
+
+        cache.ttls["bug"] = 60
+        await cache.refresh("t|bug|k", "bug")
+
+        assert (await cache.get("t|bug|k")).is_fresh()
+
+    async def test_invalidate_and_clear(self, backend):
+        cache = ResponseCache(backend=backend)
+        await cache.set("a|bug|1", "bug", 1, size=1, tags=("bug:1",))
+        await cache.set("a|bug|2", "bug", 2, size=1, tags=("bug:2",))
+        await cache.set("b|bug|1", "bug", 3, size=1, tags=("bug:1",))
+
+        await cache.invalidate("bug:1")
+
+        assert await cache.get("a|bug|1") is None
+        assert await cache.get("b|bug|1") is None
+        assert await cache.get("a|bug|2") is not None
+
+        await cache.set("b|bug|1", "bug", 3, size=1)
+        await cache.clear("a")
+
+        assert await cache.get("a|bug|2") is None
+        assert await cache.get("b|bug|1") is not None
+
+        await cache.clear()
+
+        assert await cache.get("b|bug|1") is None
+
+    async def test_records(self, backend):
+        """Test that a record is added once and outlives invalidate and clear"""
+        cache = ResponseCache(backend=backend)
+
+        assert await cache.add_record("a|writes|k", "writes", {}) is True
+        assert await cache.add_record("a|writes|k", "writes", {"id": 2}) is False
+        assert await cache.get_record("a|writes|k") == {}
+
+        await cache.set_record("a|writes|k", "writes", {"id": 1})
+        await cache.clear("a")
+        await cache.clear()
+
+        assert await cache.get_record("a|writes|k") == {"id": 1}
+
+        await cache.delete_record("a|writes|k")
+
+        assert await cache.get_record("a|writes|k") is None
+        assert await cache.add_record("a|writes|k", "writes", {}) is True
+
+    async def test_records_expire(self, backend):
+        cache = ResponseCache(ttls={"writes": 0.01}, backend=backend)
+        await cache.add_record("a|writes|k", "writes", {})
+
+        await asyncio.sleep(0.05)
+
+        assert await cache.get_record("a|writes|k") is None
+        assert await cache.add_record("a|writes|k", "writes", {}) is True
+
+
+class TestBackendFromUrl:
+    """Tests for backend_from_url"""
+
+    def test_urls(self, tmp_path):
+        assert isinstance(backend_from_url(None), MemoryBackend)
+        assert isinstance(backend_from_url("memory://", max_bytes=10), MemoryBackend)
+        assert backend_from_url(f"sqlite://{tmp_path}/cache.db").path == f"{tmp_path}/cache.db"
+        assert backend_from_url("redis://localhost:6379/0", prefix="staging:").prefix == "staging:"
+        assert isinstance(backend_from_url("unix:///run/cache.sock"), RespBackend)
+
+    def test_unsupported_url(self):
+        with pytest.raises(ValueError, match="unsupported cache URL"):
+            backend_from_url("memcached://localhost")
@@ -0,0 +1,57 @@
+"""Unit tests for the binary format of shared cache entries"""
+
+import time
+import pytest
+from bugzilla_mcp.utils import codec
+from bugzilla_mcp.utils.cache import CacheEntry
+from bugzilla_mcp.utils.models import Bug, Comment, SearchRow
+
+
+def entry(value, **fields) -> CacheEntry:
+    return CacheEntry(value=value, size=10, expires=time.monotonic() + 60, **fields)
+
+
+class TestCodec:
+    """Tests for encode and decode"""
+
+    def test_roundtrip_json(self):
+        original = entry({"bugs": [{"id": 1, "cc": ["a@example.com"], "flags": None}], 2: 0.5}, etag='"v1"', tags=("bug:1",))
+
+        decoded = codec.decode(codec.encode(original))
+
+        assert decoded.value == original.value
+        assert decoded.etag == '"v1"'
+        assert decoded.tags == ("bug:1",)
+        assert decoded.expires == pytest.approx(original.expires, abs=0.01)
+
+    def test_roundtrip_records(self):
+        value = {
+            "bugs": [Bug(id=1, summary="crash"), Bug(id=2)],
+            "rows": [SearchRow(bug_id=1)],
+            "comments": [Comment(id=3, text="hello", is_private=True)],
+        }
+
+        assert codec.decode(codec.encode(entry(value))).value == value
+
+    def test_large_entries_are_compressed(self):
+        value = [Bug(id=i, summary="Crash on startup") for i in range(200)]
+
+        data = codec.encode(entry(value))
+
+        assert data[1] & 1
+        assert len(data) < 1000
+        assert codec.decode(data).value == value
+
+    def test_unknown_objects_are_refused(self):
+        with pytest.raises(ValueError):
+            codec.encode(entry(object()))
+
+    def test_other_formats_are_refused(self):
+        data = codec.encode(entry("v"))
+
+        with pytest.raises(ValueError):
+            codec.decode(bytes([codec.FORMAT + 1]) + data[1:])
+        with pytest.raises(ValueError):
+            codec.decode(data[:3] + b"\xff\x00")
+        with pytest.raises(ValueError):
+            codec.decode(b"\x80\x04pickle")
@@ -0,0 +1,93 @@
+"""Unit tests for the SQLite cache backend"""
+
+import sqlite3
+from unittest.mock import patch
+from bugzilla_mcp.utils import ResponseCache
+from bugzilla_mcp.utils import disk_cache
+from bugzilla_mcp.utils.disk_cache import SQLiteBackend
+from bugzilla_mcp.utils.models import Bug
+
+
+class TestSQLiteBackend:
+    """Tests for SQLiteBackend"""
+
+    async def test_entries_survive_restart(self, tmp_path):
+        path = str(tmp_path / "cache.db")
+        cache = ResponseCache(backend=SQLiteBackend(path))
+        await cache.set("t|bug|k", "bug", [Bug(id=1)], size=10, tags=("bug:1",))
+        await cache.close()
+
+        restarted = ResponseCache(backend=SQLiteBackend(path))
+        entry = await restarted.get("t|bug|k")
+
+        assert entry.value == [Bug(id=1)]
+        assert entry.is_fresh()
+
+        await restarted.invalidate("bug:1")
+        assert await restarted.get("t|bug|k") is None
+
+        await restarted.close()
+
+    async def test_entries_dropped_after_keep(self, tmp_path):
+        backend = SQLiteBackend(str(tmp_path / "cache.db"))
+        cache = ResponseCache(ttls={"bug": 10}, backend=backend, stale_ttl=20)
+        await cache.set("t|bug|k", "bug", "v", size=1)
+
+        with patch("bugzilla_mcp.utils.disk_cache.time.time", return_value=disk_cache.time.time() + 31):
+            assert await cache.get("t|bug|k") is None
+            backend.evict()
+
+        assert len(backend) == 0
+        assert backend.db.execute("SELECT count(*) FROM tags").fetchone()[0] == 0
+
+        await cache.close()
+
+    async def test_oldest_entries_evicted_past_max_bytes(self, tmp_path):
+        backend = SQLiteBackend(str(tmp_path / "cache.db"), max_bytes=1000)
+        cache = ResponseCache(backend=backend)
+
+        for i in range(disk_cache.EVICT_EVERY):
+            await cache.set(f"t|bug|{i}", "bug", f"{i:0>50}", size=50)
+
+        assert backend.bytes <= 1000
+        assert backend.evictions > 0
+        assert await cache.get(f"t|bug|{disk_cache.EVICT_EVERY - 1}") is not None
+        assert await cache.get("t|bug|0") is None
+
+        await cache.close()
+
+    async def test_size_tracked_on_every_change(self, tmp_path):
+        backend = SQLiteBackend(str(tmp_path / "cache.db"))
+        cache = ResponseCache(backend=backend)
+
+        def stored():
+            return backend.db.execute("SELECT total(length(data)) FROM entries").fetchone()[0]
+
+        await cache.set("t|bug|1", "bug", "a", size=1, tags=("bug:1",))
+        await cache.set("t|bug|2", "bug", "b", size=1)
+        await cache.set("t|bug|1", "bug", "a much longer value", size=1, tags=("bug:1",))
+        assert backend.bytes == stored() > 0
+
+        await cache.invalidate("bug:1")
+        assert backend.bytes == stored() > 0
+
+        await cache.clear()
+        assert backend.bytes == 0
+
+        await cache.close()
+
+    async def test_file_of_older_layout_emptied(self, tmp_path):
+        path = str(tmp_path / "cache.db")
+        db = sqlite3.connect(path)
+        db.execute("CREATE TABLE entries (key TEXT PRIMARY KEY, data BLOB NOT NULL, stored REAL, keep_until REAL)")
+        db.execute("INSERT INTO entries VALUES ('t|bug|k', x'00', 0, 1e12)")
+        db.commit()
+        db.close()
+
+        cache = ResponseCache(backend=SQLiteBackend(path))
+        await cache.set("t|bug|k2", "bug", "v", size=1)
+
+        assert await cache.get("t|bug|k") is None
+        assert (await cache.get("t|bug|k2")).value == "v"
+
+        await cache.close()
@@ -0,0 +1,52 @@
+"""Unit tests for the JSON backends"""
+
+import json
+import pydantic_core
+import pytest
+from bugzilla_mcp.utils import jsonlib
+
+
+class TestJsonlib:
+    """Tests for loads, dumps and the typed bug decoder"""
+
+    def test_loads_bytes_and_text(self):
+        assert jsonlib.loads(b'{"bugs": [{"id": 1}]}') == {"bugs": [{"id": 1}]}
+        assert jsonlib.loads('{"summary": "caf\\u00e9"}') == {"summary": "café"}
+
+    def test_dumps_matches_default_tool_serializer(self):
+        """Test that tool results are encoded exactly like fastmcp's default serializer"""
+        result = {1: {"summary": "café ✓", "cc": ["a@example.com"], "flags": None}, "ratio": 0.5, "ok": True}
+
+        assert jsonlib.dumps(result) == pydantic_core.to_json(result, fallback=str).decode()
+
+    def test_dumps_unknown_types_as_text(self):
+        class Opaque:
+            def __str__(self):
+                return "opaque"
+
+        assert json.loads(jsonlib.dumps({"value": Opaque()})) == {"value": "opaque"}
+
+    def test_bugs_decoder_keeps_requested_fields(self):
+        pytest.importorskip("msgspec")
+        decode = jsonlib.bugs_decoder(["id", "summary"])
+        body = json.dumps({"bugs": [{"id": 1, "summary": "s", "description": {"long": ["x"] * 10}}]}).encode()
+
+        assert decode(body) == {"bugs": [{"id": 1, "summary": "s"}]}
+
+    def test_bugs_decoder_keeps_faults(self):
+        pytest.importorskip("msgspec")
+        decode = jsonlib.bugs_decoder(["id"])
+        body = b'{"bugs": [], "faults": [{"id": 2, "faultString": "denied"}]}'
+
+        assert decode(body) == {"bugs": [], "faults": [{"id": 2, "faultString": "denied"}]}
+
+    def test_bugs_decoder_is_reused(self):
+        pytest.importorskip("msgspec")
+        assert jsonlib.bugs_decoder(["id", "summary"]) is jsonlib.bugs_decoder(["id", "summary", "id"])
+
+    def test_typed_decoder_without_msgspec(self, monkeypatch):
+        """Test that the fallback decodes with loads and converts the document"""
+        monkeypatch.setattr(jsonlib, "msgspec", None)
+        decode = jsonlib.typed_decoder(dict, lambda data: sorted(data))
+
+        assert decode(b'{"b": 1, "a": 2}') == ["a", "b"]
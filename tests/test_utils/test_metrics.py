@@ -0,0 +1,98 @@
+"""Unit tests for the Prometheus metrics"""
+
+import json
+from bugzilla_mcp.utils.metrics import Counter, Gauge, Histogram, Metrics, endpoint
+
+
+class TestEndpoint:
+    """Tests for endpoint labels"""
+
+    def test_ids_are_replaced(self):
+        assert endpoint("/rest/bug/123/comment") == "/rest/bug/{id}/comment"
+        assert endpoint("/rest/bug/123") == "/rest/bug/{id}"
+        assert endpoint("/rest/bug") == "/rest/bug"
+        assert endpoint("/page.cgi") == "/page.cgi"
+
+
+class TestInstruments:
+    """Tests for counters, histograms and gauges"""
+
+    def test_counter(self):
+        counter = Counter("requests_total", "Requests", ("host", "status"))
+        counter.inc("a.example.com", "200")
+        counter.inc("a.example.com", "200", amount=2)
+
+        assert list(counter.samples()) == ['requests_total{host="a.example.com",status="200"} 3']
+
+    def test_forget(self):
+        counter = Counter("c", "C", ("host", "status"))
+        counter.inc("a.example.com", "200")
+        counter.inc("b.example.com", "200")
+        histogram = Histogram("d_seconds", "Duration", ("host",))
+        histogram.observe(0.1, "a.example.com")
+
+        counter.forget("host", "a.example.com")
+        histogram.forget("host", "a.example.com")
+
+        assert list(counter.values) == [("b.example.com", "200")]
+        assert histogram.series == {}
+
+    def test_label_values_are_escaped(self):
+        counter = Counter("c", "C", ("tool",))
+        counter.inc('say "hi"\\\n')
+
+        assert list(counter.samples()) == ['c{tool="say \\"hi\\"\\\\\\n"} 1']
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram("d_seconds", "Duration", ("tool",), buckets=(0.1, 1.0))
+        histogram.observe(0.05, "t")
+        histogram.observe(0.1, "t")
+        histogram.observe(0.5, "t")
+        histogram.observe(5.0, "t")
+
+        assert list(histogram.samples()) == [
+            'd_seconds_bucket{tool="t",le="0.1"} 2',
+            'd_seconds_bucket{tool="t",le="1"} 3',
+            'd_seconds_bucket{tool="t",le="+Inf"} 4',
+            'd_seconds_sum{tool="t"} 5.65',
+            'd_seconds_count{tool="t"} 4',
+        ]
+
+    def test_gauge_reads_callback(self):
+        value = {"n": 1}
+        gauge = Gauge("entries", "Entries", lambda: {(): value["n"]})
+        value["n"] = 7
+
+        assert list(gauge.samples()) == ["entries 7"]
+
+    def test_render(self):
+        metrics = Metrics()
+        metrics.upstream_retries.inc("bugzilla.example.com")
+
+        text = metrics.render()
+
+        assert "# TYPE bugzilla_mcp_tool_duration_seconds histogram\n" in text
+        assert "# HELP bugzilla_mcp_upstream_retries_total " in text
+        assert 'bugzilla_mcp_upstream_retries_total{host="bugzilla.example.com"} 1\n' in text
+        assert text.endswith("\n")
+
+    def test_render_adds_up_snapshots(self):
+        """Test that the series of other processes are merged with those of this one"""
+        other = Metrics()
+        other.upstream_retries.inc("a.example.com", amount=2)
+        other.upstream_retries.inc("b.example.com")
+        other.tool_duration.observe(0.2, "bug_info", "a.example.com")
+        metrics = Metrics()
+        metrics.upstream_retries.inc("a.example.com")
+        metrics.tool_duration.observe(0.2, "bug_info", "a.example.com")
+        open_circuit = Gauge("circuit_open", "Open", lambda: {(): 1.0}, combine=max)
+        metrics.add(open_circuit)
+
+        text = metrics.render([json.loads(json.dumps(other.snapshot())), {"circuit_open": {"series": [[[], 1.0]]}}])
+
+        assert 'bugzilla_mcp_upstream_retries_total{host="a.example.com"} 3\n' in text
+        assert 'bugzilla_mcp_upstream_retries_total{host="b.example.com"} 1\n' in text
+        assert 'bugzilla_mcp_tool_duration_seconds_count{tool="bug_info",host="a.example.com"} 2\n' in text
+        assert "circuit_open 1\n" in text
+        # this process's own series are left as they were
+        assert metrics.upstream_retries.values == {("a.example.com",): 1.0}
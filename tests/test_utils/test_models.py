@@ -0,0 +1,62 @@
+"""Unit tests for the bug and comment records"""
+
+import pytest
+from bugzilla_mcp.utils import jsonlib
+from bugzilla_mcp.utils.bugzilla import _BugsPage, _CommentsPage, _to_bugs, _to_comments
+from bugzilla_mcp.utils.models import BUG_FIELDS, ESSENTIAL_FIELDS, Bug, Comment, SearchRow
+from tests.conftest import SAMPLE_COMMENTS_RESPONSE, SAMPLE_SEARCH_RESULTS
+
+
+class TestModels:
+    """Tests for Bug, SearchRow and Comment"""
+
+    def test_essential_fields_are_the_bug_fields(self):
+        assert list(ESSENTIAL_FIELDS.values()) == BUG_FIELDS
+        assert ESSENTIAL_FIELDS["bug_id"] == "id"
+        assert ESSENTIAL_FIELDS["last_updated"] == "last_change_time"
+
+    def test_records_have_no_instance_dict(self):
+        for record in (Bug(1), SearchRow(1), Comment(1)):
+            assert not hasattr(record, "__dict__")
+
+    def test_search_row_from_bug_or_dict(self):
+        bug = SAMPLE_SEARCH_RESULTS["bugs"][0]
+        row = SearchRow(12345, "Firefox", "General", "developer@example.com", "NEW", "", "Test bug 1", "2023-01-20T15:45:00Z")
+
+        assert SearchRow.from_bug(bug) == row
+        assert SearchRow.from_bug(Bug.from_dict(bug)) == row
+
+    def test_comment_ignores_other_fields(self):
+        comment = Comment.from_dict({"id": 1, "bug_id": 2, "text": "hi", "time": "2023-01-15T10:30:00Z"})
+
+        assert comment == Comment(1, 2, text="hi")
+
+    def test_records_encode_like_dicts(self):
+        assert jsonlib.loads(jsonlib.dumps([SearchRow(1, summary="s")])) == [
+            {"bug_id": 1, "product": None, "component": None, "assigned_to": None,
+             "status": None, "resolution": None, "summary": "s", "last_updated": None}
+        ]
+
+
+class TestDecoders:
+    """Tests for the decoding of responses into records, with msgspec or without"""
+
+    @pytest.fixture(params=["msgspec", "fallback"])
+    def typed_decoder(self, request, monkeypatch):
+        if request.param == "msgspec":
+            pytest.importorskip("msgspec")
+        else:
+            monkeypatch.setattr(jsonlib, "msgspec", None)
+        return jsonlib.typed_decoder
+
+    def test_bugs_page(self, typed_decoder):
+        decode = typed_decoder(_BugsPage, _to_bugs)
+        page = decode(jsonlib.dumps(SAMPLE_SEARCH_RESULTS).encode())
+
+        assert page["bugs"] == [Bug.from_dict(bug) for bug in SAMPLE_SEARCH_RESULTS["bugs"]]
+
+    def test_comments_page(self, typed_decoder):
+        decode = typed_decoder(_CommentsPage, _to_comments)
+        comments = decode(jsonlib.dumps(SAMPLE_COMMENTS_RESPONSE).encode())["bugs"]["12345"]["comments"]
+
+        assert comments == [Comment.from_dict(c) for c in SAMPLE_COMMENTS_RESPONSE["bugs"]["12345"]["comments"]]
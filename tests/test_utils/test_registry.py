@@ -0,0 +1,201 @@
+"""Unit tests for the pooled Bugzilla client registry"""
+
+import asyncio
+import pytest
+import httpx
+from unittest.mock import patch
+from bugzilla_mcp.utils import Bugzilla, ClientRegistry
+from bugzilla_mcp.utils.metrics import Metrics
+from bugzilla_mcp.utils.registry import tenant_key
+from tests.fake_bugzilla import FakeBugzilla, make_bug
+
+
+class TestClientRegistry:
+    """Tests for ClientRegistry"""
+
+    async def test_get_creates_client(self):
+        """Test that the first lookup creates a client and counts a miss"""
+        registry = ClientRegistry()
+        bz = await registry.get("https://bugzilla.example.com", "key")
+
+        assert isinstance(bz, Bugzilla)
+        assert bz.base_url == "https://bugzilla.example.com"
+        assert registry.stats() == {"clients": 1, "hits": 0, "misses": 1, "evictions": 0}
+
+        await registry.close()
+
+    async def test_get_reuses_client(self):
+        """Test that repeated lookups return the same client"""
+        registry = ClientRegistry()
+        first = await registry.get("https://bugzilla.example.com", "key")
+        second = await registry.get("https://bugzilla.example.com", "key")
+
+        assert first is second
+        assert registry.hits == 1
+        assert registry.misses == 1
+
+        await registry.close()
+
+    async def test_lru_eviction_closes_client(self):
+        """Test that the least recently used client is evicted and closed"""
+        registry = ClientRegistry(max_clients=2)
+        a = await registry.get("https://a.example.com", "key")
+        b = await registry.get("https://b.example.com", "key")
+        # touch a so that b becomes the least recently used
+        await registry.get("https://a.example.com", "key")
+        await registry.get("https://c.example.com", "key")
+
+        assert registry.evictions == 1
+        assert b.client.is_closed is True
+        assert a.client.is_closed is False
+        assert len(registry) == 2
+
+        await registry.close()
+
+    async def test_leased_client_closed_after_use(self):
+        """Test that a client evicted while a message uses it keeps working until the message is done"""
+        fake = FakeBugzilla(bugs=[make_bug(1)], history={1: []}, max_latency=0.02)
+        registry = ClientRegistry(max_clients=1, transport=fake.transport())
+        started = asyncio.Event()
+
+        async def long_call():
+            async with registry.lease("https://a.example.com", "key") as bz:
+                started.set()
+                await asyncio.sleep(0.01)
+                return bz, await bz.changed_bugs_since("2020-01-01T00:00:00Z")
+
+        call = asyncio.create_task(long_call())
+        await asyncio.wait_for(started.wait(), timeout=1)
+
+        # evicts the client of a.example.com while long_call uses it
+        async with registry.lease("https://b.example.com", "key"):
+            pass
+
+        a, feed = await call
+
+        assert [bug["bug_id"] for bug in feed["bugs"]] == [1]
+        assert registry.evictions == 1
+        assert a.client.is_closed is True
+        assert len(registry) == 1
+
+        await registry.close()
+
+    async def test_idle_clients_expire(self):
+        """Test that clients idle for longer than idle_ttl are closed"""
+        registry = ClientRegistry(idle_ttl=10)
+
+        with patch("bugzilla_mcp.utils.registry.time.monotonic", return_value=100.0):
+            old = await registry.get("https://a.example.com", "key")
+
+        with patch("bugzilla_mcp.utils.registry.time.monotonic", return_value=200.0):
+            new = await registry.get("https://a.example.com", "key")
+
+        assert new is not old
+        assert old.client.is_closed is True
+        assert registry.evictions == 1
+        assert registry.misses == 2
+
+        await registry.close()
+
+    async def test_connection_budget_is_split_between_clients(self):
+        """Test that per-client pool limits respect the total connection cap"""
+        registry = ClientRegistry(max_clients=4, max_connections=20)
+
+        assert registry.limits.max_connections == 5
+        assert registry.limits.max_keepalive_connections == 5
+
+    async def test_close_closes_all_clients(self):
+        """Test that close() closes every pooled client"""
+        registry = ClientRegistry()
+        a = await registry.get("https://a.example.com", "key")
+        b = await registry.get("https://b.example.com", "key")
+
+        await registry.close()
+
+        assert a.client.is_closed is True
+        assert b.client.is_closed is True
+        assert len(registry) == 0
+
+    def test_tenant_key_hashes_api_key(self):
+        """Test that the API key is never stored in clear in the registry key"""
+        key = tenant_key("https://a.example.com", "secret")
+
+        assert "secret" not in key
+        assert key == tenant_key("https://a.example.com", "secret")
+        assert key != tenant_key("https://a.example.com", "other")
+
+    def test_invalid_max_clients(self):
+        """Test that max_clients must be positive"""
+        with pytest.raises(ValueError):
+            ClientRegistry(max_clients=0)
+
+    async def test_transport_is_passed_to_clients(self):
+        """Test that a custom transport is used by pooled clients"""
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, json={"bugs": [{"id": 1}]}))
+        registry = ClientRegistry(transport=transport)
+        bz = await registry.get("https://a.example.com", "key")
+
+        assert (await bz.bug_info(1))["id"] == 1
+
+        await registry.close()
+
+    async def test_breaker_shared_per_instance(self):
+        """Test that tenants of one Bugzilla share its circuit breaker"""
+        registry = ClientRegistry()
+        a = await registry.get("https://a.example.com", "key-1")
+        b = await registry.get("https://a.example.com", "key-2")
+        c = await registry.get("https://c.example.com", "key-1")
+
+        assert a.breaker is b.breaker
+        assert a.breaker is not c.breaker
+        assert a.retry is c.retry
+
+        await registry.close()
+
+    async def test_rate_limit_shared_per_instance(self):
+        """Test that tenants of one Bugzilla share its rate limit but not their request slots"""
+        registry = ClientRegistry(rate_limit=5, max_concurrent_requests=2)
+        a = await registry.get("https://a.example.com", "key-1")
+        b = await registry.get("https://a.example.com", "key-2")
+        c = await registry.get("https://c.example.com", "key-1")
+
+        assert a.rate_limiter is b.rate_limiter
+        assert a.rate_limiter is not c.rate_limiter
+        assert a.rate_limiter.rate == 5
+        assert a.semaphore is not b.semaphore
+
+        await registry.close()
+
+    async def test_instances_forgotten_with_their_last_client(self):
+        """Test that breakers, rate limits and metric series do not pile up for every URL ever sent"""
+        metrics = Metrics()
+        registry = ClientRegistry(max_clients=2, rate_limit=5, metrics=metrics)
+        a = await registry.get("https://a.example.com", "key-1")
+        await registry.get("https://a.example.com", "key-2")
+        metrics.upstream_retries.inc(a.host)
+
+        async with registry.lease("https://b.example.com", "key-1") as b:
+            metrics.upstream_retries.inc(b.host)
+            # evicts both clients of a, and b once its lease ends
+            await registry.get("https://c.example.com", "key-1")
+            await registry.get("https://d.example.com", "key-1")
+
+            assert set(registry.breakers) == set(registry.limiters) == {
+                "https://b.example.com", "https://c.example.com", "https://d.example.com"
+            }
+            assert list(metrics.upstream_retries.values) == [("b.example.com",)]
+
+        assert set(registry.breakers) == set(registry.limiters) == {"https://c.example.com", "https://d.example.com"}
+        assert metrics.upstream_retries.values == {}
+
+        await registry.close()
+
+    async def test_no_rate_limit_by_default(self):
+        """Test that without rate_limit requests are only bounded by the connections of each client"""
+        registry = ClientRegistry(max_clients=4, max_connections=40)
+        client = await registry.get("https://a.example.com", "key-1")
+
+        assert client.rate_limiter is None
+        assert registry.max_concurrent_requests == 10
+
+        await registry.close()
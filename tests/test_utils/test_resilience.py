@@ -0,0 +1,163 @@
+"""Unit tests for retry scheduling and the circuit breaker"""
+
+import asyncio
+import pytest
+from unittest.mock import patch
+from bugzilla_mcp.utils.resilience import CircuitBreaker, CircuitOpenError, Retry, TokenBucket, parse_retry_after
+
+
+class TestRetry:
+    """Tests for Retry delays"""
+
+    def test_backoff_grows_and_is_capped(self):
+        """Test that the jittered delay stays within the exponential envelope"""
+        retry = Retry(backoff=1, max_backoff=5)
+
+        for attempt, ceiling in [(0, 1), (1, 2), (2, 4), (5, 5)]:
+            for _ in range(20):
+                assert 0 <= retry.delay(attempt) <= ceiling
+
+    def test_retry_after_seconds(self):
+        """Test that Retry-After in seconds is used as is"""
+        assert Retry(max_backoff=60).delay(0, "7") == 7
+
+    def test_retry_after_is_capped(self):
+        """Test that an excessive Retry-After is capped by max_backoff"""
+        assert Retry(max_backoff=10).delay(0, "3600") == 10
+
+    def test_parse_retry_after_http_date(self):
+        """Test that a past HTTP date means no wait"""
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+    def test_parse_retry_after_invalid(self):
+        """Test that an unparsable value is ignored"""
+        assert parse_retry_after("soon") is None
+
+
+class TestCircuitBreaker:
+    """Tests for CircuitBreaker states"""
+
+    def test_opens_after_consecutive_failures(self):
+        """Test that the circuit opens at the failure threshold"""
+        breaker = CircuitBreaker(failure_threshold=3)
+
+        for _ in range(2):
+            breaker.record_failure()
+        breaker.before_request()
+
+        breaker.record_failure()
+
+        with pytest.raises(CircuitOpenError):
+            breaker.before_request()
+
+    def test_success_resets_failures(self):
+        """Test that only consecutive failures count"""
+        breaker = CircuitBreaker(failure_threshold=2)
+
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_half_open_probe(self):
+        """Test that one probe is allowed after reset_timeout and its success closes the circuit"""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+
+        with patch("bugzilla_mcp.utils.resilience.time.monotonic", return_value=100.0):
+            breaker.record_failure()
+
+        with patch("bugzilla_mcp.utils.resilience.time.monotonic", return_value=111.0):
+            breaker.before_request()
+            assert breaker.state == CircuitBreaker.HALF_OPEN
+
+            # other requests are rejected while the probe is in flight
+            with pytest.raises(CircuitOpenError):
+                breaker.before_request()
+
+        breaker.record_success()
+
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_failed_probe_reopens(self):
+        """Test that a failed probe opens the circuit again"""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+
+        with patch("bugzilla_mcp.utils.resilience.time.monotonic", return_value=100.0):
+            breaker.record_failure()
+
+        with patch("bugzilla_mcp.utils.resilience.time.monotonic", return_value=111.0):
+            breaker.before_request()
+            breaker.record_failure()
+
+            assert breaker.state == CircuitBreaker.OPEN
+            with pytest.raises(CircuitOpenError):
+                breaker.before_request()
+
+        assert breaker.opened == 2
+
+    def test_lost_probe_lets_another_through(self):
+        """Test that an abandoned probe, or one without outcome after reset_timeout, does not keep the circuit half open"""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+
+        with patch("bugzilla_mcp.utils.resilience.time.monotonic", return_value=100.0):
+            breaker.record_failure()
+
+        with patch("bugzilla_mcp.utils.resilience.time.monotonic", return_value=111.0):
+            breaker.before_request()
+            breaker.abandon()
+            assert breaker.state == CircuitBreaker.OPEN
+
+        with patch("bugzilla_mcp.utils.resilience.time.monotonic", return_value=122.0):
+            breaker.before_request()
+
+        with patch("bugzilla_mcp.utils.resilience.time.monotonic", return_value=133.0):
+            # no outcome was recorded for the previous probe
+            breaker.before_request()
+            assert breaker.state == CircuitBreaker.HALF_OPEN
+
+
+class TestTokenBucket:
+    """Tests for the TokenBucket rate limit"""
+
+    async def test_burst_passes_without_waiting(self):
+        """Test that up to burst requests go through at once"""
+        bucket = TokenBucket(rate=10, burst=3)
+
+        assert [await bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+        assert bucket.delayed == 0
+
+    async def test_requests_over_the_limit_wait_in_order(self):
+        """Test that requests over the burst are spaced by 1/rate, first come first served"""
+        bucket = TokenBucket(rate=100, burst=1)
+        order = []
+
+        async def request(i):
+            waited = await bucket.acquire()
+            order.append(i)
+            return waited
+
+        waits = await asyncio.gather(*(request(i) for i in range(4)))
+
+        assert order == [0, 1, 2, 3]
+        assert waits[0] == 0.0
+        assert waits[1:] == pytest.approx([0.01, 0.02, 0.03], abs=0.002)
+        assert bucket.delayed == 3
+        assert bucket.waiting == 0
+
+    async def test_cancelled_wait_returns_its_token(self):
+        """Test that a request cancelled while waiting does not keep its reservation"""
+        bucket = TokenBucket(rate=10, burst=1)
+        await bucket.acquire()
+
+        waiter = asyncio.create_task(bucket.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        assert bucket.tokens == pytest.approx(0, abs=0.1)
+
+    def test_rate_must_be_positive(self):
+        with pytest.raises(ValueError):
+            TokenBucket(rate=0)
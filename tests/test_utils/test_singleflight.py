@@ -0,0 +1,121 @@
+"""Unit tests for in-flight call de-duplication"""
+
+import asyncio
+import pytest
+from bugzilla_mcp.utils import SingleFlight
+
+
+class TestSingleFlight:
+    """Tests for SingleFlight"""
+
+    async def test_concurrent_calls_are_coalesced(self):
+        """Test that concurrent calls with the same key run once"""
+        flight = SingleFlight()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"id": 1}
+
+        results = await asyncio.gather(*(flight.do("k", fetch) for _ in range(10)))
+
+        assert calls == 1
+        assert all(r is results[0] for r in results)
+        assert flight.stats() == {"in_flight": 0, "calls": 1, "coalesced": 9}
+
+    async def test_different_keys_are_not_coalesced(self):
+        """Test that different keys run independently"""
+        flight = SingleFlight()
+
+        async def fetch(value):
+            await asyncio.sleep(0.01)
+            return value
+
+        results = await asyncio.gather(flight.do("a", lambda: fetch(1)), flight.do("b", lambda: fetch(2)))
+
+        assert results == [1, 2]
+        assert flight.coalesced == 0
+
+    async def test_sequential_calls_are_not_coalesced(self):
+        """Test that results are not kept once the call is over"""
+        flight = SingleFlight()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            return calls
+
+        assert await flight.do("k", fetch) == 1
+        assert await flight.do("k", fetch) == 2
+
+    async def test_errors_are_shared(self):
+        """Test that every waiter receives the exception of the shared call"""
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+
+        results = await asyncio.gather(*(flight.do("k", fail) for _ in range(3)), return_exceptions=True)
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert len(flight) == 0
+
+    async def test_cancelled_waiter_does_not_cancel_call(self):
+        """Test that cancelling a waiter leaves the shared call running"""
+        flight = SingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        leader = asyncio.create_task(flight.do("k", fetch))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(flight.do("k", fetch))
+        await asyncio.sleep(0)
+        waiter.cancel()
+
+        assert await leader == "done"
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+    async def test_cancelled_leader_does_not_cancel_waiters(self):
+        """Test that the caller which started the call can go away without failing the others"""
+        flight = SingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        leader = asyncio.create_task(flight.do("k", fetch))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(flight.do("k", fetch))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        assert await waiter == "done"
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        assert len(flight) == 0
+
+    async def test_call_cancelled_without_waiters(self):
+        """Test that the shared call stops once every caller was cancelled"""
+        flight = SingleFlight()
+        stopped = asyncio.Event()
+
+        async def fetch():
+            try:
+                await asyncio.sleep(10)
+            finally:
+                stopped.set()
+
+        caller = asyncio.create_task(flight.do("k", fetch))
+        await asyncio.sleep(0)
+        caller.cancel()
+
+        await asyncio.wait_for(stopped.wait(), timeout=1)
+        await asyncio.sleep(0)
+        assert len(flight) == 0
@@ -0,0 +1,157 @@
+"""Unit tests for the optional OpenTelemetry tracing"""
+
+import json
+from unittest.mock import AsyncMock, MagicMock
+import httpx
+import pytest
+from bugzilla_mcp.utils import Bugzilla, tracing
+from bugzilla_mcp.utils.resilience import Retry
+
+sdk_trace = pytest.importorskip("opentelemetry.sdk.trace")
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor  # noqa: E402
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter  # noqa: E402
+
+
+@pytest.fixture
+def spans(monkeypatch):
+    """Enable tracing into an in-memory exporter, returning it"""
+    exporter = InMemorySpanExporter()
+    provider = sdk_trace.TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    monkeypatch.setattr(tracing, "tracer", provider.get_tracer("test"))
+    return exporter
+
+
+class TestTracingSetup:
+    """Tests for configure, disable and traced"""
+
+    def test_disabled_by_default(self):
+        assert tracing.tracer is None
+        assert not tracing.configure(None)
+        assert not tracing.configure("")
+        assert not tracing.enabled()
+
+    async def test_traced_function_without_tracing(self):
+        """Test that a traced tool runs unchanged while tracing is disabled"""
+        tool = tracing.traced(AsyncMock(return_value=42, __name__="tool"))
+
+        assert await tool(1, key="value") == 42
+
+    async def test_file_exporter(self, tmp_path):
+        """Test that spans are written as JSON to the configured file"""
+        path = tmp_path / "spans.json"
+
+        async def bug_info():
+            return "bug"
+
+        try:
+            assert tracing.configure(f"file:{path}")
+            assert await tracing.traced(bug_info)() == "bug"
+        finally:
+            tracing.disable()
+
+        assert tracing.tracer is None
+        assert '"name": "tool bug_info"' in path.read_text()
+
+    def test_unknown_exporter(self):
+        with pytest.raises(ValueError):
+            tracing.configure("carrier-pigeon")
+
+
+class TestClientSpans:
+    """Tests for the spans of Bugzilla requests"""
+
+    BUG_URL = "https://bugzilla.mozilla.org/rest/bug/12345?api_key=secret-key"
+
+    async def test_request_and_decode_spans(self, spans, httpx_mock):
+        """Test that a request gets a client span, with JSON decoding as a child"""
+        httpx_mock.add_response(url=self.BUG_URL, json={"bugs": [{"id": 12345}]})
+        bz = Bugzilla(url="https://bugzilla.mozilla.org", api_key="secret-key")
+
+        async def bug_info():
+            return await bz.bug_info(12345)
+
+        await tracing.traced(bug_info)()
+
+        finished = {span.name: span for span in spans.get_finished_spans()}
+        assert set(finished) == {"tool bug_info", "GET /rest/bug/{id}", "decode json"}
+
+        request = finished["GET /rest/bug/{id}"]
+        assert request.attributes["http.request.method"] == "GET"
+        assert request.attributes["server.address"] == "bugzilla.mozilla.org"
+        assert request.attributes["http.response.status_code"] == 200
+        assert request.parent.span_id == finished["tool bug_info"].context.span_id
+        assert finished["decode json"].parent.span_id == finished["tool bug_info"].context.span_id
+        assert "secret-key" not in json.dumps([dict(s.attributes) for s in finished.values()])
+
+        await bz.close()
+
+    async def test_each_attempt_has_a_span(self, spans, httpx_mock):
+        """Test that a retried request gets one span per attempt"""
+        httpx_mock.add_response(url=self.BUG_URL, status_code=503)
+        httpx_mock.add_response(url=self.BUG_URL, json={"bugs": [{"id": 12345}]})
+        bz = Bugzilla(url="https://bugzilla.mozilla.org", api_key="secret-key", retry=Retry(backoff=0))
+
+        await bz.bug_info(12345)
+
+        attempts = [s for s in spans.get_finished_spans() if s.name == "GET /rest/bug/{id}"]
+        assert [s.attributes["http.response.status_code"] for s in attempts] == [503, 200]
+        assert attempts[1].attributes["http.request.resend_count"] == 1
+        assert attempts[0].status.status_code.name == "ERROR"
+
+        await bz.close()
+
+    async def test_transport_error_recorded(self, spans, httpx_mock):
+        """Test that a request without response ends its span with the error"""
+        httpx_mock.add_exception(httpx.ConnectError("Connection refused"), url=self.BUG_URL)
+        bz = Bugzilla(url="https://bugzilla.mozilla.org", api_key="secret-key", retry=Retry(attempts=1))
+
+        with pytest.raises(httpx.ConnectError):
+            await bz.bug_info(12345)
+
+        (span,) = spans.get_finished_spans()
+        assert span.status.status_code.name == "ERROR"
+        assert span.events[0].name == "exception"
+
+        await bz.close()
+
+    async def test_http_phases(self, spans):
+        """Test that httpcore trace events become child spans"""
+        phases = tracing.HttpPhases()
+
+        with tracing.tracer.start_as_current_span("GET /rest/bug/{id}"):
+            await phases("connection.connect_tcp.started", {})
+            await phases("connection.connect_tcp.complete", {})
+            await phases("http11.receive_response_headers.started", {})
+            await phases("http11.receive_response_headers.failed", {"exception": TimeoutError()})
+
+        finished = {span.name: span for span in spans.get_finished_spans()}
+        assert set(finished) == {"GET /rest/bug/{id}", "connect_tcp", "receive_response_headers"}
+        assert finished["connect_tcp"].parent.span_id == finished["GET /rest/bug/{id}"].context.span_id
+        assert finished["receive_response_headers"].attributes["error.type"] == "TimeoutError"
+
+
+class TestTraceMessagesMiddleware:
+    """Tests for TraceMessages middleware"""
+
+    async def test_message_and_tool_spans(self, spans, set_bugzilla_client):
+        """Test that a tool call nests under its MCP message"""
+        from bugzilla_mcp.middleware import TraceMessages
+
+        set_bugzilla_client.host = "bugzilla.mozilla.org"
+        middleware = TraceMessages()
+        context = MagicMock()
+        context.method = "tools/call"
+        context.message.name = "bug_info"
+
+        async def tool(ctx):
+            return "result"
+
+        async def call_tool(ctx):
+            return await middleware.on_call_tool(ctx, tool)
+
+        assert await middleware.on_message(context, call_tool) == "result"
+
+        finished = {span.name: span for span in spans.get_finished_spans()}
+        assert finished["call_tool bug_info"].parent.span_id == finished["mcp tools/call"].context.span_id
+        assert finished["call_tool bug_info"].attributes["server.address"] == "bugzilla.mozilla.org"
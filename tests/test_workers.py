@@ -0,0 +1,109 @@
+"""Tests for the multi-process deployment mode"""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import pytest
+from bugzilla_mcp import workers
+from bugzilla_mcp.utils.metrics import Gauge, Metrics
+from bugzilla_mcp.utils.resp import RespClient
+
+
+class TestWorkerCount:
+    """Tests for BUGZILLA_MCP_WORKERS"""
+
+    def test_auto_uses_available_cores(self, monkeypatch):
+        monkeypatch.setattr(workers, "available_cores", lambda: 6)
+
+        assert workers.worker_count(None) == 6
+        assert workers.worker_count("auto") == 6
+
+    def test_explicit_count(self):
+        assert workers.worker_count("1") == 1
+        assert workers.worker_count("4") == 4
+
+    def test_invalid_count(self):
+        with pytest.raises(ValueError):
+            workers.worker_count("0")
+        with pytest.raises(ValueError):
+            workers.worker_count("many")
+
+    def test_available_cores(self):
+        assert 1 <= workers.available_cores() <= (os.cpu_count() or 1)
+
+
+class TestWorkerShare:
+    """Tests for the upstream limits split between the workers"""
+
+    def test_rate_is_split(self):
+        assert workers.worker_share(10.0, 1) == 10.0
+        assert workers.worker_share(10.0, 4) == 2.5
+
+    def test_slots_are_split(self):
+        assert workers.worker_slots(8, 4) == 2
+        assert workers.worker_slots(9, 4) == 2
+
+    def test_every_worker_gets_a_slot(self):
+        assert workers.worker_slots(4, 8) == 1
+
+
+class TestWorkerMetrics:
+    """Tests for the metrics of every worker served by any of them"""
+
+    def snapshot(self, retries, clients):
+        metrics = Metrics()
+        metrics.upstream_retries.inc("bugzilla.example.com", amount=retries)
+        metrics.add(Gauge("bugzilla_mcp_clients", "Clients", lambda: {(): clients}))
+        return metrics.snapshot()
+
+    def test_workers_added_up(self, tmp_path):
+        exited = subprocess.Popen([sys.executable, "-c", ""])
+        exited.wait()
+        for pid, snapshot in [(os.getppid(), self.snapshot(2, 3)), (exited.pid, self.snapshot(5, 4))]:
+            (tmp_path / f"{pid}.json").write_text(json.dumps(snapshot))
+        (tmp_path / "1.json.tmp").write_text("{")
+        metrics = Metrics()
+        metrics.upstream_retries.inc("bugzilla.example.com")
+        metrics.add(Gauge("bugzilla_mcp_clients", "Clients", lambda: {(): 1}))
+
+        text = workers.render_metrics(str(tmp_path), metrics)
+
+        assert 'bugzilla_mcp_upstream_retries_total{host="bugzilla.example.com"} 8\n' in text
+        # the clients of the exited worker are gone
+        assert "bugzilla_mcp_clients 4\n" in text
+
+    def test_saved_until_stopped(self, tmp_path):
+        metrics = Metrics()
+
+        async def publish():
+            async with workers.publish_metrics(str(tmp_path), metrics, interval=0.01):
+                await asyncio.sleep(0.05)
+                metrics.upstream_retries.inc("bugzilla.example.com")
+
+        asyncio.run(publish())
+        saved = json.loads((tmp_path / f"{os.getpid()}.json").read_text())
+
+        assert saved["bugzilla_mcp_upstream_retries_total"]["series"] == [[["bugzilla.example.com"], 1.0]]
+        assert [path.name for path in tmp_path.iterdir()] == [f"{os.getpid()}.json"]
+
+
+class TestCacheServerProcess:
+    """Tests for the cache server started next to the workers"""
+
+    def test_serves_on_private_socket_and_cleans_up(self):
+        with workers.cache_server(1024 * 1024) as url:
+            path = url.removeprefix("unix://")
+            assert os.stat(path).st_mode & 0o077 == 0
+
+            async def roundtrip():
+                client = RespClient(url)
+                await client.execute("SET", "k", "v")
+                value = await client.execute("GET", "k")
+                await client.close()
+                return value
+
+            assert asyncio.run(roundtrip()) == b"v"
+
+        assert not os.path.exists(path)